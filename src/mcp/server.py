@@ -9,8 +9,12 @@ import mcp.server.stdio
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
+from src.shared import k8s_client
 from src.shared.base_functions import function_registry
 from src.shared.functions import initialize_functions
+from src.shared.functions.binding_policy_management import BindingPolicyManagement
+from src.shared.functions.check_cluster_upgrades import CheckClusterUpgradesFunction
+from src.shared.functions.fetch_manifest import FetchManifestFunction
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -63,19 +67,27 @@ async def run_server():
     server.set_request_handler(types.CallToolRequest, handle_call_tool)
 
     # Run the server
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="kubestellar-mcp-server",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="kubestellar-mcp-server",
+                    server_version="0.1.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
+    finally:
+        # Release pooled HTTP connections held by shared sessions
+        await CheckClusterUpgradesFunction.aclose()
+        await FetchManifestFunction.aclose()
+        await k8s_client.aclose()
+        # Delete cached exec-plugin tokens written to disk
+        await BindingPolicyManagement.aclose()
 
 
 def main():
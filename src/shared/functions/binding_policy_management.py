@@ -1,6 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import hashlib
 import json
+import os
+import shutil
+import tempfile
+import time
 from collections.abc import MutableMapping, Sequence
 from dataclasses import dataclass
 from datetime import datetime
@@ -8,8 +15,266 @@ from typing import Any, Dict, List
 
 import yaml
 
+try:  # libyaml-backed emitter when available
+    from yaml import CSafeDumper as _Dumper
+except ImportError:  # pragma: no cover - pure-Python fallback
+    from yaml import SafeDumper as _Dumper  # type: ignore[assignment]
+
 from src.shared.base_functions import BaseFunction
-from src.shared.utils import run_subprocess_with_cancellation
+from src.shared.json_utils import json_dumps, json_loads
+from src.shared.utils import resolve_executable, run_subprocess_with_cancellation
+
+_NATIVE_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+# Valid matchExpressions operators, left untouched without lower-casing
+_K8S_OPERATORS = frozenset(("In", "NotIn", "Exists", "DoesNotExist", "Gt", "Lt"))
+
+# Aliases users pass for matchExpressions operators -> Kubernetes operators
+_OPERATOR_MAP = {
+    "equals": "In",
+    "equal": "In",
+    "=": "In",
+    "==": "In",
+    "not_equals": "NotIn",
+    "notequal": "NotIn",
+    "!=": "NotIn",
+    "<>": "NotIn",
+    "exists": "Exists",
+    "present": "Exists",
+    "not_exists": "DoesNotExist",
+    "absent": "DoesNotExist",
+    "!exists": "DoesNotExist",
+}
+
+# type -> "map" | "repeated" | "other", filled lazily by _classify_type
+_PB_TYPE_CACHE: Dict[type, str] = {}
+
+
+def _classify_type(t: type) -> str:
+    """Decide once per type how _convert_to_native should treat it."""
+    if issubclass(t, (str, int, float, bool)):
+        kind = "other"
+    # Explicitly handle protobuf MapComposite/RepeatedComposite by type name
+    # This catches objects that might not pass standard ABC checks
+    elif "MapComposite" in t.__name__ and hasattr(t, "items"):
+        kind = "map"
+    elif "RepeatedComposite" in t.__name__ and hasattr(t, "__iter__"):
+        kind = "repeated"
+    elif issubclass(t, (dict, MutableMapping)):
+        kind = "map"
+    # Convert List/Sequence (exclude str/bytes)
+    elif issubclass(t, (list, tuple, Sequence)) and not issubclass(t, bytes):
+        kind = "repeated"
+    else:
+        kind = "other"
+    _PB_TYPE_CACHE[t] = kind
+    return kind
+
+
+def _normalize_selectors(obj: Any) -> Any:
+    """
+    Convert protobuf composites to native containers and fix invalid
+    Kubernetes operators in matchExpressions, in a single pass.
+
+    The caller's dicts and lists are never modified: a native container is
+    copied only when something inside it changes, and returned as-is
+    otherwise. Composites are always rebuilt.
+    """
+    t = type(obj)
+    if t is dict:
+        out = None
+        for k, v in obj.items():
+            if k == "operator" and isinstance(v, str):
+                if v in _K8S_OPERATORS:
+                    continue
+                new = _OPERATOR_MAP.get(v.lower(), v)
+            elif type(v) not in _NATIVE_SCALARS:
+                new = _normalize_selectors(v)
+            else:
+                continue
+            if new is not v:
+                if out is None:
+                    out = dict(obj)
+                out[k] = new
+        return obj if out is None else out
+    if t is list:
+        out = None
+        for i, v in enumerate(obj):
+            if type(v) not in _NATIVE_SCALARS:
+                new = _normalize_selectors(v)
+                if new is not v:
+                    if out is None:
+                        out = list(obj)
+                    out[i] = new
+        return obj if out is None else out
+    if t in _NATIVE_SCALARS:
+        return obj
+
+    kind = _PB_TYPE_CACHE.get(t) or _classify_type(t)
+    if kind == "map":
+        return _normalize_selectors(dict(obj.items()))
+    if kind == "repeated":
+        return _normalize_selectors(list(obj))
+    return obj
+
+
+# Seconds a successful `list` result is reused for the same context.
+_LIST_CACHE_TTL = 2.0
+
+# Maximum number of per-revision YAML dumps kept for `list`.
+_YAML_CACHE_SIZE = 1024
+
+# Refresh cached exec-plugin tokens this many seconds before they expire.
+_TOKEN_REFRESH_MARGIN = 60.0
+
+# Seconds a failed exec-plugin lookup is remembered before it is retried.
+_TOKEN_FAILURE_BACKOFF = 30.0
+
+# ExecCredential API version assumed when an exec entry names none.
+_EXEC_API_VERSION = "client.authentication.k8s.io/v1beta1"
+
+
+def _kubeconfig_dir(kubeconfig: str) -> str:
+    """Return the directory of the kubeconfig kubectl reads for ``kubeconfig``.
+
+    With a ``KUBECONFIG`` path list the first existing file is used.
+    """
+    path = kubeconfig
+    if not path:
+        paths = [p for p in os.environ.get("KUBECONFIG", "").split(os.pathsep) if p]
+        path = next(
+            (p for p in paths if os.path.exists(os.path.expanduser(p))),
+            "~/.kube/config",
+        )
+    return os.path.dirname(os.path.abspath(os.path.expanduser(path)))
+
+
+def _parse_dict_arg(value: Any) -> Any:
+    """Accept a mapping, a JSON object string or a ``key=value`` string."""
+    if isinstance(value, str):
+        if not value:
+            return {}
+        try:
+            value = json_loads(value)
+        except json.JSONDecodeError:
+            k, _, v = value.partition("=")
+            return {k.strip(): v.strip()}
+    if value and not isinstance(value, dict):
+        value = dict(value)
+    return value
+
+
+def _parse_list_arg(value: Any) -> Any:
+    """Accept a sequence, a JSON array string or a comma-separated string."""
+    if isinstance(value, str):
+        try:
+            value = json_loads(value)
+        except json.JSONDecodeError:
+            return [s.strip() for s in value.split(",") if s.strip()]
+    if value and not isinstance(value, list):
+        value = list(value)
+    return value
+
+
+def _flatten_selectors(selectors: List[Dict[str, Any]]) -> set[str]:
+    """Flatten clusterSelectors into cluster names or ``key:value`` labels."""
+    clusters: set[str] = set()
+    for sel in selectors:
+        labs = sel.get("matchLabels", {})
+        if "kubernetes.io/cluster-name" in labs:
+            clusters.add(labs["kubernetes.io/cluster-name"])
+        else:
+            clusters.update(f"{k}:{v}" for k, v in labs.items())
+    return clusters
+
+
+def _flatten_downsync(downsync: List[Dict[str, Any]]) -> set[str]:
+    """Flatten downsync rules into ``group/resource [(ns:…)]`` strings."""
+    wls: set[str] = set()
+    for ds in downsync:
+        grp = ds.get("apiGroup") or "core"
+        namespaces = ds.get("namespaces")
+        for res in ds.get("resources", []):
+            base = f"{grp}/{res.lower()}"
+            if namespaces:
+                wls.update(f"{base} (ns:{ns})" for ns in namespaces)
+            else:
+                wls.add(base)
+    return wls
+
+
+# Input schema; independent of call arguments, so built once at import.
+_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "operation": {
+            "type": "string",
+            "enum": ["list", "create", "delete", "quick_create"],
+            "default": "list",
+        },
+        "context": {
+            "type": "string",
+            "default": "wds1",
+            "description": "WDS context name",
+        },
+        "kubeconfig": {"type": "string"},
+        "policy_yaml": {"type": "string"},
+        "policy_json": {"type": "object"},
+        "policy_name": {"type": "string"},
+        "selector_labels": {
+            "type": "object",
+            "description": "OLD parameter - use cluster_selectors instead",
+        },
+        "cluster_selectors": {
+            "type": "array",
+            "items": {"type": "object"},
+            "description": "Advanced cluster selectors with matchLabels and matchExpressions",
+        },
+        "resources": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Resource types to bind. REQUIRED for quick_create. Example: ['apps/deployments', 'core/services']",
+        },
+        "namespaces": {"type": "array", "items": {"type": "string"}},
+        "specific_workloads": {"type": "array", "items": {"type": "object"}},
+        "object_selectors": {
+            "type": "array",
+            "items": {"type": "object"},
+            "description": "Multiple object selectors with OR logic",
+        },
+        "want_singleton_reported_state": {
+            "type": "boolean",
+            "description": "Status aggregation",
+            "default": False,
+        },
+        "subject": {
+            "type": "object",
+            "description": "Subject for the BindingPolicy",
+        },
+        "include_yaml": {
+            "type": "boolean",
+            "description": "Include each policy's full YAML in list output",
+            "default": False,
+        },
+    },
+    "required": [],
+    "allOf": [
+        {
+            "if": {"properties": {"operation": {"const": "quick_create"}}},
+            "then": {
+                "required": ["resources"],
+                "properties": {
+                    "resources": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Resource types to bind. REQUIRED for quick_create. Example: ['apps/deployments', 'core/services']",
+                    }
+                },
+            },
+        }
+    ],
+}
 
 
 @dataclass
@@ -21,7 +286,7 @@ class BPResult:
     clusters: List[str]
     workloads: List[str]
     creationTimestamp: str
-    yaml: str
+    yaml: str = ""
 
 
 class BindingPolicyManagement(BaseFunction):
@@ -36,41 +301,51 @@ class BindingPolicyManagement(BaseFunction):
     quick_create  – build a BP from plain parameters (cluster-labels, resources …)
     """
 
+    # Private directories holding token kubeconfigs, from every instance.
+    _token_dirs: List[str] = []
+
     def __init__(self) -> None:
         super().__init__(
             name="binding_policy_management",
             description="Fast operations on KubeStellar BindingPolicy objects "
             "(list, create, delete, quick-create) against a single WDS.",
         )
+        # (ctx, kubeconfig) -> (kubeconfig holding the exec token or None,
+        # epoch seconds until which the entry is used)
+        self._token_cache: Dict[tuple[str, str], tuple[str | None, float]] = {}
+        self._token_dir: str | None = None
+        # (ctx, kubeconfig) -> (monotonic timestamp, BindingPolicy items)
+        self._list_cache: Dict[tuple[str, str], tuple[float, List[Dict[str, Any]]]] = {}
+        self._list_locks: Dict[tuple[str, str], asyncio.Lock] = {}
+        self._argv_prefix: Dict[tuple[str, str], tuple[str, ...]] = {}
+        # (uid, resourceVersion) -> YAML dump of that BP revision
+        self._yaml_cache: Dict[tuple[str, str], str] = {}
 
     def _convert_to_native(self, obj: Any) -> Any:
         """
         Recursively convert protobuf-like objects (MapComposite, RepeatedComposite)
         and other structures to native Python dicts and lists.
         """
-        if obj is None:
-            return None
-        if isinstance(obj, (str, int, float, bool)):
+        t = type(obj)
+        # Fast paths on exact types skip the per-type classification below
+        if t in _NATIVE_SCALARS:
             return obj
-
-        # Explicitly handle protobuf MapComposite/RepeatedComposite by type name
-        # This catches objects that might not pass standard ABC checks
-        type_str = str(type(obj))
-        if "MapComposite" in type_str and hasattr(obj, "items"):
+        if t is dict:
+            # Already-native leaves need no copy (the common JSON-RPC case)
+            if all(type(v) in _NATIVE_SCALARS for v in obj.values()):
+                return obj
             return {k: self._convert_to_native(v) for k, v in obj.items()}
-        if "RepeatedComposite" in type_str and hasattr(obj, "__iter__"):
+        if t is list:
+            if all(type(i) in _NATIVE_SCALARS for i in obj):
+                return obj
             return [self._convert_to_native(i) for i in obj]
-
-        # Convert Dict/Mapping
-        if isinstance(obj, (dict, MutableMapping)):
+        if t is tuple:
+            return [self._convert_to_native(i) for i in obj]
+        kind = _PB_TYPE_CACHE.get(t) or _classify_type(t)
+        if kind == "map":
             return {k: self._convert_to_native(v) for k, v in obj.items()}
-
-        # Convert List/Sequence (exclude str/bytes)
-        if isinstance(obj, (list, tuple, Sequence)) and not isinstance(
-            obj, (str, bytes)
-        ):
+        if kind == "repeated":
             return [self._convert_to_native(i) for i in obj]
-
         return obj
 
     async def execute(
@@ -94,6 +369,7 @@ class BindingPolicyManagement(BaseFunction):
         ) = None,  # Multiple object selectors with OR logic
         want_singleton_reported_state: bool = False,  # Status aggregation
         subject: Dict[str, Any] | None = None,  # Subject for the BindingPolicy
+        include_yaml: bool = False,  # Full manifests in `list` output
         **_: Any,
     ) -> Dict[str, Any]:
         """
@@ -194,6 +470,10 @@ class BindingPolicyManagement(BaseFunction):
                 Used for quick_create operation.
                 Example: {'name': 'user1', 'kind': 'User', 'apiGroup': 'rbac.authorization.k8s.io'}
 
+            include_yaml (bool, optional): Include each policy's full YAML.
+                Used for list operation. Off by default to keep list output small.
+                Default: false
+
         Returns:
             Dict[str, Any]: Operation result containing:
                 - status: 'success' or 'error'
@@ -245,55 +525,23 @@ class BindingPolicyManagement(BaseFunction):
             ... )
         """
         # validating the arguments :))
-        operation = self._convert_to_native(operation)
-        context = self._convert_to_native(context)
-        kubeconfig = self._convert_to_native(kubeconfig)
-        policy_yaml = self._convert_to_native(policy_yaml)
+        # Only container arguments can arrive as protobuf composites; plain
+        # string/bool arguments are passed through untouched.
         policy_json = self._convert_to_native(policy_json)
-        policy_name = self._convert_to_native(policy_name)
         selector_labels = self._convert_to_native(selector_labels)
         resources = self._convert_to_native(resources)
         namespaces = self._convert_to_native(namespaces)
         specific_workloads = self._convert_to_native(specific_workloads)
-        cluster_selectors = self._convert_to_native(cluster_selectors)
-        object_selectors = self._convert_to_native(object_selectors)
-        want_singleton_reported_state = self._convert_to_native(
-            want_singleton_reported_state
-        )
+        # cluster_selectors/object_selectors are converted by the single
+        # _normalize_selectors pass when the quick manifest is built.
         subject = self._convert_to_native(subject)
 
-        if isinstance(selector_labels, str):
-            try:
-                selector_labels = json.loads(selector_labels)
-            except json.JSONDecodeError:
-                k, _, v = selector_labels.partition("=")
-                selector_labels = {k.strip(): v.strip()}
-        if isinstance(resources, str):
-            try:
-                resources = json.loads(resources)
-            except json.JSONDecodeError:
-                resources = [s.strip() for s in resources.split(",") if s.strip()]
-        if isinstance(namespaces, str):
-            try:
-                namespaces = json.loads(namespaces)
-            except json.JSONDecodeError:
-                namespaces = [s.strip() for s in namespaces.split(",") if s.strip()]
-
-        def _as_dict(obj):
-            return dict(obj) if not isinstance(obj, dict) else obj
-
-        def _as_list(obj):
-            return list(obj) if not isinstance(obj, list) else obj
-
-        if selector_labels not in (None, "", {}):
-            selector_labels = _as_dict(selector_labels)
-        if resources not in (None, "", []):
-            resources = _as_list(resources)
-        if namespaces not in (None, "", []):
-            namespaces = _as_list(namespaces)
+        selector_labels = _parse_dict_arg(selector_labels)
+        resources = _parse_list_arg(resources)
+        namespaces = _parse_list_arg(namespaces)
 
         if operation == "quick_create":
-            if not resources or resources in (None, "", []):
+            if not resources:
                 return {
                     "status": "error",
                     "error": "resources parameter is REQUIRED for quick_create operation. Example: ['apps/deployments', 'core/services']",
@@ -308,7 +556,7 @@ class BindingPolicyManagement(BaseFunction):
             operation = "quick_create"
 
         if operation == "list":
-            return await self._op_list(context, kubeconfig)
+            return await self._op_list(context, kubeconfig, include_yaml)
 
         if operation == "create":
             if not (policy_yaml or policy_json):
@@ -316,7 +564,14 @@ class BindingPolicyManagement(BaseFunction):
                     "status": "error",
                     "error": "policy_yaml or policy_json required",
                 }
-            manifest = policy_yaml or yaml.safe_dump(policy_json, sort_keys=False)
+            # kubectl accepts JSON on stdin, so skip the YAML emit entirely;
+            # JSON that arrives as text is forwarded without re-serialising.
+            if policy_yaml:
+                manifest = policy_yaml.encode()
+            elif isinstance(policy_json, str):
+                manifest = policy_json.encode()
+            else:
+                manifest = json_dumps(policy_json)
             return await self._kubectl_apply(manifest, context, kubeconfig)
 
         if operation == "delete":
@@ -344,24 +599,14 @@ class BindingPolicyManagement(BaseFunction):
 
         return {"status": "error", "error": f"unknown operation {operation}"}
 
-    async def _op_list(self, ctx: str, kubeconfig: str) -> Dict[str, Any]:
-        cmd = [
-            "kubectl",
-            "--context",
-            ctx,
-            "get",
-            "bindingpolicies.control.kubestellar.io",
-            "-o",
-            "json",
-        ]
-        if kubeconfig:
-            cmd += ["--kubeconfig", kubeconfig]
-        ret = await self._run(cmd)
-        if ret["returncode"] != 0:
-            return {"status": "error", "error": ret["stderr"]}
+    async def _op_list(
+        self, ctx: str, kubeconfig: str, include_yaml: bool = False
+    ) -> Dict[str, Any]:
+        items, err = await self._list_items(ctx, kubeconfig)
+        if err is not None:
+            return {"status": "error", "error": err}
 
-        items = json.loads(ret["stdout"]).get("items", [])
-        results = [self._make_result(i) for i in items]
+        results = [self._make_result(i, include_yaml) for i in items]
 
         return {
             "status": "success",
@@ -370,6 +615,35 @@ class BindingPolicyManagement(BaseFunction):
             "policies": [r.__dict__ for r in results],
         }
 
+    async def _list_items(
+        self, ctx: str, kubeconfig: str
+    ) -> tuple[List[Dict[str, Any]], str | None]:
+        """Fetch BP items, serving repeat calls within ``_LIST_CACHE_TTL`` from cache.
+
+        Concurrent calls for the same context share one kubectl invocation.
+        """
+        key = (ctx, kubeconfig)
+        lock = self._list_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self._list_cache.get(key)
+            if cached and time.monotonic() - cached[0] < _LIST_CACHE_TTL:
+                return cached[1], None
+
+            # Parse the raw bytes; decoding multi-MB output to str first is
+            # a wasted pass when the JSON parser accepts bytes.
+            ret = await self._run_kubectl(
+                ctx,
+                kubeconfig,
+                ["get", "bindingpolicies.control.kubestellar.io", "-o", "json"],
+                decode_stdout=False,
+            )
+            if ret["returncode"] != 0:
+                return [], ret["stderr"]
+
+            items = json_loads(ret["stdout"]).get("items", [])
+            self._list_cache[key] = (time.monotonic(), items)
+            return items, None
+
     def _build_quick_manifest(
         self,
         name: str,
@@ -381,17 +655,21 @@ class BindingPolicyManagement(BaseFunction):
         object_selectors: List[Dict[str, Any]] | None = None,
         want_singleton_reported_state: bool = False,
         subject: Dict[str, Any] | None = None,
-    ) -> tuple[str, str | None]:
+    ) -> tuple[bytes, str | None]:
+        """Build a BindingPolicy and return it as JSON bytes for kubectl apply."""
         # Accept either cluster_selectors (new) or selector_labels (old)
         if not cluster_selectors and not selector_labels:
-            return "", "cluster_selectors or selector_labels cannot be empty"
+            return b"", "cluster_selectors or selector_labels cannot be empty"
         if not resources:
-            return "", "resources list cannot be empty"
+            return b"", "resources list cannot be empty"
         if not name:
-            name = f"bp-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+            name = f"bp-{time.strftime('%Y%m%d%H%M%S', time.gmtime())}"
 
+        # matchExpressions operators can only appear in the selectors
+        if cluster_selectors is not None:
+            cluster_selectors = _normalize_selectors(cluster_selectors)
         if object_selectors:
-            object_selectors = self._convert_to_native(object_selectors)
+            object_selectors = _normalize_selectors(object_selectors)
             if not isinstance(object_selectors, list):
                 object_selectors = [object_selectors]
 
@@ -434,41 +712,10 @@ class BindingPolicyManagement(BaseFunction):
         if subject:
             manifest["spec"]["subject"] = subject
 
-        def _fix_kubernetes_operators(obj):
-            """Fix invalid Kubernetes operators in matchExpressions"""
-            if isinstance(obj, dict):
-                fixed = {}
-                for k, v in obj.items():
-                    if k == "operator" and isinstance(v, str):
-                        if v.lower() in ["equals", "equal", "=", "=="]:
-                            fixed[k] = "In"
-                        elif v.lower() in ["not_equals", "notequal", "!=", "<>"]:
-                            fixed[k] = "NotIn"
-                        elif v.lower() in ["exists", "present"]:
-                            fixed[k] = "Exists"
-                        elif v.lower() in ["not_exists", "absent", "!exists"]:
-                            fixed[k] = "DoesNotExist"
-                        else:
-                            fixed[k] = v
-                    else:
-                        fixed[k] = _fix_kubernetes_operators(v)
-                return fixed
-            elif isinstance(obj, list):
-                return [_fix_kubernetes_operators(item) for item in obj]
-            return obj
-
-        manifest = _fix_kubernetes_operators(manifest)
-
-        manifest = self._convert_to_native(manifest)
-
         if specific_wl:
-            clean_specific_wl = self._convert_to_native(specific_wl)
-
-            if clean_specific_wl:
-                wl = clean_specific_wl[0]
-                manifest["metadata"].setdefault("annotations", {})[
-                    "specificWorkloads"
-                ] = ",".join(
+            wl = specific_wl[0]
+            manifest["metadata"].setdefault("annotations", {})["specificWorkloads"] = (
+                ",".join(
                     [
                         wl.get("apiVersion", ""),
                         wl.get("kind", ""),
@@ -476,156 +723,282 @@ class BindingPolicyManagement(BaseFunction):
                         wl.get("namespace", ""),
                     ]
                 )
+            )
 
-        return yaml.safe_dump(manifest, sort_keys=False), None
+        return json_dumps(manifest), None
 
     # ───────────────────────── kubectl helpers ─────────────────────────
     async def _kubectl_apply(
-        self, yaml_body: str, ctx: str, kubeconfig: str
+        self, manifest: bytes, ctx: str, kubeconfig: str
     ) -> Dict[str, Any]:
-        cmd = ["kubectl", "--context", ctx, "apply", "-f", "-"]
-        if kubeconfig:
-            cmd += ["--kubeconfig", kubeconfig]
-        ret = await self._run(cmd, stdin_data=yaml_body.encode())
-        if ret["returncode"] != 0:
-            # include both stdout & stderr in the response so the LLM can show it
+        ret = await self._run_kubectl(
+            ctx, kubeconfig, ["apply", "-f", "-"], stdin_data=manifest
+        )
+        if ret["returncode"] == 0:
+            self._list_cache.pop((ctx, kubeconfig), None)
             return {
-                "status": "error",
+                "status": "success",
                 "operation": "apply",
-                "stderr": ret["stderr"],
-                "stdout": ret["stdout"],
-                "cmd": " ".join(cmd[:4]) + " -f -",  # truncated for readability
+                "output": ret["stdout"] or ret["stderr"],
             }
-        status = "success" if ret["returncode"] == 0 else "error"
+        # include both stdout & stderr in the response so the LLM can show it
         return {
-            "status": status,
+            "status": "error",
             "operation": "apply",
-            "output": ret["stdout"] or ret["stderr"],
+            "stderr": ret["stderr"],
+            "stdout": ret["stdout"],
+            "cmd": f"kubectl --context {ctx} apply -f -",  # truncated for readability
         }
 
     async def _kubectl_delete(
         self, name: str, ctx: str, kubeconfig: str
     ) -> Dict[str, Any]:
-        cmd = ["kubectl", "--context", ctx, "delete", "bindingpolicy", name]
-        if kubeconfig:
-            cmd += ["--kubeconfig", kubeconfig]
-        ret = await self._run(cmd)
+        ret = await self._run_kubectl(
+            ctx, kubeconfig, ["delete", "bindingpolicy", name]
+        )
         status = "success" if ret["returncode"] == 0 else "error"
+        if status == "success":
+            self._list_cache.pop((ctx, kubeconfig), None)
         return {
             "status": status,
             "operation": "delete",
             "output": ret["stdout"] or ret["stderr"],
         }
 
+    def _kubectl_prefix(self, ctx: str, kubeconfig: str) -> tuple[str, ...]:
+        """Return the cached ``kubectl --context … [--kubeconfig …]`` prefix."""
+        key = (ctx, kubeconfig)
+        prefix = self._argv_prefix.get(key)
+        if prefix is None:
+            prefix = ("kubectl", "--context", ctx)
+            if kubeconfig:
+                prefix += ("--kubeconfig", kubeconfig)
+            self._argv_prefix[key] = prefix
+        return prefix
+
     async def _run(
-        self, cmd: List[str], stdin_data: bytes | None = None
-    ) -> Dict[str, str]:
+        self,
+        cmd: List[str],
+        stdin_data: bytes | None = None,
+        decode_stdout: bool = True,
+    ) -> Dict[str, Any]:
         """Run command with cancellation support."""
-        return await run_subprocess_with_cancellation(cmd, stdin_data)
+        if cmd[0] == "kubectl":
+            cmd = [resolve_executable("kubectl"), *cmd[1:]]
+        return await run_subprocess_with_cancellation(
+            cmd, stdin_data, close_fds=False, decode_stdout=decode_stdout
+        )
+
+    async def _run_kubectl(
+        self,
+        ctx: str,
+        kubeconfig: str,
+        args: List[str],
+        stdin_data: bytes | None = None,
+        decode_stdout: bool = True,
+    ) -> Dict[str, Any]:
+        """Run ``kubectl <args>`` against ``ctx`` with cached exec credentials.
+
+        A token the API server rejects (``Unauthorized``) is dropped, so the
+        next call runs the plugin again instead of reusing it.
+        """
+        credentials = await self._credential_kubeconfig(ctx, kubeconfig)
+        cmd = [*self._kubectl_prefix(ctx, credentials or kubeconfig), *args]
+        ret = await self._run(cmd, stdin_data=stdin_data, decode_stdout=decode_stdout)
+        if (
+            credentials
+            and ret["returncode"] != 0
+            and "Unauthorized" in (ret["stderr"] or "")
+        ):
+            self._forget_token(ctx, kubeconfig)
+        return ret
+
+    async def _credential_kubeconfig(self, ctx: str, kubeconfig: str) -> str | None:
+        """
+        Return a kubeconfig holding the exec-plugin token for ``ctx``, or None.
+
+        The plugin (cloud IAM, SSO helpers …) is run once per context and its
+        token reused until shortly before expiry, so kubectl does not fork the
+        helper on every call.  The token is written into a private minified
+        kubeconfig rather than passed as ``--token``, which would expose it
+        in ``ps``.  Contexts without an exec plugin, or whose plugin cannot be
+        run non-interactively, get None; failed lookups are retried after
+        ``_TOKEN_FAILURE_BACKOFF`` seconds.
+        """
+        key = (ctx, kubeconfig)
+        cached = self._token_cache.get(key)
+        if cached and cached[1] > time.time():
+            return cached[0]
+
+        config, token, expiry = await self._fetch_exec_token(ctx, kubeconfig)
+        path = None
+        if token:
+            path = self._write_token_kubeconfig(key, config, token)
+            expiry -= _TOKEN_REFRESH_MARGIN
+        self._token_cache[key] = (path, expiry)
+        return path
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Remove the token kubeconfigs written so far (call on shutdown)."""
+        cls._remove_token_dirs()
+
+    @classmethod
+    def _remove_token_dirs(cls) -> None:
+        """Delete every private token directory created by this class."""
+        while cls._token_dirs:
+            shutil.rmtree(cls._token_dirs.pop(), ignore_errors=True)
+
+    def _forget_token(self, ctx: str, kubeconfig: str) -> None:
+        """Drop the cached token of a context so the plugin runs again."""
+        self._token_cache.pop((ctx, kubeconfig), None)
+
+    def _write_token_kubeconfig(
+        self, key: tuple[str, str], config: Dict[str, Any], token: str
+    ) -> str:
+        """Write ``config`` with its user's exec plugin replaced by ``token``.
+
+        Each context has one file (mode 0600, in a private directory) that a
+        refresh atomically replaces, so kubectl calls still running with the
+        previous token keep a readable file. The directory is removed by
+        ``aclose`` or at interpreter exit.
+        """
+        if self._token_dir is None or not os.path.isdir(self._token_dir):
+            self._token_dir = tempfile.mkdtemp(prefix="a2a-kubeconfig-")
+            type(self)._token_dirs.append(self._token_dir)
+        user = config["users"][0]
+        config["users"] = [{"name": user.get("name", ""), "user": {"token": token}}]
+        name = hashlib.blake2b("\0".join(key).encode(), digest_size=8).hexdigest()
+        path = os.path.join(self._token_dir, f"{name}.json")
+        fd, partial = tempfile.mkstemp(dir=self._token_dir, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(json_dumps(config))
+        os.replace(partial, path)
+        return path
+
+    async def _fetch_exec_token(
+        self, ctx: str, kubeconfig: str
+    ) -> tuple[Dict[str, Any], str | None, float]:
+        """Return the minified kubeconfig, the exec token and its expiry.
+
+        Without a token the expiry says how long that answer holds.
+        """
+        cmd = [
+            *self._kubectl_prefix(ctx, kubeconfig),
+            "config",
+            "view",
+            "--raw",
+            "--minify",
+            "-o",
+            "json",
+        ]
+        retry_at = time.time() + _TOKEN_FAILURE_BACKOFF
+        ret = await self._run(cmd)
+        if ret["returncode"] != 0:
+            # Let the real kubectl call surface the error; retry after a while.
+            return {}, None, retry_at
+
+        try:
+            config = json_loads(ret["stdout"])
+        except json.JSONDecodeError:
+            return {}, None, retry_at
+        users = config.get("users") or []
+        exec_cfg = (users[0].get("user") or {}).get("exec") if users else None
+        if (
+            not exec_cfg
+            or not exec_cfg.get("command")
+            or exec_cfg.get("interactiveMode") == "Always"
+            or exec_cfg.get("provideClusterInfo")
+        ):
+            # Nothing to pre-fetch for this context; remember that.
+            return config, None, float("inf")
+
+        # Match kubectl: the plugin learns the request through
+        # KUBERNETES_EXEC_INFO, and a relative command with a path separator
+        # is relative to the kubeconfig rather than the working directory.
+        env = dict(os.environ)
+        env.update({e["name"]: e["value"] for e in exec_cfg.get("env") or []})
+        env["KUBERNETES_EXEC_INFO"] = json.dumps(
+            {
+                "apiVersion": exec_cfg.get("apiVersion") or _EXEC_API_VERSION,
+                "kind": "ExecCredential",
+                "spec": {"interactive": False},
+            }
+        )
+        command = exec_cfg["command"]
+        if not os.path.isabs(command) and ("/" in command or os.sep in command):
+            command = os.path.normpath(
+                os.path.join(_kubeconfig_dir(kubeconfig), command)
+            )
+        plugin_cmd = [command, *(exec_cfg.get("args") or [])]
+        try:
+            plugin = await run_subprocess_with_cancellation(
+                plugin_cmd, env=env, detach_stdin=True
+            )
+        except OSError:
+            return config, None, float("inf")
+        if plugin["returncode"] != 0:
+            return config, None, retry_at
+
+        try:
+            status = json_loads(plugin["stdout"]).get("status") or {}
+        except json.JSONDecodeError:
+            return config, None, float("inf")
+        token = status.get("token")
+        if not token:
+            # Client-certificate credentials are left to kubectl's own plugin run.
+            return config, None, float("inf")
+
+        expiry = float("inf")
+        if status.get("expirationTimestamp"):
+            ts = status["expirationTimestamp"].replace("Z", "+00:00")
+            expiry = datetime.fromisoformat(ts).timestamp()
+        return config, token, expiry
 
     # ───────────────────────── result helpers ─────────────────────────
-    def _make_result(self, item: Dict[str, Any]) -> BPResult:
+    def _make_result(
+        self, item: Dict[str, Any], include_yaml: bool = False
+    ) -> BPResult:
         meta = item["metadata"]
+        meta_get = meta.get
         spec = item.get("spec", {})
         status = (
             "active"
-            if meta.get("generation")
+            if meta_get("generation")
             == item.get("status", {}).get("observedGeneration")
             else "inactive"
         )
 
-        clusters: List[str] = []
-        for sel in spec.get("clusterSelectors", []):
-            labs = sel.get("matchLabels", {})
-            if "kubernetes.io/cluster-name" in labs:
-                clusters.append(labs["kubernetes.io/cluster-name"])
-            else:
-                clusters += [f"{k}:{v}" for k, v in labs.items()]
-
-        wls: List[str] = []
-        for ds in spec.get("downsync", []):
-            grp = ds.get("apiGroup") or "core"
-            for res in ds.get("resources", []):
-                base = f"{grp}/{res.lower()}"
-                if ds.get("namespaces"):
-                    wls += [f"{base} (ns:{ns})" for ns in ds["namespaces"]]
-                else:
-                    wls.append(base)
-
         return BPResult(
             name=meta["name"],
-            namespace=meta.get("namespace", ""),
+            namespace=meta_get("namespace", ""),
             status=status,
             bindingMode="Downsync",
-            clusters=sorted(set(clusters)),
-            workloads=sorted(set(wls)),
-            creationTimestamp=meta.get("creationTimestamp", ""),
-            yaml=yaml.safe_dump(item, sort_keys=False),
+            clusters=sorted(_flatten_selectors(spec.get("clusterSelectors", []))),
+            workloads=sorted(_flatten_downsync(spec.get("downsync", []))),
+            creationTimestamp=meta_get("creationTimestamp", ""),
+            yaml=self._item_yaml(item) if include_yaml else "",
         )
 
+    def _item_yaml(self, item: Dict[str, Any]) -> str:
+        """Dump a BP to YAML, reusing the dump while its resourceVersion holds."""
+        meta = item["metadata"]
+        key = (meta.get("uid", ""), meta.get("resourceVersion", ""))
+        if not all(key):
+            return yaml.dump(item, Dumper=_Dumper, sort_keys=False)
+
+        dumped = self._yaml_cache.get(key)
+        if dumped is None:
+            dumped = yaml.dump(item, Dumper=_Dumper, sort_keys=False)
+            if len(self._yaml_cache) >= _YAML_CACHE_SIZE:
+                # evict the oldest entry (dicts keep insertion order)
+                del self._yaml_cache[next(iter(self._yaml_cache))]
+            self._yaml_cache[key] = dumped
+        return dumped
+
     def get_schema(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "operation": {
-                    "type": "string",
-                    "enum": ["list", "create", "delete", "quick_create"],
-                    "default": "list",
-                },
-                "context": {
-                    "type": "string",
-                    "default": "wds1",
-                    "description": "WDS context name",
-                },
-                "kubeconfig": {"type": "string"},
-                "policy_yaml": {"type": "string"},
-                "policy_json": {"type": "object"},
-                "policy_name": {"type": "string"},
-                "selector_labels": {
-                    "type": "object",
-                    "description": "OLD parameter - use cluster_selectors instead",
-                },
-                "cluster_selectors": {
-                    "type": "array",
-                    "items": {"type": "object"},
-                    "description": "Advanced cluster selectors with matchLabels and matchExpressions",
-                },
-                "resources": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Resource types to bind. REQUIRED for quick_create. Example: ['apps/deployments', 'core/services']",
-                },
-                "namespaces": {"type": "array", "items": {"type": "string"}},
-                "specific_workloads": {"type": "array", "items": {"type": "object"}},
-                "object_selectors": {
-                    "type": "array",
-                    "items": {"type": "object"},
-                    "description": "Multiple object selectors with OR logic",
-                },
-                "want_singleton_reported_state": {
-                    "type": "boolean",
-                    "description": "Status aggregation",
-                    "default": False,
-                },
-                "subject": {
-                    "type": "object",
-                    "description": "Subject for the BindingPolicy",
-                },
-            },
-            "required": [],
-            "allOf": [
-                {
-                    "if": {"properties": {"operation": {"const": "quick_create"}}},
-                    "then": {
-                        "required": ["resources"],
-                        "properties": {
-                            "resources": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "Resource types to bind. REQUIRED for quick_create. Example: ['apps/deployments', 'core/services']",
-                            }
-                        },
-                    },
-                }
-            ],
-        }
+        return _SCHEMA
+
+
+# Bearer tokens must not outlive the process even without a clean shutdown.
+atexit.register(BindingPolicyManagement._remove_token_dirs)
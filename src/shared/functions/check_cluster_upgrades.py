@@ -2,12 +2,18 @@ from __future__ import annotations
 
 import asyncio
 import json
+import re
+import ssl
+import time
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 import aiohttp
+from packaging.version import InvalidVersion, Version
 
 from src.shared.base_functions import BaseFunction
+from src.shared.json_utils import json_loads
+from src.shared.utils import KUBECTL_CONCURRENCY, resolve_executable
 
 
 @dataclass
@@ -30,11 +36,42 @@ class CheckClusterUpgradesOutput:
     summary: str = ""
 
 
+# KubeStellar WDS contexts (wds1, wds2, ...) host no workload nodes.
+_WDS_RE = re.compile(r"^wds\d+$")
+
+
+def _parse_k8s_version(version: str) -> Version:
+    """Parse a Kubernetes version string such as ``v1.29.3`` or ``v1.29.3-eks-1``.
+
+    Vendor suffixes that are not valid PEP 440 are dropped so the release
+    numbers can still be compared.
+    """
+    version = version.strip().lstrip("v")
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return Version(version.split("-", 1)[0].split("+", 1)[0])
+
+
 class CheckClusterUpgradesFunction(BaseFunction):
     """
     Checks for available Kubernetes version upgrades for all clusters.
     """
 
+    # The stable release changes every few weeks; reuse it for an hour.
+    _stable_version_ttl = 3600.0
+    _stable_version_cache: Optional[tuple[float, str]] = None
+    _stable_version_inflight: Optional[asyncio.Future] = None
+
+    # Upper bound on concurrent `kubectl get nodes` processes.
+    max_concurrency = KUBECTL_CONCURRENCY
+
+    # Shared HTTP session so keep-alive connections survive between calls.
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+    # Reused across sessions so TLS sessions can be resumed.
+    _ssl_context: Optional[ssl.SSLContext] = None
+
     def __init__(self):
         super().__init__(
             name="check_cluster_upgrades",
@@ -52,27 +89,42 @@ class CheckClusterUpgradesFunction(BaseFunction):
             A dictionary with the upgrade status of each cluster.
         """
         try:
-            latest_version = await self._get_latest_stable_k8s_version()
+            # The HTTP fetch and kubectl discovery are independent; overlap them.
+            latest_version, clusters = await asyncio.gather(
+                self._get_latest_stable_k8s_version(),
+                self._discover_clusters(kubeconfig),
+            )
             if not latest_version:
                 return {
                     "status": "error",
                     "error": "Could not fetch the latest stable Kubernetes version.",
                 }
 
-            clusters = await self._discover_clusters(kubeconfig)
             if not clusters:
                 return CheckClusterUpgradesOutput(
                     status="success",
                     summary="No clusters discovered.",
                 ).__dict__
 
-            upgrade_statuses = await asyncio.gather(
-                *[
-                    self._get_cluster_upgrade_status(
-                        cluster, latest_version, kubeconfig
+            latest_parsed = _parse_k8s_version(latest_version)
+            # Fleets usually run a handful of versions; compare each once.
+            version_cache: Dict[str, bool] = {}
+            sem = asyncio.Semaphore(self.max_concurrency)
+
+            async def _bounded(
+                cluster: Dict[str, Any],
+            ) -> Optional[ClusterUpgradeStatus]:
+                async with sem:
+                    return await self._get_cluster_upgrade_status(
+                        cluster,
+                        latest_version,
+                        kubeconfig,
+                        latest_parsed,
+                        version_cache,
                     )
-                    for cluster in clusters
-                ]
+
+            upgrade_statuses = await asyncio.gather(
+                *[_bounded(cluster) for cluster in clusters]
             )
 
             output = CheckClusterUpgradesOutput(
@@ -87,50 +139,123 @@ class CheckClusterUpgradesFunction(BaseFunction):
             return {"status": "error", "error": str(e)}
 
     async def _get_latest_stable_k8s_version(self) -> Optional[str]:
+        """Returns the latest stable Kubernetes version, cached for an hour.
+
+        Concurrent callers share one in-flight fetch, including its failure.
+        """
+        cls = type(self)
+        cached = cls._stable_version_cache
+        if cached and time.monotonic() - cached[0] < cls._stable_version_ttl:
+            return cached[1]
+        task = cls._stable_version_inflight
+        if task is None:
+            task = asyncio.ensure_future(self._refresh_stable_version())
+            cls._stable_version_inflight = task
+        # Shield so one caller's cancellation does not abort the shared fetch.
+        return await asyncio.shield(task)
+
+    async def _refresh_stable_version(self) -> Optional[str]:
+        """Fetch the stable version and update the cache on success.
+
+        A response that is not a parseable version counts as a failure.
+        """
+        cls = type(self)
+        try:
+            version = await self._fetch_latest_stable_k8s_version()
+            if version:
+                try:
+                    _parse_k8s_version(version)
+                except InvalidVersion:
+                    return None
+                cls._stable_version_cache = (time.monotonic(), version)
+            return version
+        finally:
+            cls._stable_version_inflight = None
+
+    async def _fetch_latest_stable_k8s_version(self) -> Optional[str]:
         """Fetches the latest stable Kubernetes version from Google's GCS bucket."""
         url = "https://storage.googleapis.com/kubernetes-release/release/stable.txt"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return (await response.text()).strip()
+            session = self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return (await response.text()).strip()
         except Exception:
             return None
         return None
 
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it for the running loop."""
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            if cls._ssl_context is None:
+                cls._ssl_context = ssl.create_default_context()
+            cls._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32,
+                    use_dns_cache=True,
+                    ttl_dns_cache=600,
+                    ssl=cls._ssl_context,
+                ),
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers={"User-Agent": "kubestellar-a2a/1.0"},
+            )
+            cls._session_loop = loop
+        return cls._session
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared HTTP session (call on shutdown)."""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+        cls._session_loop = None
+
     async def _discover_clusters(self, kubeconfig: str) -> List[Dict[str, Any]]:
         """Discover available clusters using kubectl."""
         cmd = ["kubectl", "config", "get-contexts", "-o", "json"]
         if kubeconfig:
             cmd.extend(["--kubeconfig", kubeconfig])
 
-        result = await self._run_command(cmd)
+        result = await self._run_command(cmd, decode_stdout=False)
         if result["returncode"] != 0:
             # Return an empty list but log the error or make it accessible for debugging
             print(f"Error discovering clusters: {result['stderr']}")
             return []
 
         try:
-            contexts = json.loads(result["stdout"])["contexts"]
+            contexts = json_loads(result["stdout"])["contexts"]
             return [
                 {"name": context["name"], "context": context["name"]}
                 for context in contexts
-                if "wds" not in context["name"]
+                if not _WDS_RE.match(context["name"])
             ]
         except (json.JSONDecodeError, KeyError) as e:
             print(f"Error parsing kubectl contexts: {e}")
             return []
 
     async def _get_cluster_upgrade_status(
-        self, cluster: Dict[str, Any], latest_version: str, kubeconfig: str
+        self,
+        cluster: Dict[str, Any],
+        latest_version: str,
+        kubeconfig: str,
+        latest_parsed: Optional[Version] = None,
+        version_cache: Optional[Dict[str, bool]] = None,
     ) -> Optional[ClusterUpgradeStatus]:
-        """Gets the upgrade status of a single cluster."""
+        """Gets the upgrade status of a single cluster.
+
+        ``latest_parsed`` and ``version_cache`` (kubelet version to
+        upgrade-needed) let callers share parsing work across many clusters.
+        """
+        # Only the kubelet version is needed, so let kubectl extract it
+        # instead of shipping and parsing the full Node list.
         cmd = [
             "kubectl",
             "get",
             "nodes",
             "-o",
-            "json",
+            "jsonpath={.items[0].status.nodeInfo.kubeletVersion}",
             "--context",
             cluster["context"],
         ]
@@ -147,50 +272,63 @@ class CheckClusterUpgradesFunction(BaseFunction):
                 error=result["stderr"],
             )
 
-        try:
-            nodes = json.loads(result["stdout"])["items"]
-            if not nodes:
-                return ClusterUpgradeStatus(
-                    cluster_name=cluster["name"],
-                    current_version="N/A",
-                    latest_version=latest_version,
-                    upgrade_needed=False,
-                    error="No nodes found in the cluster.",
-                )
-
-            # For simplicity, we'll use the version of the first node.
-            # In a real-world scenario, you might want to check all nodes.
-            kubelet_version = nodes[0]["status"]["nodeInfo"]["kubeletVersion"]
-
-            # Simple version comparison, assuming semantic versioning.
-            # This might need to be more robust for production use.
-            upgrade_needed = kubelet_version < latest_version
-
-            return ClusterUpgradeStatus(
-                cluster_name=cluster["name"],
-                current_version=kubelet_version,
-                latest_version=latest_version,
-                upgrade_needed=upgrade_needed,
-            )
-        except (json.JSONDecodeError, KeyError) as e:
+        # For simplicity, we'll use the version of the first node.
+        # In a real-world scenario, you might want to check all nodes.
+        kubelet_version = result["stdout"].strip()
+        if not kubelet_version:
             return ClusterUpgradeStatus(
                 cluster_name=cluster["name"],
                 current_version="N/A",
                 latest_version=latest_version,
                 upgrade_needed=False,
-                error=f"Failed to parse node information: {e}",
+                error="No nodes found in the cluster.",
             )
 
-    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
-        """Run a shell command asynchronously."""
+        upgrade_needed = (
+            version_cache.get(kubelet_version) if version_cache is not None else None
+        )
+        if upgrade_needed is None:
+            if latest_parsed is None:
+                latest_parsed = _parse_k8s_version(latest_version)
+            try:
+                upgrade_needed = _parse_k8s_version(kubelet_version) < latest_parsed
+            except InvalidVersion:
+                return ClusterUpgradeStatus(
+                    cluster_name=cluster["name"],
+                    current_version=kubelet_version,
+                    latest_version=latest_version,
+                    upgrade_needed=False,
+                    error=f"Unrecognised kubelet version: {kubelet_version}",
+                )
+            if version_cache is not None:
+                version_cache[kubelet_version] = upgrade_needed
+
+        return ClusterUpgradeStatus(
+            cluster_name=cluster["name"],
+            current_version=kubelet_version,
+            latest_version=latest_version,
+            upgrade_needed=upgrade_needed,
+        )
+
+    async def _run_command(
+        self, cmd: List[str], decode_stdout: bool = True
+    ) -> Dict[str, Any]:
+        """Run a shell command asynchronously.
+
+        Pass ``decode_stdout=False`` to get stdout as bytes for JSON parsing.
+        """
         process = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            resolve_executable(cmd[0]),
+            *cmd[1:],
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            close_fds=False,
         )
         stdout, stderr = await process.communicate()
 
         return {
             "returncode": process.returncode,
-            "stdout": stdout.decode(),
+            "stdout": stdout.decode() if decode_stdout else stdout,
             "stderr": stderr.decode(),
         }
 
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, List
+import shlex
+from typing import Any, Dict, List, Optional
 
+from src.shared import k8s_client
 from src.shared.base_functions import BaseFunction
+from src.shared.utils import resolve_executable
 
 
 class ClusterLabelManagement(BaseFunction):
@@ -40,6 +43,14 @@ class ClusterLabelManagement(BaseFunction):
                 "error": "labels or remove_labels must be provided",
             }
 
+        # Patch in-process when kubernetes_asyncio is installed; this is one
+        # HTTP request instead of a kubectl fork.
+        result = await self._patch_with_client(
+            cluster_name, labels, remove_labels, kube_context, kubeconfig
+        )
+        if result is not None:
+            return result
+
         label_args: List[str] = []
         if labels:
             label_args += [f"{k}={v}" for k, v in labels.items()]
@@ -59,7 +70,11 @@ class ClusterLabelManagement(BaseFunction):
             cmd += ["--kubeconfig", kubeconfig]
 
         proc = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            resolve_executable("kubectl"),
+            *cmd[1:],
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            close_fds=False,
         )
         stdout, stderr = await proc.communicate()
 
@@ -68,13 +83,58 @@ class ClusterLabelManagement(BaseFunction):
             return {
                 "status": "error",
                 "stderr": stderr.decode().strip(),
-                "cmd": " ".join(cmd),
+                "cmd": shlex.join(cmd),
             }
 
         return {
             "status": "success",
             "stdout": stdout.decode().strip(),
-            "cmd": " ".join(cmd),
+        }
+
+    # ────────────────────────── helpers ──────────────────────────
+    async def _patch_with_client(
+        self,
+        cluster_name: str,
+        labels: Dict[str, str] | None,
+        remove_labels: List[str] | None,
+        kube_context: str,
+        kubeconfig: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Merge-patch the ManagedCluster labels through the API client.
+
+        Returns None when the client is unavailable or cannot be configured,
+        so the caller falls back to kubectl. Transport failures (connection,
+        TLS, timeouts) are reported as errors like kubectl failures are.
+        """
+        try:
+            api = await k8s_client.get_api_client(kube_context, kubeconfig)
+        except Exception as e:
+            return {"status": "error", "stderr": str(e)}
+        if api is None:
+            return None
+
+        patch_labels: Dict[str, Any] = dict(labels or {})
+        patch_labels.update({key: None for key in remove_labels or []})
+        try:
+            await k8s_client.client.CustomObjectsApi(api).patch_cluster_custom_object(
+                group="cluster.open-cluster-management.io",
+                version="v1",
+                plural="managedclusters",
+                name=cluster_name,
+                body={"metadata": {"labels": patch_labels}},
+                _content_type="application/merge-patch+json",
+            )
+        except k8s_client.client.ApiException as e:
+            return {
+                "status": "error",
+                "stderr": f"{e.status} {e.reason}: {e.body}",
+            }
+        except Exception as e:
+            return {"status": "error", "stderr": str(e)}
+
+        return {
+            "status": "success",
+            "stdout": f"managedcluster.cluster.open-cluster-management.io/{cluster_name} labeled",
         }
 
     # ────────────────────────── JSON schema ──────────────────────────
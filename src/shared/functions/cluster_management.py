@@ -8,11 +8,29 @@ Provides cluster registration, labeling, and management capabilities:
 - Update cluster labels
 """
 
-import json
-from typing import Any, Dict, Optional
+import asyncio
+import copy
+import time
+from collections.abc import Iterable, Mapping
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.shared.base_functions import BaseFunction
-from src.shared.utils import run_shell_command_with_cancellation
+from src.shared.json_utils import json_dumps, json_loads
+from src.shared.utils import KUBECTL_CONCURRENCY, run_shell_command_with_cancellation
+
+# Recent successful list results keyed by (context, kubeconfig). Errors are
+# not cached, so a transient kubectl failure is retried on the next call.
+_LIST_CACHE_TTL = 10.0
+_list_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+
+
+def _convert_mapcomposite(obj: Any) -> Any:
+    """Convert protobuf MapComposite objects to regular Python dicts/lists"""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, Iterable) and not isinstance(obj, (str, bytes)):
+        return list(obj)
+    return obj
 
 
 class ClusterManagementFunction(BaseFunction):
@@ -90,21 +108,10 @@ class ClusterManagementFunction(BaseFunction):
             ... )
         """
         try:
-            # Convert MapComposite objects to regular dicts/lists
-            def _convert_mapcomposite(obj):
-                """Convert protobuf MapComposite objects to regular Python dicts/lists"""
-                if obj is None:
-                    return obj
-                elif hasattr(obj, "items") and callable(getattr(obj, "items")):
-                    return dict(obj.items())
-                elif hasattr(obj, "__iter__") and not isinstance(
-                    obj, (str, dict, bytes)
-                ):
-                    return list(obj)
-                return obj
-
-            # Convert all parameters that might contain MapComposite objects
-            labels = _convert_mapcomposite(labels)
+            # Convert MapComposite objects to regular dicts; plain dicts,
+            # the common case, skip the call entirely
+            if labels is not None and type(labels) is not dict:
+                labels = _convert_mapcomposite(labels)
 
             if operation == "list":
                 return await self._list_clusters(context, kubeconfig)
@@ -158,7 +165,22 @@ class ClusterManagementFunction(BaseFunction):
             return {"status": "error", "error": str(e)}
 
     async def _list_clusters(self, context: str, kubeconfig: str) -> Dict[str, Any]:
-        """List all registered clusters in the context."""
+        """List all registered clusters in the context, cached briefly.
+
+        Callers get their own copy, so changing a result never reaches the
+        cache.
+        """
+        key = (context, kubeconfig)
+        cached = _list_cache.get(key)
+        if cached and time.monotonic() - cached[0] < _LIST_CACHE_TTL:
+            return copy.deepcopy(cached[1])
+        result = await self._fetch_clusters(context, kubeconfig)
+        if result.get("status") == "success":
+            _list_cache[key] = (time.monotonic(), copy.deepcopy(result))
+        return result
+
+    async def _fetch_clusters(self, context: str, kubeconfig: str) -> Dict[str, Any]:
+        """Query kubectl for the clusters registered in the context."""
         # For ITS context, list ManagedClusters
         if "its" in context.lower():
             cmd = [
@@ -185,13 +207,13 @@ class ClusterManagementFunction(BaseFunction):
         if kubeconfig:
             cmd += ["--kubeconfig", kubeconfig]
 
-        ret = await run_shell_command_with_cancellation(cmd)
+        ret = await run_shell_command_with_cancellation(cmd, decode_stdout=False)
         if ret["returncode"] != 0:
             return {"status": "error", "error": ret["stderr"]}
 
         if "its" in context.lower():
             # Parse ManagedClusters
-            managed_clusters = json.loads(ret["stdout"]).get("items", [])
+            managed_clusters = json_loads(ret["stdout"]).get("items", [])
             clusters = []
             for mc in managed_clusters:
                 clusters.append(
@@ -203,7 +225,7 @@ class ClusterManagementFunction(BaseFunction):
                 )
         else:
             # Parse Bindings (original logic)
-            bindings = json.loads(ret["stdout"]).get("items", [])
+            bindings = json_loads(ret["stdout"]).get("items", [])
             clusters = []
 
             for binding in bindings:
@@ -230,14 +252,11 @@ class ClusterManagementFunction(BaseFunction):
     ) -> Dict[str, Any]:
         """Register a cluster with the context. For WEC clusters, use ITS context."""
         # Check if cluster is already registered
-        list_result = await self._list_clusters(context, kubeconfig)
-        if list_result["status"] == "success":
-            for cluster in list_result["clusters"]:
-                if cluster["name"] == cluster_name:
-                    return {
-                        "status": "error",
-                        "error": f"Cluster '{cluster_name}' is already registered",
-                    }
+        if await self._is_registered(cluster_name, context, kubeconfig):
+            return {
+                "status": "error",
+                "error": f"Cluster '{cluster_name}' is already registered",
+            }
 
         # For WEC clusters registered to ITS, create ManagedCluster manifest
         if "its" in context.lower():
@@ -249,26 +268,17 @@ class ClusterManagementFunction(BaseFunction):
                 "spec": {"hubAcceptsClient": True},
             }
 
-            # Apply the ManagedCluster
-            import yaml
-
-            manifest_yaml = yaml.safe_dump(managed_cluster_manifest, sort_keys=False)
+            # Apply the ManagedCluster; kubectl accepts JSON on stdin
             cmd = ["kubectl", "--context", context, "apply", "-f", "-"]
             if kubeconfig:
                 cmd += ["--kubeconfig", kubeconfig]
 
-            import subprocess
-
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+            ret = await run_shell_command_with_cancellation(
+                cmd, input_data=json_dumps(managed_cluster_manifest)
             )
-            stdout, stderr = process.communicate(input=manifest_yaml)
 
-            if process.returncode == 0:
+            if ret["returncode"] == 0:
+                _list_cache.pop((context, kubeconfig), None)
                 return {
                     "status": "success",
                     "operation": "register",
@@ -280,7 +290,7 @@ class ClusterManagementFunction(BaseFunction):
             else:
                 return {
                     "status": "error",
-                    "error": f"Failed to register cluster: {stderr}",
+                    "error": f"Failed to register cluster: {ret['stderr']}",
                 }
 
         # Original Binding creation for WDS context
@@ -293,15 +303,12 @@ class ClusterManagementFunction(BaseFunction):
         }
 
         # Apply the binding
-        import yaml
-
-        binding_yaml = yaml.safe_dump(binding_manifest, sort_keys=False)
         cmd = ["kubectl", "--context", context, "apply", "-f", "-"]
         if kubeconfig:
             cmd += ["--kubeconfig", kubeconfig]
 
         ret = await run_shell_command_with_cancellation(
-            cmd, input_data=binding_yaml.encode()
+            cmd, input_data=json_dumps(binding_manifest)
         )
         if ret["returncode"] != 0:
             return {"status": "error", "error": ret["stderr"]}
@@ -313,6 +320,7 @@ class ClusterManagementFunction(BaseFunction):
             # Ignore labeling errors - the binding is the important part
             pass
 
+        _list_cache.pop((context, kubeconfig), None)
         return {
             "status": "success",
             "operation": "register",
@@ -321,6 +329,33 @@ class ClusterManagementFunction(BaseFunction):
             "labels": labels,
         }
 
+    async def _is_registered(
+        self, cluster_name: str, context: str, kubeconfig: str
+    ) -> bool:
+        """Check whether the cluster's ManagedCluster or Binding already exists.
+
+        Looks up the single object by name rather than listing every cluster.
+        """
+        if "its" in context.lower():
+            resource = ["managedcluster", cluster_name]
+        else:
+            resource = ["bindings.control.kubestellar.io", f"{cluster_name}-binding"]
+        cmd = [
+            "kubectl",
+            "--context",
+            context,
+            "get",
+            *resource,
+            "-o",
+            "name",
+            "--ignore-not-found",
+        ]
+        if kubeconfig:
+            cmd += ["--kubeconfig", kubeconfig]
+
+        ret = await run_shell_command_with_cancellation(cmd)
+        return ret["returncode"] == 0 and bool(ret["stdout"].strip())
+
     async def _label_cluster(
         self, cluster_name: str, context: str, labels: Dict[str, str], kubeconfig: str
     ) -> Dict[str, Any]:
@@ -349,6 +384,7 @@ class ClusterManagementFunction(BaseFunction):
         except Exception:
             pass
 
+        _list_cache.pop((context, kubeconfig), None)
         return {
             "status": "success",
             "operation": "label",
@@ -359,43 +395,24 @@ class ClusterManagementFunction(BaseFunction):
     async def _update_labels(
         self, cluster_name: str, context: str, labels: Dict[str, str], kubeconfig: str
     ) -> Dict[str, Any]:
-        """Update labels on a registered cluster."""
-        # First, get current labels
-        cmd = [
-            "kubectl",
-            "--context",
-            context,
-            "get",
-            "bindings.control.kubestellar.io",
-            f"{cluster_name}-binding",
-            "-o",
-            "json",
-        ]
-        if kubeconfig:
-            cmd += ["--kubeconfig", kubeconfig]
+        """Replace the labels on a registered cluster.
 
-        ret = await run_shell_command_with_cancellation(cmd)
-        if ret["returncode"] != 0:
-            return {"status": "error", "error": ret["stderr"]}
-
-        binding = json.loads(ret["stdout"])
-        current_labels = binding.get("metadata", {}).get("labels", {})
-
-        # Update labels (remove existing and add new)
+        A JSON patch ``add`` on ``/metadata/labels`` swaps the whole map in a
+        single request, so stale labels are dropped without reading them
+        first.
+        """
+        patch = [{"op": "add", "path": "/metadata/labels", "value": labels}]
         cmd = [
             "kubectl",
             "--context",
             context,
-            "label",
+            "patch",
             "bindings.control.kubestellar.io",
             f"{cluster_name}-binding",
+            "--type=json",
+            "-p",
+            json_dumps(patch).decode(),
         ]
-        # Remove existing labels
-        for key in current_labels:
-            cmd.append(f"{key}-")
-        # Add new labels
-        for k, v in labels.items():
-            cmd.append(f"{k}={v}")
         if kubeconfig:
             cmd += ["--kubeconfig", kubeconfig]
 
@@ -409,11 +426,11 @@ class ClusterManagementFunction(BaseFunction):
         except Exception:
             pass
 
+        _list_cache.pop((context, kubeconfig), None)
         return {
             "status": "success",
             "operation": "update-labels",
             "cluster": cluster_name,
-            "old_labels": current_labels,
             "new_labels": labels,
         }
 
@@ -437,6 +454,7 @@ class ClusterManagementFunction(BaseFunction):
         if ret["returncode"] != 0:
             return {"status": "error", "error": ret["stderr"]}
 
+        _list_cache.pop((context, kubeconfig), None)
         return {
             "status": "success",
             "operation": "unregister",
@@ -449,7 +467,8 @@ class ClusterManagementFunction(BaseFunction):
     ) -> Dict[str, Any]:
         """Apply labels to cluster nodes."""
         # Get nodes in the cluster
-        cmd = ["kubectl", "--context", cluster_name, "get", "nodes", "-o", "json"]
+        # Only names are needed; `-o name` avoids buffering full Node objects
+        cmd = ["kubectl", "--context", cluster_name, "get", "nodes", "-o", "name"]
         if kubeconfig:
             cmd += ["--kubeconfig", kubeconfig]
 
@@ -457,21 +476,33 @@ class ClusterManagementFunction(BaseFunction):
         if ret["returncode"] != 0:
             raise Exception(f"Failed to get nodes: {ret['stderr']}")
 
-        nodes = json.loads(ret["stdout"]).get("items", [])
+        node_names = [line.rpartition("/")[2] for line in ret["stdout"].split() if line]
+        if not node_names:
+            return {"status": "success"}
+
+        label_args = [f"{k}={v}" for k, v in labels.items()]
 
-        # Apply labels to each node
-        for node in nodes:
-            node_name = node["metadata"]["name"]
-            cmd = ["kubectl", "--context", cluster_name, "label", "node", node_name]
-            for k, v in labels.items():
-                cmd.append(f"{k}={v}")
+        def _label_cmd(*names: str) -> List[str]:
+            cmd = ["kubectl", "--context", cluster_name, "label", "node", *names]
+            cmd += label_args + ["--overwrite"]
             if kubeconfig:
                 cmd += ["--kubeconfig", kubeconfig]
+            return cmd
+
+        # Label every node in one kubectl invocation
+        ret = await run_shell_command_with_cancellation(_label_cmd(*node_names))
+        if ret["returncode"] == 0:
+            return {"status": "success"}
+
+        # Fall back to one call per node so a single bad node does not
+        # stop the others.
+        sem = asyncio.Semaphore(KUBECTL_CONCURRENCY)
+
+        async def _label_node(node_name: str) -> None:
+            async with sem:
+                await run_shell_command_with_cancellation(_label_cmd(node_name))
 
-            ret = await run_shell_command_with_cancellation(cmd)
-            if ret["returncode"] != 0:
-                # Continue with other nodes even if one fails
-                continue
+        await asyncio.gather(*[_label_node(name) for name in node_names])
 
         return {"status": "success"}
 
@@ -1,11 +1,187 @@
 """Deploy applications to clusters using helm or kubectl."""
 
-import json
+import asyncio
+import os
+import re
+import time
 from dataclasses import asdict, dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+import yaml
+
+from src.shared import k8s_client
 from src.shared.base_functions import BaseFunction
-from src.shared.utils import run_shell_command_with_cancellation
+from src.shared.json_utils import json_dumps
+from src.shared.kubeconfig_cache import load_kubeconfig
+from src.shared.utils import KUBECTL_CONCURRENCY, run_shell_command_with_cancellation
+
+# kubectl caches API discovery under ~/.kube/cache by default. Where HOME is
+# not writable (e.g. in a container) that cache is lost and every call
+# re-discovers, so allow pointing kubectl at a writable directory instead.
+_KUBECTL_CACHE_DIR = os.environ.get("A2A_KUBECTL_CACHE_DIR", "")
+
+# How long discovered clusters (and their reachability) are reused.
+_CLUSTER_CACHE_TTL = 60.0
+
+# Upper bound on kubectl processes running at once across all deployments,
+# so cluster x namespace fan-out cannot exhaust PIDs or flood API servers.
+_KUBECTL_CONCURRENCY = KUBECTL_CONCURRENCY
+_kubectl_sem: Optional[asyncio.Semaphore] = None
+_kubectl_sem_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_kubectl_semaphore() -> asyncio.Semaphore:
+    """Return the kubectl semaphore, creating it for the running loop."""
+    global _kubectl_sem, _kubectl_sem_loop
+    loop = asyncio.get_running_loop()
+    if _kubectl_sem is None or _kubectl_sem_loop is not loop:
+        _kubectl_sem = asyncio.Semaphore(_KUBECTL_CONCURRENCY)
+        _kubectl_sem_loop = loop
+    return _kubectl_sem
+
+
+# Context names that look like a WDS: "wds..." or containing "-wds-"/"_wds_".
+_WDS_RE = re.compile(r"^wds|-wds-|_wds_", re.IGNORECASE)
+
+
+def _read_kubeconfig_contexts(path: str) -> Optional[List[str]]:
+    """Return the context names in one kubeconfig file, or None if unreadable."""
+    try:
+        config = load_kubeconfig(path)
+        return [c["name"] for c in config.get("contexts") or []]
+    except Exception:
+        return None
+
+
+def _load_kubeconfig_contexts(kubeconfig: str) -> Optional[List[str]]:
+    """Read context names straight from the kubeconfig kubectl would use.
+
+    A ``KUBECONFIG`` path list is merged the way kubectl does it: missing
+    files are skipped and the first file naming a context wins. Returns None
+    when a file cannot be parsed, so callers can ask kubectl instead.
+    """
+    if kubeconfig:
+        return _read_kubeconfig_contexts(os.path.expanduser(kubeconfig))
+    paths = [p for p in os.environ.get("KUBECONFIG", "").split(os.pathsep) if p]
+    if not paths:
+        return _read_kubeconfig_contexts(os.path.expanduser("~/.kube/config"))
+
+    merged: Dict[str, None] = {}
+    for path in map(os.path.expanduser, paths):
+        if not os.path.exists(path):
+            continue
+        contexts = _read_kubeconfig_contexts(path)
+        if contexts is None:
+            return None
+        for name in contexts:
+            merged.setdefault(name, None)
+    return list(merged)
+
+
+# Kinds without a namespace. Manifests containing one are not batched, since
+# the batch would send the object once per target namespace.
+_CLUSTER_SCOPED_KINDS = frozenset(
+    (
+        "APIService",
+        "BindingPolicy",
+        "CSIDriver",
+        "CSINode",
+        "ClusterIssuer",
+        "ClusterRole",
+        "ClusterRoleBinding",
+        "CustomResourceDefinition",
+        "IngressClass",
+        "ManagedCluster",
+        "MutatingWebhookConfiguration",
+        "Namespace",
+        "Node",
+        "PersistentVolume",
+        "PriorityClass",
+        "RuntimeClass",
+        "StorageClass",
+        "ValidatingAdmissionPolicy",
+        "ValidatingAdmissionPolicyBinding",
+        "ValidatingWebhookConfiguration",
+        "VolumeAttachment",
+    )
+)
+
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader  # type: ignore[assignment]
+
+_TIMESTAMP_TAG = "tag:yaml.org,2002:timestamp"
+
+
+class _ManifestLoader(_SafeLoader):
+    """Safe loader that keeps timestamps as strings, as kubectl does.
+
+    Batched manifests are re-encoded as JSON, which has no date type.
+    """
+
+
+_ManifestLoader.yaml_implicit_resolvers = {
+    first: [(tag, regexp) for tag, regexp in resolvers if tag != _TIMESTAMP_TAG]
+    for first, resolvers in _SafeLoader.yaml_implicit_resolvers.items()
+}
+_ManifestLoader.add_constructor(
+    _TIMESTAMP_TAG, yaml.constructor.SafeConstructor.construct_yaml_str
+)
+
+
+def _only_already_exists(stderr: str) -> bool:
+    """Return True if every error in kubectl's ``stderr`` is ``AlreadyExists``."""
+    errors = [line for line in stderr.splitlines() if line.lower().startswith("error")]
+    return bool(errors) and all("(AlreadyExists)" in line for line in errors)
+
+
+def _fix_labels_json(labels_obj: Any) -> Any:
+    """Coerce label values to strings, keeping nested dicts and None as-is.
+
+    Also turns MapComposite-style objects (anything with ``items()``) into a
+    plain dict.
+    """
+    if (
+        labels_obj
+        and not isinstance(labels_obj, dict)
+        and hasattr(labels_obj, "items")
+        and callable(getattr(labels_obj, "items"))
+    ):
+        # Handle MapComposite objects
+        labels_obj = dict(labels_obj.items())
+
+    if not isinstance(labels_obj, dict):
+        return labels_obj
+    # The usual case: every value is already a string
+    if all(type(v) is str for v in labels_obj.values()):
+        return labels_obj
+
+    fixed: Dict[str, Any] = {}
+    stack = [(labels_obj, fixed)]
+    while stack:
+        src, dst = stack.pop()
+        for k, v in src.items():
+            if type(v) is str:
+                dst[k] = v
+            elif isinstance(v, dict):
+                nested: Dict[str, Any] = {}
+                dst[k] = nested
+                stack.append((v, nested))
+            else:
+                dst[k] = str(v) if v is not None else v
+    return fixed
+
+
+def _parse_cluster_images(entries: List[str]) -> Dict[str, str]:
+    """Parse ``cluster=image`` override strings into a cluster -> image map."""
+    cluster_image_map = {}
+    for entry in entries:
+        if "=" in entry:
+            cluster_name, img = entry.split("=", 1)
+            cluster_image_map[cluster_name.strip()] = img.strip()
+    return cluster_image_map
 
 
 @dataclass
@@ -19,7 +195,7 @@ class DeployToInput:
     resource_type: str = ""
     resource_name: str = ""
     image: str = ""
-    cluster_images: Optional[List[str]] = None
+    cluster_images: Optional[Dict[str, str]] = None  # cluster name -> image
     namespace: str = ""
     all_namespaces: bool = False
     labels: Optional[Dict[str, str]] = None
@@ -32,6 +208,13 @@ class DeployToInput:
     dry_run: bool = False
     list_clusters: bool = False
 
+    def __post_init__(self) -> None:
+        # The agent sends overrides as "cluster=image" strings; parse them once
+        if self.cluster_images is not None and not isinstance(
+            self.cluster_images, dict
+        ):
+            self.cluster_images = _parse_cluster_images(self.cluster_images)
+
 
 @dataclass
 class DeployToOutput:
@@ -44,11 +227,19 @@ class DeployToOutput:
 class DeployToFunction(BaseFunction):
     """Function to deploy resources to specific clusters within KubeStellar managed clusters."""
 
-    def __init__(self):
+    def __init__(self, ns_concurrency: int = 8, use_subprocess: bool = False):
         super().__init__(
             name="deploy_to",
             description="Deploy resources to specific named clusters, clusters matching labels, or all clusters in a WDS context. Perfect for edge deployments, staging environments, or when you need workloads only on certain clusters. Use list_clusters=True to see available clusters first. Alternative to multicluster_create for targeted placement.",
         )
+        # Upper bound on namespaces deployed concurrently within one cluster
+        self._ns_concurrency = ns_concurrency
+        # Force kubectl even when the in-process API client is available
+        self._use_subprocess = use_subprocess
+        # Discovered clusters keyed by kubeconfig path
+        self._cluster_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        # In-flight discovery per kubeconfig path
+        self._cluster_refresh: Dict[str, asyncio.Future] = {}
 
     async def execute(self, **kwargs: Any) -> Dict[str, Any]:
         """
@@ -152,69 +343,28 @@ class DeployToFunction(BaseFunction):
             ...     labels={'app.kubernetes.io/name': 'nginx', 'environment': 'production'}
             ... )
         """
+        # Listing clusters needs none of the deployment inputs
+        if kwargs.get("list_clusters"):
+            list_resp = await self._list_available_clusters(
+                kwargs.get("kubeconfig", ""), kwargs.get("remote_context", "")
+            )
+            return asdict(DeployToOutput(status=list_resp["status"], details=list_resp))
+
         # Build strongly-typed input object (the agent can create this directly)
         params = DeployToInput(**kwargs)
 
-        # Unpack once for readability / minimal downstream changes
+        # Only the values reassigned below get locals; everything else is
+        # read from params directly
         target_clusters = params.target_clusters
-        cluster_labels = params.cluster_labels
-        context = params.context
-        filename = params.filename
-        resource_type = params.resource_type
-        resource_name = params.resource_name
-        image = params.image
-        cluster_images = params.cluster_images
-        namespace = params.namespace
-        all_namespaces = params.all_namespaces
-        namespace_selector = params.namespace_selector
-        target_namespaces = params.target_namespaces
-        resource_filter = params.resource_filter
-        api_version = params.api_version
-        kubeconfig = params.kubeconfig
-        remote_context = params.remote_context
-        dry_run = params.dry_run
-        list_clusters = params.list_clusters
         labels = params.labels
 
         # Fix JSON formatting issues with labels
-        def _fix_labels_json(labels_obj):
-            """Fix unquoted string values in labels JSON"""
-            if (
-                labels_obj
-                and hasattr(labels_obj, "items")
-                and callable(getattr(labels_obj, "items"))
-            ):
-                # Handle MapComposite objects
-                labels_obj = dict(labels_obj.items())
-
-            if isinstance(labels_obj, dict):
-                fixed = {}
-                for k, v in labels_obj.items():
-                    # Keep ALL values as strings - no hardcoding specific values
-                    if isinstance(v, str):
-                        fixed[k] = v  # Keep all strings as strings
-                    elif isinstance(v, dict):
-                        fixed[k] = _fix_labels_json(v)
-                    else:
-                        fixed[k] = str(v) if v is not None else v
-                return fixed
-            return labels_obj
-
         if labels:
             labels = _fix_labels_json(labels)
 
         try:
-            # Handle list clusters request
-            if list_clusters:
-                list_resp = await self._list_available_clusters(
-                    kubeconfig, remote_context
-                )
-                return asdict(
-                    DeployToOutput(status=list_resp["status"], details=list_resp)
-                )
-
-            # Validate inputs
-            if not target_clusters and not cluster_labels and not context:
+            # Validate inputs before any kubectl call is made
+            if not target_clusters and not params.cluster_labels and not params.context:
                 err = {
                     "status": "error",
                     "error": "Must specify either target_clusters, cluster_labels, or context",
@@ -222,14 +372,16 @@ class DeployToFunction(BaseFunction):
                 return asdict(DeployToOutput(status="error", details=err))
 
             # Validate mutual exclusivity
-            if context and (target_clusters or cluster_labels):
+            if params.context and (target_clusters or params.cluster_labels):
                 err = {
                     "status": "error",
                     "error": "Cannot specify context with target_clusters or cluster_labels",
                 }
                 return asdict(DeployToOutput(status="error", details=err))
 
-            if not filename and not (resource_type and resource_name):
+            if not params.filename and not (
+                params.resource_type and params.resource_name
+            ):
                 err = {
                     "status": "error",
                     "error": "Must specify either filename or both resource_type and resource_name",
@@ -237,88 +389,60 @@ class DeployToFunction(BaseFunction):
                 return asdict(DeployToOutput(status="error", details=err))
 
             # Discover all available clusters
-            all_clusters = await self._discover_clusters(kubeconfig, remote_context)
+            all_clusters = await self._discover_clusters(
+                params.kubeconfig, params.remote_context
+            )
             if not all_clusters:
                 err = {"status": "error", "error": "No clusters discovered"}
                 return asdict(DeployToOutput(status="error", details=err))
 
-            if not target_clusters and not cluster_labels and not context:
-                if context:
-                    # For KubeStellar workflows, auto-select ITS cluster when WDS context is provided
-                    available_clusters = self._discover_clusters(kubeconfig)
-                    its_clusters = [
-                        cluster
-                        for cluster in available_clusters
-                        if self._is_its_cluster(cluster, kubeconfig)
-                    ]
-
-                    if its_clusters:
-                        target_clusters = [its_clusters[0]]
-                        self.console.print(
-                            f"[dim]📍 Auto-selected ITS cluster: {target_clusters[0]}[/dim]"
-                        )
-                    else:
-                        return {
-                            "status": "error",
-                            "error": "No ITS clusters found for smart targeting. Please specify target_clusters explicitly.",
-                        }
-                else:
-                    return {
-                        "status": "error",
-                        "error": "No targeting specified. Please provide target_clusters, cluster_labels, or context.",
-                    }
-
-            if not target_clusters and not cluster_labels and not context:
-                return {
-                    "status": "error",
-                    "error": "target_clusters, cluster_labels, or context is required",
-                }
-
-            if context:
+            if params.context:
                 # Get all clusters registered in the WDS context
                 try:
                     cmd = [
                         "kubectl",
                         "--context",
-                        context,
+                        params.context,
                         "get",
                         "bindings.control.kubestellar.io",
                         "-o",
-                        "json",
+                        # Only the destination cluster IDs are needed, one per line
+                        "jsonpath={range .items[*]}{range .spec.destinations[*]}"
+                        '{.clusterId}{"\\n"}{end}{end}',
                     ]
-                    if kubeconfig:
-                        cmd += ["--kubeconfig", kubeconfig]
+                    if params.kubeconfig:
+                        cmd += ["--kubeconfig", params.kubeconfig]
                     ret = await self._run_command(cmd)
                     if ret["returncode"] == 0:
-                        bindings = json.loads(ret["stdout"]).get("items", [])
-                        target_clusters = []
-                        for binding in bindings:
-                            for dest in binding.get("spec", {}).get("destinations", []):
-                                cluster_id = dest.get("clusterId")
-                                if cluster_id:
-                                    target_clusters.append(cluster_id)
+                        # Several bindings often share a destination; keep
+                        # each cluster once, in first-seen order
+                        target_clusters = list(
+                            dict.fromkeys(
+                                line for line in ret["stdout"].splitlines() if line
+                            )
+                        )
                         if not target_clusters:
                             err = {
                                 "status": "error",
-                                "error": f"No clusters found in context '{context}'",
+                                "error": f"No clusters found in context '{params.context}'",
                             }
                             return asdict(DeployToOutput(status="error", details=err))
                     else:
                         err = {
                             "status": "error",
-                            "error": f"Failed to get clusters from context '{context}': {ret['stderr']}",
+                            "error": f"Failed to get clusters from context '{params.context}': {ret['stderr']}",
                         }
                         return asdict(DeployToOutput(status="error", details=err))
                 except Exception as e:
                     err = {
                         "status": "error",
-                        "error": f"Error getting clusters from context '{context}': {str(e)}",
+                        "error": f"Error getting clusters from context '{params.context}': {str(e)}",
                     }
                     return asdict(DeployToOutput(status="error", details=err))
 
             # Filter clusters based on selection criteria
             selected_clusters = self._filter_clusters(
-                all_clusters, target_clusters, cluster_labels
+                all_clusters, target_clusters, params.cluster_labels
             )
 
             if not selected_clusters:
@@ -335,11 +459,11 @@ class DeployToFunction(BaseFunction):
             # Determine target namespaces
             target_ns_list = await self._resolve_target_namespaces(
                 selected_clusters[0],
-                all_namespaces,
-                namespace_selector,
-                target_namespaces,
-                namespace,
-                kubeconfig,
+                params.all_namespaces,
+                params.namespace_selector,
+                params.target_namespaces,
+                params.namespace,
+                params.kubeconfig,
             )
 
             # Show deployment plan
@@ -347,16 +471,16 @@ class DeployToFunction(BaseFunction):
                 "target_clusters": [c["name"] for c in selected_clusters],
                 "target_namespaces": target_ns_list,
                 "resource_info": {
-                    "filename": filename,
-                    "resource_type": resource_type,
-                    "resource_name": resource_name,
-                    "image": image,
-                    "api_version": api_version,
-                    "resource_filter": resource_filter,
+                    "filename": params.filename,
+                    "resource_type": params.resource_type,
+                    "resource_name": params.resource_name,
+                    "image": params.image,
+                    "api_version": params.api_version,
+                    "resource_filter": params.resource_filter,
                 },
             }
 
-            if dry_run:
+            if params.dry_run:
                 dry_resp = {
                     "status": "success",
                     "message": "DRY RUN - No actual deployment will occur",
@@ -366,18 +490,32 @@ class DeployToFunction(BaseFunction):
                 }
                 return asdict(DeployToOutput(status="success", details=dry_resp))
 
+            # Read the manifest once; every kubectl call gets it over stdin
+            manifest = self._read_manifest(params.filename) if params.filename else None
+
             # Execute deployment on selected clusters
             results = await self._deploy_to_clusters(
                 selected_clusters,
-                filename,
-                resource_type,
-                resource_name,
-                image,
-                cluster_images,
+                params.filename,
+                params.resource_type,
+                params.resource_name,
+                params.image,
+                params.cluster_images,
                 target_ns_list,
-                kubeconfig,
-                api_version,
+                params.kubeconfig,
+                params.api_version,
                 labels,
+                manifest=manifest,
+            )
+
+            # A successful deployment shows the cluster is reachable
+            self._mark_ready(
+                params.kubeconfig,
+                {
+                    cluster["name"]
+                    for cluster in selected_clusters
+                    if results[cluster["name"]]["status"] == "success"
+                },
             )
 
             success_count = sum(1 for r in results.values() if r["status"] == "success")
@@ -460,10 +598,12 @@ class DeployToFunction(BaseFunction):
 
             if all_namespaces or namespace_selector:
                 # Get all namespaces from the first cluster
-                cmd = ["kubectl", "get", "namespaces", "--context", cluster["context"]]
-
-                if kubeconfig:
-                    cmd.extend(["--kubeconfig", kubeconfig])
+                cmd = [
+                    "kubectl",
+                    "get",
+                    "namespaces",
+                    *self._ctx_flags(cluster, kubeconfig),
+                ]
 
                 if namespace_selector:
                     cmd.extend(["-l", namespace_selector])
@@ -490,37 +630,53 @@ class DeployToFunction(BaseFunction):
         resource_type: str,
         resource_name: str,
         image: str,
-        cluster_images: Optional[List[str]],
+        cluster_image_map: Optional[Dict[str, str]],
         target_namespaces: List[str],
         kubeconfig: str,
         api_version: str,
         labels: Optional[Dict[str, str]],
+        manifest: Optional[bytes] = None,
     ) -> Dict[str, Any]:
-        """Deploy to selected clusters."""
+        """Deploy to selected clusters.
+
+        ``manifest`` holds the contents of ``filename`` when it could be read.
+        """
         results = {}
 
-        # Parse cluster-specific images
-        cluster_image_map = {}
-        if cluster_images:
-            for cluster_image in cluster_images:
-                if "=" in cluster_image:
-                    cluster_name, img = cluster_image.split("=", 1)
-                    cluster_image_map[cluster_name.strip()] = img.strip()
-
-        # Deploy to each selected cluster
-        for cluster in clusters:
-            result = await self._deploy_to_cluster(
-                cluster,
-                filename,
-                resource_type,
-                resource_name,
-                image,
-                cluster_image_map,
-                target_namespaces,
-                kubeconfig,
-                api_version,
-                labels,
-            )
+        cluster_image_map = cluster_image_map or {}
+
+        # Parse the manifest once for every cluster
+        docs = self._load_manifest_docs(manifest) if manifest else None
+
+        # Deploy to all selected clusters concurrently; a failure on one
+        # cluster does not abort the others
+        cluster_results = await asyncio.gather(
+            *[
+                self._deploy_to_cluster(
+                    cluster,
+                    filename,
+                    resource_type,
+                    resource_name,
+                    image,
+                    cluster_image_map,
+                    target_namespaces,
+                    kubeconfig,
+                    api_version,
+                    labels,
+                    manifest=manifest,
+                    docs=docs,
+                )
+                for cluster in clusters
+            ],
+            return_exceptions=True,
+        )
+        for cluster, result in zip(clusters, cluster_results):
+            if isinstance(result, Exception):
+                result = {
+                    "status": "error",
+                    "error": f"Failed to deploy to cluster {cluster['name']}: {result}",
+                    "cluster": cluster["name"],
+                }
             results[cluster["name"]] = result
 
         return results
@@ -537,129 +693,50 @@ class DeployToFunction(BaseFunction):
         kubeconfig: str,
         api_version: str,
         labels: Optional[Dict[str, str]],
+        manifest: Optional[bytes] = None,
+        docs: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
-        """Deploy to a specific cluster across target namespaces."""
-        try:
-            namespace_results = {}
+        """Deploy to a specific cluster across target namespaces.
 
-            for namespace in target_namespaces:
-                # Check if namespace exists, create if it doesn't
-                ns_check_cmd = [
-                    "kubectl",
-                    "get",
-                    "namespace",
-                    namespace,
-                    "--context",
-                    cluster["context"],
-                ]
-                if kubeconfig:
-                    ns_check_cmd.extend(["--kubeconfig", kubeconfig])
-
-                # Try to check if namespace exists
-                namespace_exists = False
-                try:
-                    result = await self._run_command(ns_check_cmd)
-                    if result["returncode"] == 0:
-                        namespace_exists = True
-                except Exception:
-                    namespace_exists = False
-
-                # If namespace doesn't exist, create it
-                if not namespace_exists:
-                    ns_create_cmd = [
-                        "kubectl",
-                        "create",
-                        "namespace",
+        ``manifest`` and ``docs`` are the file's contents and parsed objects;
+        both are loaded here when no manifest is passed in.
+        """
+        try:
+            # Namespaces are deployed concurrently, bounded so a large
+            # all_namespaces run does not flood the API server
+            sem = asyncio.Semaphore(self._ns_concurrency)
+            # The image is the same for every namespace of this cluster
+            image_used = cluster_image_map.get(cluster["name"]) or image
+
+            async def _deploy_one_ns(namespace: str) -> Dict[str, Any]:
+                async with sem:
+                    return await self._deploy_to_namespace(
+                        cluster,
                         namespace,
-                        "--context",
-                        cluster["context"],
-                    ]
-                    if kubeconfig:
-                        ns_create_cmd.extend(["--kubeconfig", kubeconfig])
-
-                    try:
-                        create_result = await self._run_command(ns_create_cmd)
-                        if create_result["returncode"] != 0:
-                            # If namespace creation failed, log error and skip deployment
-                            namespace_results[namespace] = {
-                                "status": "error",
-                                "error": f"Failed to create namespace: {create_result.get('stderr', 'Unknown error')}",
-                            }
-                            continue
-                    except Exception as e:
-                        # If namespace creation failed with exception, log error and skip deployment
-                        namespace_results[namespace] = {
-                            "status": "error",
-                            "error": f"Failed to create namespace: {str(e)}",
-                        }
-                        continue
-
-                # Build kubectl command for each namespace
-                if filename:
-                    cmd = ["kubectl", "apply", "-f", filename]
-                else:
-                    cmd = ["kubectl", "create", resource_type, resource_name]
-
-                    # Add API version if specified
-                    if api_version:
-                        # For kubectl create, API version is typically embedded in the resource type
-                        pass  # API version handling would be more complex for direct resource creation
-
-                    # Handle image for deployments
-                    if resource_type == "deployment":
-                        cluster_specific_image = cluster_image_map.get(cluster["name"])
-                        if cluster_specific_image:
-                            cmd.extend(["--image", cluster_specific_image])
-                            image_used = cluster_specific_image
-                        elif image:
-                            cmd.extend(["--image", image])
-                            image_used = image
-                        else:
-                            image_used = None
-
-                # Add common parameters
-                cmd.extend(["--context", cluster["context"]])
-
-                if kubeconfig:
-                    cmd.extend(["--kubeconfig", kubeconfig])
-
-                cmd.extend(["--namespace", namespace])
-
-                # Execute command
-                result = await self._run_command(cmd)
-
-                if result["returncode"] == 0:
-                    response = {"status": "success", "output": result["stdout"]}
-
-                    # Add image info for deployments
-                    if resource_type == "deployment" and "image_used" in locals():
-                        response["image_used"] = image_used
-                    if labels:
-                        label_response = await self._apply_labels(
-                            filename,
-                            cluster,
-                            namespace,
-                            labels,
-                            kubeconfig,
-                        )
-                        response["label_result"] = label_response
-
-                    namespace_results[namespace] = response
-                else:
-                    # Provide friendly error messages
-                    error_output = result["stderr"] or result["stdout"]
-                    if "already exists" in error_output:
-                        error_msg = "Resource already exists in this namespace"
-                    elif "not found" in error_output:
-                        error_msg = "Namespace or resource type not found"
-                    else:
-                        error_msg = f"Deployment failed: {error_output}"
-
-                    namespace_results[namespace] = {
-                        "status": "error",
-                        "error": error_msg,
-                        "output": error_output,
-                    }
+                        filename,
+                        resource_type,
+                        resource_name,
+                        image_used,
+                        kubeconfig,
+                        api_version,
+                        labels,
+                        manifest=manifest,
+                    )
+
+            # A namespace-agnostic manifest is applied to every namespace in
+            # one kubectl call; anything else goes namespace by namespace
+            if manifest is None and filename:
+                manifest = self._read_manifest(filename)
+                docs = self._load_manifest_docs(manifest) if manifest else None
+            if docs is not None:
+                namespace_results = await self._apply_manifest_batch(
+                    cluster, docs, target_namespaces, kubeconfig, labels
+                )
+            else:
+                ns_results = await asyncio.gather(
+                    *[_deploy_one_ns(ns) for ns in target_namespaces]
+                )
+                namespace_results = dict(zip(target_namespaces, ns_results))
 
             # Summarize results across namespaces
             success_count = sum(
@@ -683,6 +760,359 @@ class DeployToFunction(BaseFunction):
                 "cluster": cluster["name"],
             }
 
+    async def _deploy_to_namespace(
+        self,
+        cluster: Dict[str, Any],
+        namespace: str,
+        filename: str,
+        resource_type: str,
+        resource_name: str,
+        image: str,
+        kubeconfig: str,
+        api_version: str,
+        labels: Optional[Dict[str, str]],
+        manifest: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """Deploy to one namespace of a cluster, creating the namespace if needed.
+
+        ``image`` is the image already resolved for this cluster. When
+        ``manifest`` is given it is piped to kubectl instead of re-reading
+        ``filename``.
+        """
+        ns_error = await self._ensure_namespace(cluster, namespace, kubeconfig)
+        if ns_error:
+            return ns_error
+
+        # Build kubectl command for the namespace
+        flags = (*self._ctx_flags(cluster, kubeconfig), "--namespace", namespace)
+        source = "-" if manifest is not None else filename
+        if filename:
+            cmd = ["kubectl", "apply", "-f", source, *flags]
+        else:
+            cmd = ["kubectl", "create", resource_type, resource_name, *flags]
+
+            # Add API version if specified
+            if api_version:
+                # For kubectl create, API version is typically embedded in the resource type
+                pass  # API version handling would be more complex for direct resource creation
+
+            # Handle image for deployments
+            if resource_type == "deployment" and image:
+                cmd.extend(["--image", image])
+
+        # Execute command
+        result = await self._run_command(cmd, input_data=manifest)
+
+        if result["returncode"] == 0:
+            response = {"status": "success", "output": result["stdout"]}
+
+            # Add image info for deployments
+            if resource_type == "deployment" and not filename:
+                response["image_used"] = image or None
+            if labels:
+                label_response = await self._apply_labels(
+                    filename,
+                    cluster,
+                    namespace,
+                    labels,
+                    kubeconfig,
+                    manifest=manifest,
+                )
+                response["label_result"] = label_response
+
+            return response
+
+        return self._deploy_error(result)
+
+    async def _ensure_namespace(
+        self, cluster: Dict[str, Any], namespace: str, kubeconfig: str
+    ) -> Optional[Dict[str, Any]]:
+        """Create the namespace if it is missing; return an error result on failure.
+
+        Uses the in-process API client when available; otherwise a single
+        ``kubectl create`` replaces separate get and create calls. An
+        existing namespace (``AlreadyExists``) is success and is left
+        untouched. Authorization is checked before existence, so a user
+        who may not create namespaces gets ``Forbidden`` even for one that
+        exists; the namespace is then looked up and accepted if present.
+        """
+        if not self._use_subprocess:
+            api = await k8s_client.get_api_client(cluster["context"], kubeconfig)
+            if api is not None:
+                try:
+                    await k8s_client.client.CoreV1Api(api).create_namespace(
+                        body={"metadata": {"name": namespace}}
+                    )
+                except k8s_client.client.ApiException as e:
+                    # 409: namespace already exists; 403: may exist anyway
+                    if e.status != 409 and not (
+                        e.status == 403
+                        and await self._read_namespace_with_client(api, namespace)
+                    ):
+                        return {
+                            "status": "error",
+                            "error": f"Failed to create namespace: {e.status} {e.reason}",
+                        }
+                except Exception as e:
+                    return {
+                        "status": "error",
+                        "error": f"Failed to create namespace: {str(e)}",
+                    }
+                return None
+
+        manifest = json_dumps(
+            {"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": namespace}}
+        )
+        cmd = ["kubectl", "create", "-f", "-", *self._ctx_flags(cluster, kubeconfig)]
+
+        try:
+            result = await self._run_command(cmd, input_data=manifest)
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": f"Failed to create namespace: {str(e)}",
+            }
+        stderr = result.get("stderr") or ""
+        if result["returncode"] != 0 and not _only_already_exists(stderr):
+            if "(Forbidden)" in stderr and await self._namespace_exists(
+                cluster, namespace, kubeconfig
+            ):
+                return None
+            return {
+                "status": "error",
+                "error": f"Failed to create namespace: {result.get('stderr', 'Unknown error')}",
+            }
+
+        return None
+
+    @staticmethod
+    async def _read_namespace_with_client(api: Any, namespace: str) -> bool:
+        """Return True if ``namespace`` can be read through the API client."""
+        try:
+            await k8s_client.client.CoreV1Api(api).read_namespace(name=namespace)
+        except Exception:
+            return False
+        return True
+
+    async def _namespace_exists(
+        self, cluster: Dict[str, Any], namespace: str, kubeconfig: str
+    ) -> bool:
+        """Return True if ``kubectl get namespace`` finds ``namespace``."""
+        cmd = [
+            "kubectl",
+            "get",
+            "namespace",
+            namespace,
+            "-o",
+            "name",
+            *self._ctx_flags(cluster, kubeconfig),
+        ]
+        try:
+            result = await self._run_command(cmd)
+        except Exception:
+            return False
+        return result["returncode"] == 0
+
+    async def _ensure_namespaces(
+        self, cluster: Dict[str, Any], namespaces: List[str], kubeconfig: str
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Ensure each namespace exists; return its error result or None, in order.
+
+        Without the API client all namespaces go to one ``kubectl create``;
+        only if that fails for another reason than existing namespaces are
+        they retried one by one to tell which failed.
+        """
+        if len(namespaces) > 1 and (
+            self._use_subprocess
+            or await k8s_client.get_api_client(cluster["context"], kubeconfig) is None
+        ):
+            manifest = json_dumps(
+                {
+                    "apiVersion": "v1",
+                    "kind": "List",
+                    "items": [
+                        {
+                            "apiVersion": "v1",
+                            "kind": "Namespace",
+                            "metadata": {"name": ns},
+                        }
+                        for ns in namespaces
+                    ],
+                }
+            )
+            cmd = [
+                "kubectl",
+                "create",
+                "-f",
+                "-",
+                *self._ctx_flags(cluster, kubeconfig),
+            ]
+            try:
+                result = await self._run_command(cmd, input_data=manifest)
+            except Exception:
+                result = None
+            if result is not None and (
+                result["returncode"] == 0
+                or _only_already_exists(result.get("stderr") or "")
+            ):
+                return [None] * len(namespaces)
+
+        sem = asyncio.Semaphore(self._ns_concurrency)
+
+        async def _bounded(ns: str) -> Optional[Dict[str, Any]]:
+            async with sem:
+                return await self._ensure_namespace(cluster, ns, kubeconfig)
+
+        return list(await asyncio.gather(*[_bounded(ns) for ns in namespaces]))
+
+    async def _apply_manifest_batch(
+        self,
+        cluster: Dict[str, Any],
+        docs: List[Dict[str, Any]],
+        target_namespaces: List[str],
+        kubeconfig: str,
+        labels: Optional[Dict[str, str]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """Apply ``docs`` to every target namespace with a single kubectl call.
+
+        Labels are merged into each object's metadata and sent with a
+        server-side apply, so no separate ``kubectl label`` call is needed.
+        If the combined apply fails, each namespace is applied on its own so
+        that one bad object only fails the namespaces it affects.
+        """
+        ns_errors = await self._ensure_namespaces(
+            cluster, target_namespaces, kubeconfig
+        )
+        namespace_results: Dict[str, Dict[str, Any]] = {
+            ns: err for ns, err in zip(target_namespaces, ns_errors) if err
+        }
+        ready = [ns for ns in target_namespaces if ns not in namespace_results]
+        if not ready:
+            return namespace_results
+
+        if labels:
+            docs = [
+                {
+                    **doc,
+                    "metadata": {
+                        **doc.get("metadata", {}),
+                        "labels": {
+                            **(doc.get("metadata", {}).get("labels") or {}),
+                            **labels,
+                        },
+                    },
+                }
+                for doc in docs
+            ]
+
+        def _items(namespaces: List[str]) -> List[Dict[str, Any]]:
+            return [
+                {**doc, "metadata": {**doc.get("metadata", {}), "namespace": ns}}
+                for ns in namespaces
+                for doc in docs
+            ]
+
+        result = await self._apply_items(cluster, _items(ready), kubeconfig, labels)
+        if result["returncode"] == 0:
+            # kubectl prints one line per object, in input order
+            lines = result["stdout"].splitlines()
+            per_ns = len(docs)
+            for i, ns in enumerate(ready):
+                output = result["stdout"]
+                if len(lines) == per_ns * len(ready):
+                    output = "\n".join(lines[i * per_ns : (i + 1) * per_ns])
+                namespace_results[ns] = {"status": "success", "output": output}
+            return {ns: namespace_results[ns] for ns in target_namespaces}
+
+        sem = asyncio.Semaphore(self._ns_concurrency)
+
+        async def _apply_one(ns: str) -> Dict[str, Any]:
+            async with sem:
+                res = await self._apply_items(cluster, _items([ns]), kubeconfig, labels)
+            if res["returncode"] != 0:
+                return self._deploy_error(res)
+            return {"status": "success", "output": res["stdout"]}
+
+        retried = await asyncio.gather(*[_apply_one(ns) for ns in ready])
+        namespace_results.update(zip(ready, retried))
+        return {ns: namespace_results[ns] for ns in target_namespaces}
+
+    async def _apply_items(
+        self,
+        cluster: Dict[str, Any],
+        items: List[Dict[str, Any]],
+        kubeconfig: str,
+        labels: Optional[Dict[str, str]],
+    ) -> Dict[str, Any]:
+        """Apply ``items`` as one List; labels need a server-side apply."""
+        manifest = json_dumps({"apiVersion": "v1", "kind": "List", "items": items})
+        cmd = ["kubectl", "apply", "-f", "-", *self._ctx_flags(cluster, kubeconfig)]
+        if labels:
+            cmd.extend(["--server-side", "--force-conflicts"])
+        return await self._run_command(cmd, input_data=manifest)
+
+    @staticmethod
+    def _read_manifest(filename: str) -> Optional[bytes]:
+        """Read a manifest file's bytes.
+
+        Returns None for anything kubectl must resolve itself, such as
+        directories, URLs or unreadable paths.
+        """
+        try:
+            with open(filename, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _load_manifest_docs(manifest: bytes) -> Optional[List[Dict[str, Any]]]:
+        """Parse a manifest whose objects do not pin a namespace.
+
+        Returns None when the manifest cannot be parsed, any object sets
+        ``metadata.namespace`` or is of a cluster-scoped kind, so the caller
+        applies it namespace by namespace.
+        """
+        try:
+            raw_docs = list(yaml.load_all(manifest, Loader=_ManifestLoader))
+        except Exception:
+            return None
+
+        docs: List[Dict[str, Any]] = []
+        for doc in raw_docs:
+            if doc is None:
+                continue
+            if not isinstance(doc, dict):
+                return None
+            if doc.get("kind") == "List":
+                docs.extend(doc.get("items") or [])
+            else:
+                docs.append(doc)
+        for doc in docs:
+            if (
+                not isinstance(doc, dict)
+                or (doc.get("metadata") or {}).get("namespace")
+                or doc.get("kind") in _CLUSTER_SCOPED_KINDS
+            ):
+                return None
+        return docs or None
+
+    @staticmethod
+    def _deploy_error(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a friendly error result from a failed kubectl call."""
+        error_output = result["stderr"] or result["stdout"]
+        if "already exists" in error_output:
+            error_msg = "Resource already exists in this namespace"
+        elif "not found" in error_output:
+            error_msg = "Namespace or resource type not found"
+        else:
+            error_msg = f"Deployment failed: {error_output}"
+
+        return {
+            "status": "error",
+            "error": error_msg,
+            "output": error_output,
+        }
+
     async def _apply_labels(
         self,
         filename: str,
@@ -690,29 +1120,31 @@ class DeployToFunction(BaseFunction):
         namespace: str,
         labels: Dict[str, str],
         kubeconfig: str,
+        manifest: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         cmd = [
             "kubectl",
             "label",
             "-f",
-            filename,
-            "--context",
-            cluster["context"],
+            "-" if manifest is not None else filename,
+            *self._ctx_flags(cluster, kubeconfig),
             "--namespace",
             namespace,
             "--overwrite",
+            *[f"{key}={value}" for key, value in labels.items()],
         ]
-        if kubeconfig:
-            cmd.extend(["--kubeconfig", kubeconfig])
-
-        for key, value in labels.items():
-            cmd.append(f"{key}={value}")
 
-        result = await self._run_command(cmd)
+        result = await self._run_command(cmd, input_data=manifest)
         if result["returncode"] == 0:
             return {"status": "success", "output": result["stdout"]}
         return {"status": "error", "output": result["stderr"] or result["stdout"]}
 
+    @staticmethod
+    def _ctx_flags(cluster: Dict[str, Any], kubeconfig: str) -> Tuple[str, ...]:
+        """kubectl flags selecting the cluster's context (and kubeconfig)."""
+        flags = ("--context", cluster["context"])
+        return flags + ("--kubeconfig", kubeconfig) if kubeconfig else flags
+
     def _filter_clusters(
         self,
         all_clusters: List[Dict[str, Any]],
@@ -721,21 +1153,22 @@ class DeployToFunction(BaseFunction):
     ) -> List[Dict[str, Any]]:
         """Filter clusters based on selection criteria."""
         if target_names:
-            # Filter by cluster names
-            name_set = set()
-            for name_list in target_names:
-                # Handle comma-separated names
-                if isinstance(name_list, str):
-                    names = [n.strip() for n in name_list.split(",")]
-                    name_set.update(names)
-                else:
-                    name_set.add(name_list)
+            # Filter by cluster names; entries may be comma-separated strings
+            names = dict.fromkeys(
+                token.strip() if isinstance(token, str) else token
+                for entry in target_names
+                for token in (entry.split(",") if isinstance(entry, str) else (entry,))
+            )
+            # Look clusters up by context and name (names win on a clash)
+            index = {c["context"]: c for c in all_clusters}
+            index.update((c["name"], c) for c in all_clusters)
 
-            return [
-                c
-                for c in all_clusters
-                if c["name"] in name_set or c["context"] in name_set
-            ]
+            selected: Dict[int, Dict[str, Any]] = {}
+            for name in names:
+                cluster = index.get(name)
+                if cluster is not None:
+                    selected.setdefault(id(cluster), cluster)
+            return list(selected.values())
 
         if cluster_labels:
             # Parse label selectors
@@ -755,57 +1188,104 @@ class DeployToFunction(BaseFunction):
     async def _discover_clusters(
         self, kubeconfig: str, remote_context: str
     ) -> List[Dict[str, Any]]:
-        """Discover available clusters using kubectl."""
-        try:
-            clusters = []
+        """Discover available clusters, reusing results for a short while.
 
-            # Get kubeconfig contexts
-            cmd = ["kubectl", "config", "get-contexts", "-o", "name"]
-            if kubeconfig:
-                cmd.extend(["--kubeconfig", kubeconfig])
+        Probing only depends on the kubeconfig, so that is the cache key. Once
+        the cache is older than the TTL the old result is still returned while
+        a refresh runs in the background; only a cold cache waits for probing.
+        Concurrent callers share one refresh. Each caller gets its own copies
+        of the cluster dicts, so the cache cannot be changed through them.
+        """
+        cached = self._cluster_cache.get(kubeconfig)
+        if cached and time.monotonic() - cached[0] < _CLUSTER_CACHE_TTL:
+            return [dict(c) for c in cached[1]]
+        task = self._cluster_refresh.get(kubeconfig)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh_clusters(kubeconfig))
+            self._cluster_refresh[kubeconfig] = task
+        if cached:
+            return [dict(c) for c in cached[1]]
+        # Shield so one caller's cancellation does not abort the shared probe.
+        return [dict(c) for c in await asyncio.shield(task)]
+
+    def _mark_ready(self, kubeconfig: str, names: Set[str]) -> None:
+        """Record the clusters in ``names`` as Ready in the discovery cache.
+
+        The cached list is replaced rather than modified and keeps its
+        timestamp, so the next refresh still happens on schedule.
+        """
+        cached = self._cluster_cache.get(kubeconfig)
+        if not cached or not any(
+            c["name"] in names and c.get("status") != "Ready" for c in cached[1]
+        ):
+            return
+        self._cluster_cache[kubeconfig] = (
+            cached[0],
+            [{**c, "status": "Ready"} if c["name"] in names else c for c in cached[1]],
+        )
 
-            result = await self._run_command(cmd)
-            if result["returncode"] != 0:
-                return []
+    async def _refresh_clusters(self, kubeconfig: str) -> List[Dict[str, Any]]:
+        """Probe clusters and update the cache; keep the old result on failure."""
+        try:
+            clusters = await self._probe_clusters(kubeconfig)
+            if clusters:
+                self._cluster_cache[kubeconfig] = (time.monotonic(), clusters)
+                return clusters
+            cached = self._cluster_cache.get(kubeconfig)
+            return cached[1] if cached else clusters
+        finally:
+            self._cluster_refresh.pop(kubeconfig, None)
+
+    async def _probe_clusters(self, kubeconfig: str) -> List[Dict[str, Any]]:
+        """Discover available clusters using kubectl."""
+        try:
+            # Get kubeconfig contexts, reading the file directly when possible
+            contexts = _load_kubeconfig_contexts(kubeconfig)
+            if contexts is None:
+                cmd = ["kubectl", "config", "get-contexts", "-o", "name"]
+                if kubeconfig:
+                    cmd.extend(["--kubeconfig", kubeconfig])
 
-            contexts = result["stdout"].strip().split("\n")
+                result = await self._run_command(cmd)
+                if result["returncode"] != 0:
+                    return []
 
-            # Test connectivity to each context
-            for context in contexts:
-                if not context.strip():
-                    continue
+                contexts = result["stdout"].strip().split("\n")
 
-                # Skip WDS (Workload Description Space) clusters
-                if self._is_wds_cluster(context):
-                    continue
+            # Skip WDS (Workload Description Space) clusters
+            contexts = [
+                context
+                for context in contexts
+                if context.strip() and not self._is_wds_cluster(context)
+            ]
 
-                # Test cluster connectivity
+            async def _probe(context: str) -> Dict[str, Any]:
                 test_cmd = ["kubectl", "cluster-info", "--context", context]
                 if kubeconfig:
                     test_cmd.extend(["--kubeconfig", kubeconfig])
 
                 test_result = await self._run_command(test_cmd)
                 status = "Ready" if test_result["returncode"] == 0 else "Unreachable"
+                return {"name": context, "context": context, "status": status}
 
-                clusters.append({"name": context, "context": context, "status": status})
-
-            return clusters
+            # Probe every context at once; _run_command bounds the processes
+            return list(await asyncio.gather(*[_probe(c) for c in contexts]))
 
         except Exception:
             return []
 
     def _is_wds_cluster(self, cluster_name: str) -> bool:
         """Check if cluster is a WDS (Workload Description Space) cluster."""
-        lower_name = cluster_name.lower()
-        return (
-            lower_name.startswith("wds")
-            or "-wds-" in lower_name
-            or "_wds_" in lower_name
-        )
+        return _WDS_RE.search(cluster_name) is not None
 
-    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
+    async def _run_command(
+        self, cmd: List[str], input_data: Optional[bytes] = None
+    ) -> Dict[str, Any]:
         """Run a shell command asynchronously with cancellation support."""
-        return await run_shell_command_with_cancellation(cmd)
+        if _KUBECTL_CACHE_DIR and cmd[0] == "kubectl":
+            cmd = [cmd[0], "--cache-dir", _KUBECTL_CACHE_DIR, *cmd[1:]]
+        async with _get_kubectl_semaphore():
+            return await run_shell_command_with_cancellation(cmd, input_data=input_data)
 
     def get_schema(self) -> Dict[str, Any]:
         """Define the JSON schema for function parameters."""
@@ -1,10 +1,43 @@
 """Function to get detailed information about a specific Kubernetes resource."""
 
 import asyncio
-from dataclasses import asdict, dataclass, field
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, TypedDict
 
+from src.shared import k8s_client
 from src.shared.base_functions import BaseFunction
+from src.shared.json_utils import json_loads
+from src.shared.utils import run_shell_command_with_cancellation
+
+# Event fields kept in the response, as in the Events table of kubectl describe.
+_EVENT_FIELDS = ("type", "reason", "message", "count", "lastTimestamp")
+
+
+def _summarize_events(items: List[Dict[str, Any]], kind: str) -> List[Dict[str, Any]]:
+    """Keep the describe-relevant fields of events about an object of ``kind``."""
+    events = []
+    for item in items:
+        if kind and (item.get("involvedObject") or {}).get("kind") != kind:
+            continue
+        event = {f: item.get(f) for f in _EVENT_FIELDS if item.get(f) is not None}
+        source = (item.get("source") or {}).get("component")
+        if source:
+            event["from"] = source
+        events.append(event)
+    return events
+
+
+def _describe_details(
+    obj: Dict[str, Any], events: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Build the success payload from the object JSON and its raw events."""
+    # managedFields is bookkeeping that kubectl describe does not show either
+    (obj.get("metadata") or {}).pop("managedFields", None)
+    return {
+        "status": "success",
+        "object": obj,
+        "events": _summarize_events(events, obj.get("kind", "")),
+    }
 
 
 @dataclass
@@ -18,24 +51,26 @@ class DescribeResourceInput:
     kubeconfig: str = ""
 
 
-@dataclass
-class DescribeResourceOutput:
-    """Standardised response from the describe_resource function."""
+class DescribeResourceOutput(TypedDict):
+    """Standardised response from the describe_resource function.
+
+    Built as a plain dict so returning it does not deep-copy ``details``.
+    """
 
     status: str
-    details: Dict[str, Any] = field(default_factory=dict)
+    details: Dict[str, Any]
 
 
 class DescribeResourceFunction(BaseFunction):
     """
-    Function to get detailed, human-readable information about a specific Kubernetes resource,
-    similar to 'kubectl describe'.
+    Function to get detailed information about a specific Kubernetes resource,
+    similar to 'kubectl describe' but returned as structured JSON.
     """
 
     def __init__(self):
         super().__init__(
             name="describe_resource",
-            description="Get a detailed, human-readable description of a specific Kubernetes resource, including its state, configuration, and recent events. This is equivalent to running 'kubectl describe'.",
+            description="Get a detailed description of a specific Kubernetes resource, including its state, configuration, and recent events. This is equivalent to running 'kubectl describe', with the resource and its events returned as structured JSON.",
         )
 
     async def execute(self, **kwargs: Any) -> Dict[str, Any]:
@@ -45,53 +80,105 @@ class DescribeResourceFunction(BaseFunction):
         try:
             params = DescribeResourceInput(**kwargs)
 
-            # Build the kubectl describe command
-            cmd = [
-                "kubectl",
-                "describe",
-                params.resource_type,
-                params.resource_name,
-                "--context",
-                params.context,
-                "--namespace",
-                params.namespace,
-            ]
+            # Common resource types are read in-process when possible
+            result = await self._describe_with_client(params)
+            if result is not None:
+                return result
 
+            flags = ["--context", params.context, "--namespace", params.namespace]
             if params.kubeconfig:
-                cmd.extend(["--kubeconfig", params.kubeconfig])
-
-            # Run the command
-            result = await self._run_command(cmd)
+                flags.extend(["--kubeconfig", params.kubeconfig])
+
+            # Fetch the object and the events about it concurrently
+            obj_result, events_result = await asyncio.gather(
+                self._run_command(
+                    [
+                        "kubectl",
+                        "get",
+                        params.resource_type,
+                        params.resource_name,
+                        "-o",
+                        "json",
+                        *flags,
+                    ]
+                ),
+                self._run_command(
+                    [
+                        "kubectl",
+                        "get",
+                        "events",
+                        "--field-selector",
+                        f"involvedObject.name={params.resource_name}",
+                        "-o",
+                        "json",
+                        *flags,
+                    ]
+                ),
+            )
 
             # Return the result
-            if result["returncode"] == 0:
-                response = {"status": "success", "description": result["stdout"]}
-                return asdict(
-                    DescribeResourceOutput(status="success", details=response)
-                )
-            else:
-                err = {"status": "error", "error": result["stderr"] or result["stdout"]}
-                return asdict(DescribeResourceOutput(status="error", details=err))
+            if obj_result["returncode"] != 0:
+                err = {
+                    "status": "error",
+                    "error": obj_result["stderr"] or obj_result["stdout"].decode(),
+                }
+                return DescribeResourceOutput(status="error", details=err)
+
+            events = []
+            if events_result["returncode"] == 0 and events_result["stdout"]:
+                events = json_loads(events_result["stdout"]).get("items", [])
+            response = _describe_details(json_loads(obj_result["stdout"]), events)
+            return DescribeResourceOutput(status="success", details=response)
 
         except Exception as e:
             err = {"status": "error", "error": f"Failed to describe resource: {str(e)}"}
-            return asdict(DescribeResourceOutput(status="error", details=err))
+            return DescribeResourceOutput(status="error", details=err)
 
-    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
-        """Run a shell command asynchronously."""
+    async def _describe_with_client(
+        self, params: DescribeResourceInput
+    ) -> Optional[Dict[str, Any]]:
+        """Read the resource and its events through the API client.
+
+        Returns None when the resource type has no typed call or no client is
+        available, so kubectl is used.
+        """
+        kind = k8s_client.typed_kind(params.resource_type)
+        if kind is None:
+            return None
+        api = await k8s_client.get_api_client(params.context, params.kubeconfig)
+        if api is None:
+            return None
+
+        api_class, suffix = k8s_client.TYPED_RESOURCES[kind]
+        read = getattr(getattr(k8s_client.client, api_class)(api), f"read_{suffix}")
+        core = k8s_client.client.CoreV1Api(api)
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            obj, events = await asyncio.gather(
+                read(name=params.resource_name, namespace=params.namespace),
+                core.list_namespaced_event(
+                    params.namespace,
+                    field_selector=f"involvedObject.name={params.resource_name}",
+                ),
             )
-            stdout, stderr = await process.communicate()
+        except k8s_client.client.ApiException as e:
+            err = {"status": "error", "error": f"{e.status} {e.reason}: {e.body}"}
+            return DescribeResourceOutput(status="error", details=err)
+
+        # Serialize to the same camelCase JSON kubectl prints
+        response = _describe_details(
+            api.sanitize_for_serialization(obj),
+            api.sanitize_for_serialization(events).get("items", []),
+        )
+        return DescribeResourceOutput(status="success", details=response)
 
-            return {
-                "returncode": process.returncode,
-                "stdout": stdout.decode(),
-                "stderr": stderr.decode(),
-            }
+    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
+        """Run a shell command asynchronously, terminating it if cancelled."""
+        try:
+            return await run_shell_command_with_cancellation(cmd, decode_stdout=False)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            return {"returncode": 1, "stdout": "", "stderr": str(e)}
+            return {"returncode": 1, "stdout": b"", "stderr": str(e)}
 
     def get_schema(self) -> Dict[str, Any]:
         """Define the JSON schema for function parameters."""
@@ -1,10 +1,14 @@
 """Directly edit a live Kubernetes resource on a specific cluster by providing a YAML patch."""
 
 import asyncio
-from dataclasses import asdict, dataclass, field
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, TypedDict
 
+import yaml
+
+from src.shared import k8s_client
 from src.shared.base_functions import BaseFunction
+from src.shared.utils import run_shell_command_with_cancellation
 
 
 @dataclass
@@ -19,12 +23,11 @@ class EditResourceInput:
     kubeconfig: str = ""
 
 
-@dataclass
-class EditResourceOutput:
+class EditResourceOutput(TypedDict):
     """Standardised response from `edit_resource`."""
 
     status: str
-    details: Dict[str, Any] = field(default_factory=dict)
+    details: Dict[str, Any]
 
 
 class EditResourceFunction(BaseFunction):
@@ -47,6 +50,24 @@ class EditResourceFunction(BaseFunction):
         try:
             params = EditResourceInput(**kwargs)
 
+            # Reject malformed patches before reaching the cluster
+            try:
+                body = yaml.safe_load(params.patch_yaml)
+            except yaml.YAMLError as e:
+                err = {"status": "error", "error": f"Invalid patch_yaml: {e}"}
+                return EditResourceOutput(status="error", details=err)
+            if not isinstance(body, dict):
+                err = {
+                    "status": "error",
+                    "error": "Invalid patch_yaml: expected a YAML mapping",
+                }
+                return EditResourceOutput(status="error", details=err)
+
+            # Common resource types are patched in-process when possible
+            result = await self._patch_with_client(params, body)
+            if result is not None:
+                return result
+
             # Build the kubectl patch command
             cmd = [
                 "kubectl",
@@ -72,28 +93,55 @@ class EditResourceFunction(BaseFunction):
             # Return the result
             if result["returncode"] == 0:
                 response = {"status": "success", "output": result["stdout"]}
-                return asdict(EditResourceOutput(status="success", details=response))
+                return EditResourceOutput(status="success", details=response)
             else:
                 err = {"status": "error", "error": result["stderr"] or result["stdout"]}
-                return asdict(EditResourceOutput(status="error", details=err))
+                return EditResourceOutput(status="error", details=err)
 
         except Exception as e:
             err = {"status": "error", "error": f"Failed to edit resource: {str(e)}"}
-            return asdict(EditResourceOutput(status="error", details=err))
+            return EditResourceOutput(status="error", details=err)
 
-    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
-        """Run a shell command asynchronously."""
+    async def _patch_with_client(
+        self, params: EditResourceInput, body: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Merge-patch the resource with the parsed ``body`` through the API client.
+
+        Returns None when the resource type has no typed call or no client is
+        available, so kubectl is used.
+        """
+        kind = k8s_client.typed_kind(params.resource_type)
+        if kind is None:
+            return None
+        api = await k8s_client.get_api_client(params.context, params.kubeconfig)
+        if api is None:
+            return None
+
+        api_class, suffix = k8s_client.TYPED_RESOURCES[kind]
+        patch = getattr(getattr(k8s_client.client, api_class)(api), f"patch_{suffix}")
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            await patch(
+                name=params.resource_name,
+                namespace=params.namespace,
+                body=body,
+                _content_type="application/merge-patch+json",
             )
-            stdout, stderr = await process.communicate()
+        except k8s_client.client.ApiException as e:
+            err = {"status": "error", "error": f"{e.status} {e.reason}: {e.body}"}
+            return EditResourceOutput(status="error", details=err)
+
+        response = {
+            "status": "success",
+            "output": f"{kind}/{params.resource_name} patched",
+        }
+        return EditResourceOutput(status="success", details=response)
 
-            return {
-                "returncode": process.returncode,
-                "stdout": stdout.decode(),
-                "stderr": stderr.decode(),
-            }
+    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
+        """Run a shell command asynchronously, terminating it if cancelled."""
+        try:
+            return await run_shell_command_with_cancellation(cmd)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             return {"returncode": 1, "stdout": "", "stderr": str(e)}
 
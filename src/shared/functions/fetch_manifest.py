@@ -1,22 +1,207 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import fnmatch
+import hashlib
 import os
-import random
-import ssl
-import string
+import shutil
 import tempfile
-import urllib.request
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
+import aiofiles
+import aiohttp
+
 from src.shared.base_functions import BaseFunction
+from src.shared.json_utils import json_dumps, json_loads
+
+# Bytes read from the network per write when streaming a download to disk.
+_CHUNK_SIZE = 64 * 1024
+
+# Argument types that need no MapComposite conversion.
+_NATIVE_TYPES = frozenset((list, dict, str, bytes, type(None)))
+
+# Downloaded manifests are kept here keyed by URL when the cache is enabled
+# by setting A2A_MANIFEST_CACHE_DIR. A copy younger than the TTL is reused
+# without touching the network; an older one is revalidated with a
+# conditional GET using the ETag/Last-Modified recorded next to it. Requests
+# with caller headers (e.g. credentials) never use the cache.
+_MANIFEST_CACHE_DIR: Optional[Path] = (
+    Path(os.environ["A2A_MANIFEST_CACHE_DIR"])
+    if os.environ.get("A2A_MANIFEST_CACHE_DIR")
+    else None
+)
+_MANIFEST_CACHE_TTL = 300.0
+
+
+# Private (mode 0700) directory for downloads without a usable destination,
+# created once per process; reproducible names there cannot be pre-planted
+# by other local users the way they could in /tmp.
+_download_dir: Optional[Path] = None
+
+
+def _private_download_dir() -> Path:
+    """Return the process's private download directory, creating it once."""
+    global _download_dir
+    if _download_dir is None or not _download_dir.is_dir():
+        _download_dir = Path(tempfile.mkdtemp(prefix="a2a-manifests-"))
+    return _download_dir
+
+
+def _partial_file(target: Path) -> Tuple[int, Path]:
+    """Create an exclusive partial file next to ``target``; return (fd, path).
+
+    ``mkstemp`` opens with ``O_CREAT | O_EXCL``, so no existing file or
+    symlink is followed, and concurrent writers of one target each get their
+    own file; the finished one is renamed over ``target``.
+    """
+    fd, partial = tempfile.mkstemp(
+        dir=target.parent, prefix=f".{target.name}.", suffix=".part"
+    )
+    return fd, Path(partial)
+
+
+def _copy_into_place(source: Path, target: Path) -> None:
+    """Copy ``source`` to ``target`` through a partial file and a rename.
+
+    ``shutil.copyfile`` copies in the kernel (``sendfile`` on Linux), so
+    the manifest never passes through a Python buffer.
+    """
+    fd, partial = _partial_file(target)
+    os.close(fd)
+    try:
+        shutil.copyfile(source, partial)
+        os.replace(partial, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(partial)
+        raise
+
+
+def _cache_key(url: str) -> str:
+    """Return a short stable hash of ``url``, used in cache and file names."""
+    return hashlib.blake2b(url.encode(), digest_size=6).hexdigest()
+
+
+def _keyed_filename(url: str) -> str:
+    """Return the remote file name of ``url`` with its hash before the suffix."""
+    # Safely extract filename from URL
+    try:
+        filename = urlparse(url).path.rsplit("/", 1)[-1]
+    except Exception:
+        filename = ""
+    if "." not in filename:
+        filename = "manifest.yaml"
+    filename_path = Path(filename)
+    return f"{filename_path.stem}_{_cache_key(url)}{filename_path.suffix}"
+
+
+# Specific known files for each directory based on actual repository
+# content, as paths relative to the repository root.
+_DIRECTORY_FILES: Dict[str, Tuple[str, ...]] = {
+    "deployments": (
+        "deployments/deployment-with-capacity-reservation.yaml",
+        "deployments/deployment-with-configmap-and-sidecar-container.yaml",
+        "deployments/deployment-with-configmap-as-envvar.yaml",
+        "deployments/deployment-with-configmap-as-volume.yaml",
+        "deployments/deployment-with-configmap-two-containers.yaml",
+        "deployments/deployment-with-immutable-configmap-as-volume.yaml",
+    ),
+    "service": (
+        "service/explore-graceful-termination-nginx.yaml",
+        "service/load-balancer-example.yaml",
+        "service/nginx-service.yaml",
+        "service/pod-with-graceful-termination.yaml",
+        "service/simple-service.yaml",
+    ),
+    # Note: configmap files are in different locations
+    "configmap": (
+        "configmap/configmaps.yaml",
+        "storage/gce-pd-tolerations.yaml",
+        "storage/gce-ssd-tolerations.yaml",
+    ),
+    # Try common ingress patterns
+    "ingress": (
+        "service/networking/nginx-ingress.yaml",
+        "service/networking/ingress-example.yaml",
+    ),
+}
+
+# Files tried in any other directory.
+_COMMON_FILES = ("deployment.yaml", "service.yaml", "configmap.yaml", "ingress.yaml")
+
+# GitHub REST API used to list a repository tree in one request.
+_GITHUB_API = "https://api.github.com"
+
+# Blob paths per (owner, repo, ref), reused for a short while so that
+# repeated directory fetches do not hit the API rate limit. Only listings
+# fetched without caller headers are kept.
+_TREE_CACHE_TTL = 60.0
+_tree_cache: Dict[Tuple[str, str, str], Tuple[float, List[str]]] = {}
+
+
+def _parse_github_tree_url(
+    base_url: str,
+) -> Optional[Tuple[str, str, List[Tuple[str, str]]]]:
+    """Split a GitHub repository URL into ``(owner, repo, candidates)``.
+
+    ``candidates`` are the possible ``(ref, subpath)`` splits of the path
+    after ``tree/``, shortest ref first, since a branch such as
+    ``release/1.0`` cannot be told apart from a directory by the URL alone.
+    Returns None for anything that is not a github.com repository URL.
+    """
+    parsed = urlparse(base_url)
+    if parsed.hostname not in ("github.com", "www.github.com"):
+        return None
+    parts = [p for p in parsed.path.split("/") if p]
+    if len(parts) < 2:
+        return None
+    owner, repo = parts[0], parts[1].removesuffix(".git")
+    if len(parts) >= 4 and parts[2] == "tree":
+        rest = parts[3:]
+        return (
+            owner,
+            repo,
+            [("/".join(rest[:i]), "/".join(rest[i:])) for i in range(1, len(rest) + 1)],
+        )
+    return owner, repo, [("main", "")]
+
+
+def _convert_mapcomposite(obj: Any) -> Any:
+    """Convert protobuf MapComposite objects to regular Python dicts/lists"""
+    # Arguments usually arrive as native values already
+    if type(obj) in _NATIVE_TYPES:
+        return obj
+    if hasattr(obj, "items") and callable(getattr(obj, "items")):
+        return dict(obj.items())
+    if hasattr(obj, "__iter__") and not isinstance(obj, (str, bytes)):
+        return list(obj)
+    return obj
+
+
+def _store_in_cache(source: Path, cache_path: Path, meta: Dict[str, Any]) -> None:
+    """Atomically replace the cached copy of a download and its validators.
+
+    Failing to write the cache never fails the download itself.
+    """
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        _copy_into_place(source, cache_path)
+        cache_path.with_name(f"{cache_path.name}.json").write_bytes(json_dumps(meta))
+    except OSError:
+        pass
 
 
 class FetchManifestFunction(BaseFunction):
     """Download remote manifests and expose them as local temporary files."""
 
+    # Shared HTTP session so keep-alive connections survive between calls.
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+
     def __init__(self) -> None:
         super().__init__(
             name="fetch_manifest",
@@ -54,17 +239,6 @@ class FetchManifestFunction(BaseFunction):
             Dict with status, downloaded files list, and details
         """
 
-        # Convert MapComposite objects to regular dicts/lists
-        def _convert_mapcomposite(obj):
-            """Convert protobuf MapComposite objects to regular Python dicts/lists"""
-            if obj is None:
-                return obj
-            elif hasattr(obj, "items") and callable(getattr(obj, "items")):
-                return dict(obj.items())
-            elif hasattr(obj, "__iter__") and not isinstance(obj, (str, dict, bytes)):
-                return list(obj)
-            return obj
-
         # Convert all parameters that might contain MapComposite objects
         urls = _convert_mapcomposite(urls)
         directories = _convert_mapcomposite(directories)
@@ -83,8 +257,12 @@ class FetchManifestFunction(BaseFunction):
         try:
             # If base_url provided, construct URLs for directories
             if base_url and directories:
-                urls = await self._construct_directory_urls(
-                    base_url, directories, file_patterns or ["*.yaml", "*.yml"]
+                urls = await self._list_directory_urls(
+                    base_url,
+                    directories,
+                    file_patterns or ["*.yaml", "*.yml"],
+                    headers or {},
+                    insecure_skip_tls_verify,
                 )
 
             if not urls:
@@ -117,7 +295,8 @@ class FetchManifestFunction(BaseFunction):
                         }
                     )
 
-            urls = valid_urls
+            # Overlapping directories can list the same file more than once
+            urls = list(dict.fromkeys(valid_urls))
             if not urls:
                 return {
                     "status": "error",
@@ -125,65 +304,45 @@ class FetchManifestFunction(BaseFunction):
                     "downloaded_files": downloaded_files,
                 }
 
-            # Download all files
-            downloaded_files = []
-            total_size = 0
+            # Make the destination directory once for all downloads
+            destination = self._prepare_destination(destination)
 
-            for download_url in urls:
-                try:
-                    payload = await asyncio.to_thread(
-                        self._download,
+            # Download all files concurrently over the pooled session; a
+            # failure on one URL does not stop the others
+            session = self._get_session()
+            results = await asyncio.gather(
+                *[
+                    self._download(
+                        session,
                         download_url,
-                        headers or {},
+                        destination,
                         insecure_skip_tls_verify,
+                        headers or {},
                     )
+                    for download_url in urls
+                ],
+                return_exceptions=True,
+            )
 
-                    # Safely resolve destination with extra error handling
-                    try:
-                        target_path = self._resolve_destination(
-                            destination, download_url
-                        )
-                    except Exception:
-                        # Fallback to a safe default path if resolution fails
-                        import time
-
-                        timestamp = int(time.time())
-                        safe_filename = f"manifest_{timestamp}.yaml"
-                        target_path = Path(destination or "/tmp") / safe_filename
-
-                    # Ensure parent directory exists
-                    try:
-                        target_path.parent.mkdir(parents=True, exist_ok=True)
-                    except Exception:
-                        # Fallback to /tmp if directory creation fails
-                        target_path = Path("/tmp") / target_path.name
-
-                    # Write the file
-                    try:
-                        target_path.write_bytes(payload)
-                    except Exception:
-                        # Try with a different filename if write fails
-                        import uuid
-
-                        fallback_name = f"fallback_{uuid.uuid4().hex[:8]}.yaml"
-                        target_path = Path("/tmp") / fallback_name
-                        target_path.write_bytes(payload)
-
+            downloaded_files = []
+            for download_url, result in zip(urls, results):
+                if isinstance(result, Exception):
+                    downloaded_files.append(
+                        {"url": download_url, "status": "error", "error": str(result)}
+                    )
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    size, target_path = result
                     downloaded_files.append(
                         {
                             "url": download_url,
                             "path": str(target_path),
-                            "size": len(payload),
+                            "size": size,
                             "filename": target_path.name,
                         }
                     )
-                    total_size += len(payload)
-
-                except Exception as e:
-                    # Continue with other files even if one fails
-                    downloaded_files.append(
-                        {"url": download_url, "status": "error", "error": str(e)}
-                    )
+            total_size = sum(f.get("size", 0) for f in downloaded_files)
 
             successful_downloads = [f for f in downloaded_files if "error" not in f]
             failed_downloads = [f for f in downloaded_files if "error" in f]
@@ -195,13 +354,148 @@ class FetchManifestFunction(BaseFunction):
                 "failed": len(failed_downloads),
                 "total_size": total_size,
                 "downloaded_files": downloaded_files,
-                "base_directory": str(Path(destination or "/tmp").resolve()),
+                "base_directory": str(Path(destination).resolve()),
             }
 
         except Exception as exc:
             return {"status": "error", "error": str(exc)}
 
-    async def _construct_directory_urls(
+    def _prepare_destination(self, destination: str) -> str:
+        """Create the directory downloads go to and return the destination.
+
+        A directory destination is returned with a trailing slash so that
+        resolving each file name needs no further ``stat``. Without a
+        destination, or if its directory cannot be created or written to,
+        the process's private download directory is used, so the downloads
+        themselves need no fallbacks.
+        """
+        fallback = f"{_private_download_dir()}/"
+        if not destination:
+            return fallback
+        candidate = Path(destination)
+        is_dir = destination.endswith(("/", "\\")) or candidate.is_dir()
+        directory = candidate if is_dir else candidate.parent
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except (OSError, ValueError):
+            return fallback
+        if not os.access(directory, os.W_OK):
+            return fallback
+        if is_dir and not destination.endswith(("/", "\\")):
+            return destination + "/"
+        return destination
+
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it for the running loop."""
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            cls._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=16, limit_per_host=8, keepalive_timeout=30
+                ),
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+            cls._session_loop = loop
+        return cls._session
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared HTTP session (call on shutdown)."""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+        cls._session_loop = None
+
+    async def _list_directory_urls(
+        self,
+        base_url: str,
+        directories: List[str],
+        file_patterns: List[str],
+        headers: Dict[str, str],
+        insecure_skip_tls_verify: bool,
+    ) -> List[str]:
+        """List raw URLs of the files under ``directories`` matching a pattern.
+
+        The repository tree is read with a single GitHub Trees API call so
+        only files that actually exist are downloaded. Falls back to the
+        static guesses of ``_construct_directory_urls`` when the URL is not
+        a GitHub repository, the API cannot be reached or the tree is too
+        large for GitHub to return in full.
+        """
+        repo = _parse_github_tree_url(base_url)
+        if repo is None:
+            return self._construct_directory_urls(base_url, directories, file_patterns)
+        owner, name, candidates = repo
+
+        paths = None
+        for ref, subpath in candidates:
+            try:
+                paths = await self._fetch_tree_paths(
+                    owner, name, ref, headers, insecure_skip_tls_verify
+                )
+            except aiohttp.ClientResponseError as e:
+                if e.status in (404, 422):
+                    # Not a ref; the next candidate moves a segment into it
+                    continue
+                break
+            except Exception:
+                break
+            break
+        if paths is None:
+            return self._construct_directory_urls(base_url, directories, file_patterns)
+
+        prefixes = tuple(
+            "/".join(p for p in (subpath, d.strip("/")) if p) + "/" for d in directories
+        )
+        raw_base = f"https://github.com/{owner}/{name}/raw/{ref}"
+        return [
+            f"{raw_base}/{path}"
+            for path in paths
+            if path.startswith(prefixes)
+            and any(fnmatch.fnmatchcase(path, pattern) for pattern in file_patterns)
+        ]
+
+    async def _fetch_tree_paths(
+        self,
+        owner: str,
+        repo: str,
+        ref: str,
+        headers: Dict[str, str],
+        insecure_skip_tls_verify: bool,
+    ) -> Optional[List[str]]:
+        """Return every blob path in ``owner/repo`` at ``ref``, cached briefly.
+
+        Returns None when GitHub truncated the listing. Requests with caller
+        headers (e.g. credentials for a private repository) bypass the cache.
+        """
+        key = (owner, repo, ref)
+        use_cache = not headers
+        cached = _tree_cache.get(key) if use_cache else None
+        if cached and time.monotonic() - cached[0] < _TREE_CACHE_TTL:
+            return cached[1]
+
+        url = f"{_GITHUB_API}/repos/{owner}/{repo}/git/trees/{ref}?recursive=1"
+        async with self._get_session().get(
+            url,
+            ssl=not insecure_skip_tls_verify,
+            headers={"Accept": "application/vnd.github+json", **headers},
+        ) as response:
+            response.raise_for_status()
+            tree = await response.json()
+        if tree.get("truncated"):
+            return None
+
+        paths = [
+            entry["path"]
+            for entry in tree.get("tree", [])
+            if entry.get("type") == "blob"
+        ]
+        if use_cache:
+            _tree_cache[key] = (time.monotonic(), paths)
+        return paths
+
+    def _construct_directory_urls(
         self, base_url: str, directories: List[str], file_patterns: List[str]
     ) -> List[str]:
         """Construct GitHub raw URLs for directory contents."""
@@ -213,61 +507,12 @@ class FetchManifestFunction(BaseFunction):
             raw_base = base_url.rstrip("/") + "/raw/main"
 
         urls = []
-
         for directory in directories:
-            # Specific known files for each directory based on actual repository content
-            if directory == "deployments":
-                deployment_files = [
-                    "deployment-with-capacity-reservation.yaml",
-                    "deployment-with-configmap-and-sidecar-container.yaml",
-                    "deployment-with-configmap-as-envvar.yaml",
-                    "deployment-with-configmap-as-volume.yaml",
-                    "deployment-with-configmap-two-containers.yaml",
-                    "deployment-with-immutable-configmap-as-volume.yaml",
-                ]
-                for file_path in deployment_files:
-                    urls.append(f"{raw_base}/{directory}/{file_path}")
-
-            elif directory == "service":
-                service_files = [
-                    "explore-graceful-termination-nginx.yaml",
-                    "load-balancer-example.yaml",
-                    "nginx-service.yaml",
-                    "pod-with-graceful-termination.yaml",
-                    "simple-service.yaml",
-                ]
-                for file_path in service_files:
-                    urls.append(f"{raw_base}/{directory}/{file_path}")
-
-            elif directory == "configmap":
-                # Note: configmap files are in different locations, need to find them
-                configmap_files = [
-                    "configmap/configmaps.yaml",
-                    "storage/gce-pd-tolerations.yaml",
-                    "storage/gce-ssd-tolerations.yaml",
-                ]
-                for file_path in configmap_files:
-                    urls.append(f"{raw_base}/{file_path}")
-
-            elif directory == "ingress":
-                # Try common ingress patterns
-                ingress_files = [
-                    "service/networking/nginx-ingress.yaml",
-                    "service/networking/ingress-example.yaml",
-                ]
-                for file_path in ingress_files:
-                    urls.append(f"{raw_base}/{file_path}")
-
-            else:
+            files = _DIRECTORY_FILES.get(directory)
+            if files is None:
                 # Generic fallback - try common patterns
-                common_files = [
-                    f"{directory}/deployment.yaml",
-                    f"{directory}/service.yaml",
-                    f"{directory}/configmap.yaml",
-                    f"{directory}/ingress.yaml",
-                ]
-                for file_path in common_files:
-                    urls.append(f"{raw_base}/{file_path}")
+                files = tuple(f"{directory}/{name}" for name in _COMMON_FILES)
+            urls.extend(f"{raw_base}/{file_path}" for file_path in files)
 
         return urls
 
@@ -279,66 +524,103 @@ class FetchManifestFunction(BaseFunction):
                 or destination.endswith("\\")
                 or candidate.is_dir()
             ):
-                # Safely extract filename from URL
-                try:
-                    parsed_url = urlparse(url)
-                    path_parts = parsed_url.path.split("/")
-                    filename = (
-                        path_parts[-1]
-                        if path_parts and path_parts[-1]
-                        else "manifest.yaml"
-                    )
-                    if not filename or "." not in filename:
-                        filename = "manifest.yaml"
-                except Exception:
-                    filename = "manifest.yaml"
-
-                # Add 4-char random suffix for uniqueness
-                random_suffix = "".join(
-                    random.choices(string.ascii_lowercase + string.digits, k=4)
-                )
-                filename_path = Path(filename)
-                stem = filename_path.stem
-                suffix = filename_path.suffix
-                unique_filename = f"{stem}_{random_suffix}{suffix}"
-                return candidate / unique_filename
+                # Suffix the remote name with the URL hash for uniqueness
+                return candidate / _keyed_filename(url)
             else:
                 # Return the exact path provided by the user
                 return candidate
 
-        # Safely extract filename from URL for default case
-        try:
-            parsed_url = urlparse(url)
-            path_parts = parsed_url.path.split("/")
-            remote_name = (
-                path_parts[-1] if path_parts and path_parts[-1] else "manifest.yaml"
-            )
-            if not remote_name or "." not in remote_name:
-                remote_name = "manifest.yaml"
-        except Exception:
-            remote_name = "manifest.yaml"
-
-        # Create a unique file in /tmp each time to avoid collisions
-        fd, temp_path = tempfile.mkstemp(
-            prefix=f"manifest_{remote_name}_", suffix="", dir="/tmp"
-        )
-        os.close(fd)  # Close the file descriptor
-        return Path(temp_path)
+        # Same name for the same URL, so repeated fetches overwrite rather
+        # than pile up
+        return _private_download_dir() / _keyed_filename(url)
 
-    def _download(
-        self, url: str, headers: Dict[str, str], insecure_skip_tls_verify: bool
-    ) -> bytes:
+    async def _download(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        destination: str,
+        insecure_skip_tls_verify: bool,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Path]:
+        """Stream ``url`` into its destination file.
+
+        The file is only created once the server answers successfully and is
+        written chunk by chunk, so memory stays flat however large the
+        manifest is. With the cache enabled and no caller headers, a fresh
+        cached copy is used instead of the network and a stale one is
+        revalidated. Returns the number of bytes written and the path used.
+        """
         parsed = urlparse(url)
         if parsed.scheme not in ("http", "https"):
             raise ValueError("Only http(s) URLs are supported")
 
-        request = urllib.request.Request(url, headers=headers)
-        context = None
-        if insecure_skip_tls_verify and parsed.scheme == "https":
-            context = ssl._create_unverified_context()
+        use_cache = _MANIFEST_CACHE_DIR is not None and not headers
+        age = None
+        if use_cache:
+            key = _cache_key(url)
+            cache_path = _MANIFEST_CACHE_DIR / key
+            validators = _MANIFEST_CACHE_DIR / f"{key}.json"
+            try:
+                cached = cache_path.stat()
+                age = time.time() - cached.st_mtime
+            except OSError:
+                pass
+        if age is not None and age < _MANIFEST_CACHE_TTL:
+            return await self._copy_from_cache(
+                cache_path, cached.st_size, destination, url
+            )
+
+        request_headers = dict(headers or {})
+        if age is not None:
+            try:
+                meta = json_loads(validators.read_bytes())
+            except (OSError, ValueError):
+                meta = {}
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        # ssl=False skips verification without building a context per request
+        verify = not (insecure_skip_tls_verify and parsed.scheme == "https")
+        async with session.get(url, ssl=verify, headers=request_headers) as response:
+            if response.status == 304 and age is not None:
+                os.utime(cache_path)
+                return await self._copy_from_cache(
+                    cache_path, cached.st_size, destination, url
+                )
+            response.raise_for_status()
+            target_path = self._resolve_destination(destination, url)
+            fd, partial = _partial_file(target_path)
+
+            size = 0
+            try:
+                async with aiofiles.open(fd, "wb") as f:
+                    async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                        await f.write(chunk)
+                        size += len(chunk)
+                os.replace(partial, target_path)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(partial)
+                raise
+            meta = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
 
-        with urllib.request.urlopen(request, context=context) as response:
-            return response.read()
+        if use_cache:
+            await asyncio.to_thread(_store_in_cache, target_path, cache_path, meta)
+        return size, target_path
+
+    async def _copy_from_cache(
+        self, cache_path: Path, size: int, destination: str, url: str
+    ) -> Tuple[int, Path]:
+        """Copy a cached manifest of ``size`` bytes to the destination for ``url``."""
+        target_path = self._resolve_destination(destination, url)
+        # Copied rather than hardlinked so edits to the file never reach the cache
+        await asyncio.to_thread(_copy_into_place, cache_path, target_path)
+        return size, target_path
 
     def get_schema(self) -> Dict[str, Any]:
         return {
@@ -0,0 +1,180 @@
+"""Bounded concurrency shared by the helm functions."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.shared.utils import env_int, resolve_executable
+
+# Upper bound on helm processes running at once, so batch callers overlap
+# helm's network waits without fanning out without limit.
+HELM_MAX_CONCURRENCY = env_int("HELM_MAX_CONCURRENCY", 10)
+_helm_sem: Optional[asyncio.Semaphore] = None
+_helm_sem_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Bytes read from a helm output pipe per call.
+_READ_SIZE = 64 * 1024
+
+# Completion criteria accepted by ``race``.
+RACE_MODES = ("all", "first_success", "first_failure")
+
+
+class HelmBatchMixin:
+    """Shared helm plumbing for the helm functions.
+
+    Provides ``_run_command`` on top of ``run_helm`` and ``execute_many``
+    for classes that define ``execute``.
+    """
+
+    execute: Callable[..., Awaitable[Dict[str, Any]]]
+
+    async def execute_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run ``execute`` for each set of arguments in ``items`` concurrently.
+
+        Results keep the order of ``items``; at most ``HELM_MAX_CONCURRENCY``
+        helm processes run at once.
+        """
+        return list(await asyncio.gather(*(self.execute(**item) for item in items)))
+
+    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
+        """Run a shell command asynchronously, terminating it if cancelled."""
+        try:
+            return await run_helm(cmd)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return {"returncode": 1, "stdout": "", "stderr": str(e)}
+
+
+def get_helm_semaphore() -> asyncio.Semaphore:
+    """Return the helm semaphore, creating it for the running loop."""
+    global _helm_sem, _helm_sem_loop
+    loop = asyncio.get_running_loop()
+    if _helm_sem is None or _helm_sem_loop is not loop:
+        _helm_sem = asyncio.Semaphore(HELM_MAX_CONCURRENCY)
+        _helm_sem_loop = loop
+    return _helm_sem
+
+
+async def _drain(reader: asyncio.StreamReader) -> bytes:
+    """Read ``reader`` to EOF in fixed-size chunks."""
+    chunks = []
+    while chunk := await reader.read(_READ_SIZE):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def run_helm(cmd: List[str]) -> Dict[str, Any]:
+    """Run a helm command under the shared limit, terminating it if cancelled.
+
+    stdout and stderr are drained concurrently while helm runs, so neither
+    pipe can fill up and stall it.
+    """
+    async with get_helm_semaphore():
+        process = await asyncio.create_subprocess_exec(
+            resolve_executable(cmd[0]),
+            *cmd[1:],
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            close_fds=False,
+        )
+        try:
+            stdout, stderr = await asyncio.gather(
+                _drain(process.stdout), _drain(process.stderr)
+            )
+            await process.wait()
+        except asyncio.CancelledError:
+            # Task was cancelled, terminate helm before re-raising
+            try:
+                process.terminate()
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=2.0)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+            except (ProcessLookupError, OSError):
+                pass
+            raise
+    return {
+        "returncode": process.returncode,
+        "stdout": stdout.decode(),
+        "stderr": stderr.decode(),
+    }
+
+
+def _succeeded(task: "asyncio.Task[Dict[str, Any]]") -> bool:
+    return task.exception() is None and task.result().get("status") == "success"
+
+
+async def race(
+    calls: List[Awaitable[Dict[str, Any]]], mode: str = "all"
+) -> List[Dict[str, Any]]:
+    """Await ``calls`` concurrently, stopping early according to ``mode``.
+
+    ``"all"`` waits for every call. ``"first_success"`` stops once one call
+    returns ``status == "success"`` and ``"first_failure"`` once one does
+    not. Calls still running at that point are cancelled, which terminates
+    their helm process, and are reported as ``{"status": "cancelled"}``.
+    Results keep the order of ``calls``.
+
+    Only for read-only commands: a helm process that changes a release must
+    not be terminated midway (see ``run_until``).
+    """
+    if mode not in RACE_MODES:
+        raise ValueError(f"mode must be one of {', '.join(RACE_MODES)}")
+
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    if mode == "all":
+        return list(await asyncio.gather(*tasks))
+
+    want_success = mode == "first_success"
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            if any(_succeeded(task) == want_success for task in done):
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    return [
+        {"status": "cancelled"} if task.cancelled() else task.result() for task in tasks
+    ]
+
+
+async def run_until(
+    calls: List[Callable[[], Awaitable[Dict[str, Any]]]], mode: str = "all"
+) -> List[Dict[str, Any]]:
+    """Run ``calls`` up to ``HELM_MAX_CONCURRENCY`` at a time until ``mode`` is met.
+
+    Like ``race``, but safe for commands that change releases: once ``mode``
+    is met no further call is started, while calls already running are left
+    to finish, since terminating e.g. ``helm install`` midway leaves the
+    release stuck in a pending state. Calls never started are reported as
+    ``{"status": "skipped"}``. Results keep the order of ``calls``.
+    """
+    if mode not in RACE_MODES:
+        raise ValueError(f"mode must be one of {', '.join(RACE_MODES)}")
+
+    results: List[Dict[str, Any]] = [{"status": "skipped"} for _ in calls]
+    queue = iter(enumerate(calls))
+    stopped = False
+
+    async def worker() -> None:
+        nonlocal stopped
+        for index, call in queue:
+            if stopped:
+                return
+            results[index] = result = await call()
+            if mode != "all" and (result.get("status") == "success") == (
+                mode == "first_success"
+            ):
+                stopped = True
+
+    await asyncio.gather(
+        *(worker() for _ in range(min(HELM_MAX_CONCURRENCY, len(calls))))
+    )
+    return results
@@ -1,31 +1,32 @@
 """Helm install function."""
 
-import asyncio
+import functools
 import time
-from dataclasses import dataclass, fields
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
 from src.shared.base_functions import BaseFunction
-
-
-@dataclass
-class HelmInstallParams:
-    """Dataclass for Helm install parameters."""
-
-    chart_name: str
-    release_name: str = ""
-    chart_version: str = ""
-    repository_url: str = ""
-    namespace: str = "default"
-    values_file: str = ""
-    set_values: Optional[List[str]] = None
-    create_namespace: bool = True
-    wait: bool = False
-    kubeconfig: str = ""
-    target_cluster: str = ""
-
-
-class HelmInstallFunction(BaseFunction):
+from src.shared.functions.helm._pool import HelmBatchMixin, run_until
+
+# Optional arguments in the order they are added to ``helm install``, with
+# how each becomes flags: "value" adds ``flag value``, "each" repeats ``flag``
+# per list item and "bool" adds the bare flag when true.
+_INSTALL_FLAGS = (
+    ("repository_url", "--repo", "value"),
+    ("chart_version", "--version", "value"),
+    ("namespace", "--namespace", "value"),
+    ("create_namespace", "--create-namespace", "bool"),
+    ("values_file", "-f", "value"),
+    ("set_values", "--set", "each"),
+    ("wait", "--wait", "bool"),
+    ("kubeconfig", "--kubeconfig", "value"),
+    ("target_cluster", "--kube-context", "value"),
+)
+
+# Values used when an argument is not passed at all.
+_INSTALL_DEFAULTS = {"namespace": "default", "create_namespace": True}
+
+
+class HelmInstallFunction(HelmBatchMixin, BaseFunction):
     """A function to install a Helm chart."""
 
     def __init__(self) -> None:
@@ -40,39 +41,24 @@ class HelmInstallFunction(BaseFunction):
         """
         start_time = time.perf_counter()
         try:
-            valid_kwargs = {
-                field.name: kwargs[field.name]
-                for field in fields(HelmInstallParams)
-                if field.name in kwargs
-            }
-            params = HelmInstallParams(**valid_kwargs)
-
-            cmd = ["helm", "install"]
-
-            release_name = params.release_name or f"{params.chart_name}-release"
-            cmd.append(release_name)
-
-            cmd.append(params.chart_name)
-
-            if params.repository_url:
-                cmd.extend(["--repo", params.repository_url])
-            if params.chart_version:
-                cmd.extend(["--version", params.chart_version])
-            if params.namespace:
-                cmd.extend(["--namespace", params.namespace])
-            if params.create_namespace:
-                cmd.append("--create-namespace")
-            if params.values_file:
-                cmd.extend(["-f", params.values_file])
-            if params.set_values:
-                for val in params.set_values:
-                    cmd.extend(["--set", val])
-            if params.wait:
-                cmd.append("--wait")
-            if params.kubeconfig:
-                cmd.extend(["--kubeconfig", params.kubeconfig])
-            if params.target_cluster:
-                cmd.extend(["--kube-context", params.target_cluster])
+            chart_name = kwargs.get("chart_name")
+            if not chart_name:
+                raise ValueError("chart_name is required")
+
+            release_name = kwargs.get("release_name") or f"{chart_name}-release"
+            cmd = ["helm", "install", release_name, chart_name]
+
+            for name, flag, kind in _INSTALL_FLAGS:
+                value = kwargs.get(name, _INSTALL_DEFAULTS.get(name))
+                if not value:
+                    continue
+                if kind == "bool":
+                    cmd.append(flag)
+                elif kind == "each":
+                    for item in value:
+                        cmd.extend((flag, item))
+                else:
+                    cmd.extend((flag, value))
 
             cmd_start_time = time.perf_counter()
             result = await self._run_command(cmd)
@@ -107,20 +93,19 @@ class HelmInstallFunction(BaseFunction):
                 "debug": {"total_tool_duration_seconds": f"{total_duration:.4f}"},
             }
 
-    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
-        """Run a shell command asynchronously."""
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            return {
-                "returncode": process.returncode,
-                "stdout": stdout.decode(),
-                "stderr": stderr.decode(),
-            }
-        except Exception as e:
-            return {"returncode": 1, "stdout": "", "stderr": str(e)}
+    async def execute_until(
+        self, items: List[Dict[str, Any]], mode: str = "all"
+    ) -> List[Dict[str, Any]]:
+        """Like ``execute_many``, but can stop at the first success or failure.
+
+        ``mode`` is ``"all"``, ``"first_success"`` or ``"first_failure"``
+        (stop a gated rollout). Installs already running when the batch stops
+        are left to finish; those not yet started are reported with
+        ``status == "skipped"``.
+        """
+        return await run_until(
+            [functools.partial(self.execute, **item) for item in items], mode
+        )
 
     def get_schema(self) -> Dict[str, Any]:
         """Return the JSON schema for the function."""
@@ -1,10 +1,52 @@
 """Helm list function."""
 
-import asyncio
+import base64
+import gzip
+import os
+import zlib
 from dataclasses import dataclass, fields
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from src.shared import k8s_client
 from src.shared.base_functions import BaseFunction
+from src.shared.functions.helm._pool import HelmBatchMixin, race
+from src.shared.json_utils import json_loads
+
+# HELM_DRIVER values that store releases in Secrets (helm's default).
+_SECRET_DRIVERS = ("", "secret", "secrets")
+
+# Release states `helm list` shows when no state filter is given.
+_LISTED_STATES = ("deployed", "failed")
+_LIST_COLUMNS = (
+    "NAME",
+    "NAMESPACE",
+    "REVISION",
+    "UPDATED",
+    "STATUS",
+    "CHART",
+    "APP VERSION",
+)
+
+
+def _decode_release(data: str) -> Dict[str, Any]:
+    """Decode the ``release`` field of a Helm release Secret.
+
+    The Secret holds base64(gzip(JSON)), base64-encoded once more by the API.
+    """
+    raw = base64.b64decode(base64.b64decode(data))
+    if raw[:3] == b"\x1f\x8b\x08":
+        raw = gzip.decompress(raw)
+    return json_loads(raw)
+
+
+def _format_table(rows: List[List[str]]) -> str:
+    """Lay out rows under ``_LIST_COLUMNS`` like helm's table output."""
+    table = [list(_LIST_COLUMNS), *rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(_LIST_COLUMNS))]
+    return "".join(
+        "\t".join(cell.ljust(width) for cell, width in zip(row, widths)) + "\n"
+        for row in table
+    )
 
 
 @dataclass
@@ -17,7 +59,7 @@ class HelmListParams:
     target_cluster: str = ""
 
 
-class HelmListFunction(BaseFunction):
+class HelmListFunction(HelmBatchMixin, BaseFunction):
     """A function to list Helm releases."""
 
     def __init__(self) -> None:
@@ -38,6 +80,11 @@ class HelmListFunction(BaseFunction):
             }
             params = HelmListParams(**valid_kwargs)
 
+            # Read release Secrets in-process when possible
+            output = await self._list_with_client(params)
+            if output is not None:
+                return {"status": "success", "output": output}
+
             cmd = ["helm", "list"]
 
             if params.namespace:
@@ -62,20 +109,85 @@ class HelmListFunction(BaseFunction):
         except Exception as e:
             return {"status": "error", "error": str(e)}
 
-    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
-        """Run a shell command asynchronously."""
+    async def _list_with_client(self, params: HelmListParams) -> Optional[str]:
+        """Build `helm list` output from the release Secrets via the API client.
+
+        Returns None, so helm is run instead, when no namespace scope is given
+        (helm would use the context's namespace), ``HELM_DRIVER`` stores
+        releases somewhere other than Secrets, no client is available, or the
+        Secrets cannot be listed or decoded.
+        """
+        if not (params.namespace or params.all_namespaces):
+            return None
+        if os.environ.get("HELM_DRIVER", "") not in _SECRET_DRIVERS:
+            return None
+        api = await k8s_client.get_api_client(params.target_cluster, params.kubeconfig)
+        if api is None:
+            return None
+
+        core = k8s_client.client.CoreV1Api(api)
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            if params.all_namespaces:
+                secrets = await core.list_secret_for_all_namespaces(
+                    label_selector="owner=helm"
+                )
+            else:
+                secrets = await core.list_namespaced_secret(
+                    params.namespace, label_selector="owner=helm"
+                )
+        except Exception:
+            return None
+
+        # Latest revision of each release, from the labels alone
+        latest: Dict[tuple, tuple] = {}
+        for secret in secrets.items:
+            labels = secret.metadata.labels or {}
+            try:
+                revision = int(labels.get("version", ""))
+            except ValueError:
+                continue
+            key = (labels.get("name", ""), secret.metadata.namespace)
+            if key not in latest or revision > latest[key][0]:
+                latest[key] = (revision, secret)
+
+        rows = []
+        for (name, namespace), (revision, secret) in sorted(latest.items()):
+            status = (secret.metadata.labels or {}).get("status", "")
+            if status not in _LISTED_STATES:
+                continue
+            try:
+                release = _decode_release(secret.data["release"])
+            except (KeyError, TypeError, ValueError, OSError, EOFError, zlib.error):
+                # Bad base64, gzip or JSON: let helm report the releases
+                return None
+            if not isinstance(release, dict):
+                return None
+            info = release.get("info") or {}
+            chart = (release.get("chart") or {}).get("metadata") or {}
+            rows.append(
+                [
+                    name,
+                    namespace,
+                    str(revision),
+                    info.get("last_deployed", ""),
+                    status,
+                    f"{chart.get('name', '')}-{chart.get('version', '')}",
+                    chart.get("appVersion", ""),
+                ]
             )
-            stdout, stderr = await process.communicate()
-            return {
-                "returncode": process.returncode,
-                "stdout": stdout.decode(),
-                "stderr": stderr.decode(),
-            }
-        except Exception as e:
-            return {"returncode": 1, "stdout": "", "stderr": str(e)}
+        return _format_table(rows)
+
+    async def execute_race(
+        self, items: List[Dict[str, Any]], mode: str = "all"
+    ) -> List[Dict[str, Any]]:
+        """Like ``execute_many``, but can stop at the first success or failure.
+
+        ``mode`` is ``"all"``, ``"first_success"`` (e.g. probe which context
+        works) or ``"first_failure"`` (e.g. check every context answers). Calls still
+        running when the batch stops are cancelled and reported with
+        ``status == "cancelled"``.
+        """
+        return await race([self.execute(**item) for item in items], mode)
 
     def get_schema(self) -> Dict[str, Any]:
         """Return the JSON schema for the function."""
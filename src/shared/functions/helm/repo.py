@@ -1,12 +1,51 @@
 """Helm repository management functions."""
 
-import asyncio
-from typing import Any, Dict, List
+import os
+import sys
+from typing import Any, Dict, Optional, Tuple
 
 from src.shared.base_functions import BaseFunction
+from src.shared.functions.helm._pool import HelmBatchMixin
 
+# Last successful `helm repo list` output, keyed by the repositories file's
+# path and mtime plus a counter bumped by every add/update from this process.
+_repo_list_cache: Optional[Tuple[Tuple[str, int, int], str]] = None
+_repo_version = 0
 
-class HelmRepoFunction(BaseFunction):
+
+def _repository_config_path() -> str:
+    """Return the repositories.yaml helm reads, resolved the way helm does.
+
+    ``HELM_REPOSITORY_CONFIG`` wins, then ``$HELM_CONFIG_HOME``, then
+    ``$XDG_CONFIG_HOME/helm``, then the platform's config directory.
+    """
+    path = os.environ.get("HELM_REPOSITORY_CONFIG")
+    if path:
+        return path
+    config_home = os.environ.get("HELM_CONFIG_HOME")
+    if not config_home:
+        base = os.environ.get("XDG_CONFIG_HOME")
+        if not base:
+            if sys.platform == "darwin":
+                base = os.path.expanduser("~/Library/Preferences")
+            elif sys.platform == "win32":
+                base = os.environ.get("APPDATA", "")
+            else:
+                base = os.path.expanduser("~/.config")
+        config_home = os.path.join(base, "helm")
+    return os.path.join(config_home, "repositories.yaml")
+
+
+def _repo_list_key() -> Optional[Tuple[str, int, int]]:
+    """Return the cache key for the current repositories file, or None."""
+    path = _repository_config_path()
+    try:
+        return (path, os.stat(path).st_mtime_ns, _repo_version)
+    except OSError:
+        return None
+
+
+class HelmRepoFunction(HelmBatchMixin, BaseFunction):
     """A collection of Helm repository management functions."""
 
     def __init__(self) -> None:
@@ -43,9 +82,21 @@ class HelmRepoFunction(BaseFunction):
         else:
             return {"status": "error", "error": f"Unsupported operation: {operation}"}
 
+        global _repo_list_cache, _repo_version
+        key = None
+        if operation == "list":
+            key = _repo_list_key()
+            if key is not None and _repo_list_cache and _repo_list_cache[0] == key:
+                return {"status": "success", "output": _repo_list_cache[1]}
+
         result = await self._run_command(cmd)
 
+        if operation != "list":
+            # add/update may rewrite the file within the mtime granularity
+            _repo_version += 1
         if result["returncode"] == 0:
+            if key is not None:
+                _repo_list_cache = (key, result["stdout"])
             return {"status": "success", "output": result["stdout"]}
         else:
             return {
@@ -53,21 +104,6 @@ class HelmRepoFunction(BaseFunction):
                 "error": result["stderr"] or result["stdout"],
             }
 
-    async def _run_command(self, cmd: List[str]) -> Dict[str, Any]:
-        """Run a shell command asynchronously."""
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            return {
-                "returncode": process.returncode,
-                "stdout": stdout.decode(),
-                "stderr": stderr.decode(),
-            }
-        except Exception as e:
-            return {"returncode": 1, "stdout": "", "stderr": str(e)}
-
     def get_schema(self) -> Dict[str, Any]:
         """Return the JSON schema for the function."""
         return {
@@ -5,9 +5,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-import yaml
-
 from src.shared.base_functions import BaseFunction
+from src.shared.kubeconfig_cache import load_kubeconfig
 
 # --------------------------------------------------------------------------- #
 # Dataclasses
@@ -76,24 +75,30 @@ class KubeconfigFunction(BaseFunction):
 
         try:
             # Load kubeconfig
-            with open(kubeconfig_path, "r") as f:
-                kubeconfig = yaml.safe_load(f)
+            kubeconfig = load_kubeconfig(kubeconfig_path)
 
             result = {
                 "kubeconfig_path": kubeconfig_path,
                 "current_context": kubeconfig.get("current-context", "Not set"),
             }
 
-            # Get contexts
+            # Get contexts; one pass also indexes them by name and, when
+            # asked for, builds their details
             contexts = kubeconfig.get("contexts", [])
-            result["contexts"] = [ctx["name"] for ctx in contexts]
+            names = []
+            by_name: Dict[str, Dict] = {}
+            context_details = [] if detail_level == "contexts" else None
+            for ctx in contexts:
+                names.append(ctx["name"])
+                by_name.setdefault(ctx["name"], ctx)
+                if context_details is not None:
+                    context_details.append(self._get_context_details(kubeconfig, ctx))
+            result["contexts"] = names
             result["total_contexts"] = len(contexts)
 
             # If specific context requested
             if context:
-                context_data = next(
-                    (ctx for ctx in contexts if ctx["name"] == context), None
-                )
+                context_data = by_name.get(context)
                 if context_data:
                     result["selected_context"] = self._get_context_details(
                         kubeconfig, context_data
@@ -105,10 +110,8 @@ class KubeconfigFunction(BaseFunction):
             if detail_level == "full":
                 result["clusters"] = self._get_clusters(kubeconfig)
                 result["users"] = self._get_users(kubeconfig)
-            elif detail_level == "contexts":
-                result["context_details"] = [
-                    self._get_context_details(kubeconfig, ctx) for ctx in contexts
-                ]
+            elif context_details is not None:
+                result["context_details"] = context_details
 
             out = KubeconfigOutput(status="success", details=result)
             return {"status": out.status, **out.details}
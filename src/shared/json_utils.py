@@ -0,0 +1,27 @@
+"""JSON helpers that use orjson when it is installed."""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None  # type: ignore[assignment]
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes.
+
+    Raises ``json.JSONDecodeError`` on invalid input (orjson's error type
+    subclasses it).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serialize ``obj`` to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
@@ -0,0 +1,115 @@
+"""In-process Kubernetes API access when kubernetes_asyncio is installed."""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+try:
+    from kubernetes_asyncio import client, config
+except ImportError:  # pragma: no cover - exercised only without the client
+    client = None  # type: ignore[assignment]
+    config = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Namespaced resource types with typed API calls: (API class, method suffix),
+# e.g. ``read_`` + suffix or ``patch_`` + suffix.
+TYPED_RESOURCES = {
+    "deployment": ("AppsV1Api", "namespaced_deployment"),
+    "statefulset": ("AppsV1Api", "namespaced_stateful_set"),
+    "daemonset": ("AppsV1Api", "namespaced_daemon_set"),
+    "replicaset": ("AppsV1Api", "namespaced_replica_set"),
+    "service": ("CoreV1Api", "namespaced_service"),
+    "configmap": ("CoreV1Api", "namespaced_config_map"),
+    "secret": ("CoreV1Api", "namespaced_secret"),
+    "pod": ("CoreV1Api", "namespaced_pod"),
+}
+
+# kubectl short names for the types above.
+_SHORT_NAMES = {
+    "deploy": "deployment",
+    "sts": "statefulset",
+    "ds": "daemonset",
+    "rs": "replicaset",
+    "svc": "service",
+    "cm": "configmap",
+    "po": "pod",
+}
+
+
+# API group served by each typed API class.
+_API_GROUPS = {"AppsV1Api": "apps", "CoreV1Api": "core"}
+
+
+def typed_kind(resource_type: str) -> Optional[str]:
+    """Return the ``TYPED_RESOURCES`` key for a kubectl resource type, or None.
+
+    Accepts short names (``deploy``), plurals and group suffixes
+    (``deployments.apps``, ``deployments.v1.apps``, ``pods.core``). A suffix
+    naming another group (``services.serving.knative.dev``) returns None, so
+    the type is left to kubectl.
+    """
+    name, _, group = resource_type.lower().partition(".")
+    name = _SHORT_NAMES.get(name, name)
+    if name not in TYPED_RESOURCES and name.endswith("s"):
+        name = name[:-1]
+    if name not in TYPED_RESOURCES:
+        return None
+    # <resource>.<version>.<group>; the core group has no name of its own
+    if group.startswith("v1."):
+        group = group[3:]
+    elif group == "v1":
+        group = "core"
+    return name if group in ("", _API_GROUPS[TYPED_RESOURCES[name][0]]) else None
+
+
+# (event loop, API client) keyed by (kubeconfig, context); a client's HTTP
+# session belongs to the loop it was created on.
+_api_clients: Dict[Tuple[str, str], Tuple[asyncio.AbstractEventLoop, Any]] = {}
+
+
+async def get_api_client(context: str, kubeconfig: str = "") -> Optional[Any]:
+    """Return a cached ``ApiClient`` for the context.
+
+    Returns None when kubernetes_asyncio is not installed or no usable
+    kubeconfig/context is found (``ConfigException``), so callers can fall
+    back to kubectl. Other errors, e.g. a malformed kubeconfig or a failing
+    auth plugin, are raised.
+    """
+    if client is None:
+        return None
+    loop = asyncio.get_running_loop()
+    key = (kubeconfig, context)
+    cached = _api_clients.get(key)
+    if cached is not None:
+        if cached[0] is loop:
+            return cached[1]
+        # Created on an earlier loop; release its HTTP session before replacing
+        del _api_clients[key]
+        await _close_quietly(cached[1])
+    try:
+        api = await config.new_client_from_config(
+            config_file=kubeconfig or None, context=context or None
+        )
+    except config.ConfigException:
+        return None
+    _api_clients[key] = (loop, api)
+    return api
+
+
+async def aclose() -> None:
+    """Close every cached API client (call on shutdown)."""
+    cached = list(_api_clients.values())
+    _api_clients.clear()
+    for _, api in cached:
+        await _close_quietly(api)
+
+
+async def _close_quietly(api: Any) -> None:
+    """Close ``api``; a session whose loop has already gone away is dropped."""
+    try:
+        await api.close()
+    except (RuntimeError, aiohttp.ClientError) as e:
+        logger.debug("Ignoring error closing Kubernetes API client: %s", e)
@@ -0,0 +1,38 @@
+"""Parsed kubeconfig files shared by every function that reads them."""
+
+import os
+from typing import Any, Dict, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader  # type: ignore[assignment]
+
+# Parsed kubeconfig files keyed by (path, mtime_ns); an edited file gets a new
+# key. Oldest entries are dropped beyond _KCFG_CACHE_SIZE.
+_KCFG_CACHE_SIZE = 8
+_KCFG_CACHE: Dict[Tuple[str, int], Any] = {}
+
+
+def load_kubeconfig(path: str) -> Any:
+    """Parse the kubeconfig at ``path``, reusing the result until it changes.
+
+    The parsed document is shared between callers and must not be modified.
+    Raises ``OSError`` or ``yaml.YAMLError`` when the file cannot be read.
+    """
+    key = (path, os.stat(path).st_mtime_ns)
+    try:
+        return _KCFG_CACHE[key]
+    except KeyError:
+        pass
+    with open(path, "rb") as f:
+        kubeconfig = yaml.load(f.read(), Loader=_SafeLoader)
+    # Drop stale entries for this path, then the oldest if still over the bound
+    for stale in [k for k in _KCFG_CACHE if k[0] == path]:
+        del _KCFG_CACHE[stale]
+    if len(_KCFG_CACHE) >= _KCFG_CACHE_SIZE:
+        del _KCFG_CACHE[next(iter(_KCFG_CACHE))]
+    _KCFG_CACHE[key] = kubeconfig
+    return kubeconfig
@@ -1,11 +1,47 @@
 """Utility functions for subprocess management and cancellation."""
 
 import asyncio
+import functools
+import os
+import shutil
 from typing import Any, Dict, List, Optional
 
 
+def env_int(name: str, default: int) -> int:
+    """Return the positive integer set in environment variable ``name``.
+
+    Unset, malformed or non-positive values give ``default``, so a bad
+    setting cannot stop the server from starting.
+    """
+    try:
+        value = int(os.environ.get(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+# Upper bound on kubectl processes a function runs at once, shared by every
+# function that fans kubectl out across clusters, namespaces or nodes.
+KUBECTL_CONCURRENCY = env_int("A2A_KUBECTL_CONCURRENCY", 16)
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_executable(name: str) -> str:
+    """Return the absolute path of ``name`` on PATH, or ``name`` if not found.
+
+    Spawning by absolute path lets Python use ``posix_spawn`` instead of
+    walking PATH in the child on every call.
+    """
+    return shutil.which(name) or name
+
+
 async def run_subprocess_with_cancellation(
-    cmd: List[str], stdin_data: Optional[bytes] = None
+    cmd: List[str],
+    stdin_data: Optional[bytes] = None,
+    env: Optional[Dict[str, str]] = None,
+    close_fds: bool = True,
+    decode_stdout: bool = True,
+    detach_stdin: bool = False,
 ) -> Dict[str, Any]:
     """
     Run a subprocess with proper cancellation support.
@@ -15,6 +51,15 @@ async def run_subprocess_with_cancellation(
     Args:
         cmd: Command to execute as a list of strings
         stdin_data: Optional data to send to stdin
+        env: Optional environment for the child (defaults to the current one)
+        close_fds: Pass False to skip closing inherited descriptors in the
+            child. Python's own descriptors are non-inheritable, so this is
+            safe for short-lived tools and enables the faster spawn path.
+        decode_stdout: Pass False to get stdout as raw bytes, e.g. to hand
+            JSON output straight to a bytes-aware parser.
+        detach_stdin: Without ``stdin_data``, give the child ``/dev/null``
+            instead of this process's stdin, which under the MCP stdio
+            server carries the protocol stream.
 
     Returns:
         Dictionary with returncode, stdout, and stderr
@@ -22,18 +67,29 @@ async def run_subprocess_with_cancellation(
     Raises:
         asyncio.CancelledError: If the task is cancelled
     """
+    stdin = None
+    if stdin_data:
+        stdin = asyncio.subprocess.PIPE
+    elif detach_stdin:
+        stdin = asyncio.subprocess.DEVNULL
     process = await asyncio.create_subprocess_exec(
         *cmd,
-        stdin=asyncio.subprocess.PIPE if stdin_data else None,
+        stdin=stdin,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
+        env=env,
+        close_fds=close_fds,
     )
 
     try:
         stdout, stderr = await process.communicate(input=stdin_data)
+        if decode_stdout:
+            stdout = stdout.decode() if stdout else ""
+        elif not stdout:
+            stdout = b""
         return {
             "returncode": process.returncode,
-            "stdout": stdout.decode() if stdout else "",
+            "stdout": stdout,
             "stderr": stderr.decode() if stderr else "",
         }
     except asyncio.CancelledError:
@@ -54,15 +110,30 @@ async def run_subprocess_with_cancellation(
         raise
 
 
-async def run_shell_command_with_cancellation(cmd: List[str]) -> Dict[str, Any]:
+async def run_shell_command_with_cancellation(
+    cmd: List[str],
+    input_data: Optional[bytes] = None,
+    decode_stdout: bool = True,
+) -> Dict[str, Any]:
     """
     Run a shell command with proper cancellation support.
     This is a convenience wrapper for run_subprocess_with_cancellation.
 
+    The commands run through here (kubectl, helm, ...) are short-lived CLI
+    tools, so they are spawned by absolute path without closing inherited
+    descriptors, which lets Python use the faster posix_spawn path.
+
     Args:
         cmd: Command to execute as a list of strings
+        input_data: Optional data to send to stdin
+        decode_stdout: Pass False to get stdout as raw bytes
 
     Returns:
         Dictionary with returncode, stdout, and stderr
     """
-    return await run_subprocess_with_cancellation(cmd)
+    return await run_subprocess_with_cancellation(
+        [resolve_executable(cmd[0]), *cmd[1:]],
+        stdin_data=input_data,
+        close_fds=False,
+        decode_stdout=decode_stdout,
+    )
@@ -0,0 +1,79 @@
+"""Shared fixtures for the test suite."""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+import pytest
+import yaml
+from aiohttp import web
+
+
+class FakeApiServer:
+    """Canned Kubernetes API responses served over plain HTTP.
+
+    ``routes`` maps ``(method, path)`` to ``(status, body)``; unknown routes
+    answer 404. Every request is recorded in ``requests`` as
+    ``(method, path_qs, json_body)``.
+    """
+
+    def __init__(self, kubeconfig: str) -> None:
+        self.kubeconfig = kubeconfig
+        self.routes: Dict[Tuple[str, str], Tuple[int, Any]] = {}
+        self.requests: List[Tuple[str, str, Any]] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        raw = await request.read()
+        self.requests.append(
+            (request.method, request.path_qs, json.loads(raw) if raw else None)
+        )
+        status, body = self.routes.get(
+            (request.method, request.path),
+            (404, {"kind": "Status", "reason": "NotFound", "code": 404}),
+        )
+        return web.json_response(body, status=status)
+
+
+@pytest.fixture
+async def fake_apiserver(tmp_path):
+    """Run a ``FakeApiServer`` with a kubeconfig whose context ``fake`` uses it.
+
+    Requires kubernetes_asyncio; API clients created during the test are
+    closed afterwards.
+    """
+    pytest.importorskip("kubernetes_asyncio")
+    from src.shared import k8s_client
+
+    kubeconfig = tmp_path / "kubeconfig"
+    server = FakeApiServer(str(kubeconfig))
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    kubeconfig.write_text(
+        yaml.safe_dump(
+            {
+                "apiVersion": "v1",
+                "kind": "Config",
+                "clusters": [
+                    {
+                        "name": "fake",
+                        "cluster": {"server": f"http://127.0.0.1:{port}"},
+                    }
+                ],
+                "users": [{"name": "fake", "user": {"token": "t"}}],
+                "contexts": [
+                    {"name": "fake", "context": {"cluster": "fake", "user": "fake"}}
+                ],
+                "current-context": "fake",
+            }
+        )
+    )
+    k8s_client._api_clients.clear()
+    try:
+        yield server
+    finally:
+        await k8s_client.aclose()
+        await runner.cleanup()
@@ -0,0 +1,360 @@
+"""Tests for binding policy management function."""
+
+import json
+import os
+import stat
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.shared.functions.binding_policy_management import (
+    BindingPolicyManagement,
+    _normalize_selectors,
+    _parse_dict_arg,
+    _parse_list_arg,
+)
+
+
+def _config_view(user: dict) -> dict:
+    return {
+        "returncode": 0,
+        "stdout": json.dumps({"users": [{"name": "u", "user": user}]}),
+        "stderr": "",
+    }
+
+
+class TestBindingPolicyManagement:
+    """Test cases for binding policy management function."""
+
+    @pytest.fixture
+    def bp_function(self):
+        """Create binding policy management function instance."""
+        return BindingPolicyManagement()
+
+    @pytest.mark.asyncio
+    async def test_credentials_without_exec_plugin(self, bp_function):
+        """Contexts without an exec plugin get no token and are not re-probed."""
+        with patch.object(bp_function, "_run", new_callable=AsyncMock) as mock_run:
+            mock_run.return_value = _config_view({"token": "static"})
+
+            assert await bp_function._credential_kubeconfig("wds1", "") is None
+            assert await bp_function._credential_kubeconfig("wds1", "") is None
+            assert mock_run.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_lookup_is_backed_off(self, bp_function):
+        """A failing config view is not retried on every call."""
+        with patch.object(bp_function, "_run", new_callable=AsyncMock) as mock_run:
+            mock_run.return_value = {"returncode": 1, "stdout": "", "stderr": "x"}
+
+            assert await bp_function._credential_kubeconfig("wds1", "") is None
+            assert await bp_function._credential_kubeconfig("wds1", "") is None
+            assert mock_run.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_exec_token_is_cached_outside_argv(self, bp_function, tmp_path):
+        """The plugin runs once; its token reaches kubectl through a private
+        kubeconfig, never the command line, and is dropped when rejected.
+        """
+        exec_user = {"exec": {"command": "get-token", "args": ["--cluster", "x"]}}
+        credential = {
+            "returncode": 0,
+            "stdout": json.dumps(
+                {
+                    "kind": "ExecCredential",
+                    "status": {
+                        "token": "abc",
+                        "expirationTimestamp": "2999-01-01T00:00:00Z",
+                    },
+                }
+            ),
+            "stderr": "",
+        }
+        with (
+            patch.object(bp_function, "_run", new_callable=AsyncMock) as mock_run,
+            patch(
+                "src.shared.functions.binding_policy_management."
+                "run_subprocess_with_cancellation",
+                new_callable=AsyncMock,
+            ) as mock_plugin,
+        ):
+            unauthorized = {"returncode": 1, "stdout": "", "stderr": "(Unauthorized)"}
+            mock_run.side_effect = [
+                _config_view(exec_user),
+                {"returncode": 0, "stdout": "ok", "stderr": ""},
+                unauthorized,
+                _config_view(exec_user),
+                {"returncode": 0, "stdout": "ok", "stderr": ""},
+            ]
+            mock_plugin.return_value = credential
+            bp_function._token_dir = str(tmp_path)
+
+            await bp_function._run_kubectl("wds1", "", ["get", "x"])
+            await bp_function._run_kubectl("wds1", "", ["get", "x"])
+            assert mock_plugin.call_count == 1
+            assert mock_plugin.call_args[0][0] == ["get-token", "--cluster", "x"]
+            assert mock_plugin.call_args.kwargs["detach_stdin"] is True
+            exec_info = json.loads(
+                mock_plugin.call_args.kwargs["env"]["KUBERNETES_EXEC_INFO"]
+            )
+            assert exec_info == {
+                "apiVersion": "client.authentication.k8s.io/v1beta1",
+                "kind": "ExecCredential",
+                "spec": {"interactive": False},
+            }
+
+            cmd = mock_run.call_args_list[1].args[0]
+            assert "abc" not in cmd and "--token" not in cmd
+            path = cmd[cmd.index("--kubeconfig") + 1]
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+            users = json.loads(open(path).read())["users"]
+            assert users == [{"name": "u", "user": {"token": "abc"}}]
+
+            # The rejected token is fetched again on the next call
+            await bp_function._run_kubectl("wds1", "", ["get", "x"])
+            assert mock_plugin.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_refreshes_expired_token(self, bp_function):
+        """Tokens close to expiry are fetched again."""
+        exec_user = {"exec": {"command": "get-token"}}
+        credential = {
+            "returncode": 0,
+            "stdout": json.dumps(
+                {
+                    "status": {
+                        "token": "old",
+                        "expirationTimestamp": "2000-01-01T00:00:00Z",
+                    }
+                }
+            ),
+            "stderr": "",
+        }
+        with (
+            patch.object(bp_function, "_run", new_callable=AsyncMock) as mock_run,
+            patch(
+                "src.shared.functions.binding_policy_management."
+                "run_subprocess_with_cancellation",
+                new_callable=AsyncMock,
+            ) as mock_plugin,
+        ):
+            mock_run.return_value = _config_view(exec_user)
+            mock_plugin.return_value = credential
+
+            await bp_function._credential_kubeconfig("wds1", "")
+            await bp_function._credential_kubeconfig("wds1", "")
+            assert mock_plugin.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_relative_plugin_path_is_resolved_against_kubeconfig(
+        self, bp_function, tmp_path
+    ):
+        """Like kubectl, ``./bin/plugin`` is relative to the kubeconfig file."""
+        kubeconfig = str(tmp_path / "config")
+        exec_user = {
+            "exec": {
+                "apiVersion": "client.authentication.k8s.io/v1",
+                "command": "./bin/get-token",
+            }
+        }
+        with (
+            patch.object(bp_function, "_run", new_callable=AsyncMock) as mock_run,
+            patch(
+                "src.shared.functions.binding_policy_management."
+                "run_subprocess_with_cancellation",
+                new_callable=AsyncMock,
+            ) as mock_plugin,
+        ):
+            mock_run.return_value = _config_view(exec_user)
+            mock_plugin.return_value = {"returncode": 1, "stdout": "", "stderr": ""}
+
+            await bp_function._credential_kubeconfig("wds1", kubeconfig)
+
+        assert mock_plugin.call_args[0][0] == [str(tmp_path / "bin" / "get-token")]
+        exec_info = json.loads(
+            mock_plugin.call_args.kwargs["env"]["KUBERNETES_EXEC_INFO"]
+        )
+        assert exec_info["apiVersion"] == "client.authentication.k8s.io/v1"
+
+    @pytest.mark.asyncio
+    async def test_aclose_removes_token_files(self, bp_function):
+        """Token kubeconfigs do not outlive the server."""
+        path = bp_function._write_token_kubeconfig(
+            ("wds1", ""), {"users": [{"name": "u", "user": {}}]}, "secret"
+        )
+        assert os.path.exists(path)
+
+        await BindingPolicyManagement.aclose()
+
+        assert not os.path.exists(os.path.dirname(path))
+        assert BindingPolicyManagement._token_dirs == []
+
+    def test_make_result_flattens_selectors_and_downsync(self, bp_function):
+        """List results summarise clusters and workloads."""
+        item = {
+            "metadata": {"name": "bp", "generation": 1},
+            "status": {"observedGeneration": 1},
+            "spec": {
+                "clusterSelectors": [
+                    {"matchLabels": {"kubernetes.io/cluster-name": "cluster1"}},
+                    {"matchLabels": {"location-group": "edge"}},
+                ],
+                "downsync": [
+                    {"apiGroup": "apps", "resources": ["Deployments"]},
+                    {"resources": ["services"], "namespaces": ["a", "b"]},
+                ],
+            },
+        }
+
+        result = bp_function._make_result(item)
+
+        assert result.status == "active"
+        assert result.clusters == ["cluster1", "location-group:edge"]
+        assert result.workloads == [
+            "apps/deployments",
+            "core/services (ns:a)",
+            "core/services (ns:b)",
+        ]
+
+    def test_convert_to_native(self, bp_function):
+        """Composite and tuple values become plain dicts and lists."""
+
+        class MapComposite(dict):
+            pass
+
+        class RepeatedComposite(list):
+            pass
+
+        obj = MapComposite(
+            a=RepeatedComposite([MapComposite(b=1)]), c=("x", "y"), d=None
+        )
+
+        result = bp_function._convert_to_native(obj)
+
+        assert result == {"a": [{"b": 1}], "c": ["x", "y"], "d": None}
+        assert type(result) is dict
+        assert type(result["a"]) is list
+        assert type(result["a"][0]) is dict
+
+    @pytest.mark.asyncio
+    async def test_list_is_cached_until_mutation(self, bp_function):
+        """Repeated list calls reuse one kubectl call until an apply succeeds."""
+        listing = {
+            "returncode": 0,
+            "stdout": json.dumps({"items": []}),
+            "stderr": "",
+        }
+        with (
+            patch.object(
+                bp_function, "_credential_kubeconfig", new_callable=AsyncMock
+            ) as auth,
+            patch.object(bp_function, "_run", new_callable=AsyncMock) as mock_run,
+        ):
+            auth.return_value = None
+            mock_run.return_value = listing
+
+            first = await bp_function.execute(operation="list")
+            second = await bp_function.execute(operation="list")
+            assert first["status"] == "success"
+            assert second == first
+            assert mock_run.call_count == 1
+
+            await bp_function.execute(operation="create", policy_yaml="kind: X")
+            await bp_function.execute(operation="list")
+            assert mock_run.call_count == 3
+
+    def test_quick_manifest_fixes_operators(self, bp_function):
+        """Operator aliases in selectors are mapped to Kubernetes operators."""
+        manifest, err = bp_function._build_quick_manifest(
+            "bp",
+            {},
+            ["apps/deployments", "core/services"],
+            ["default"],
+            [],
+            cluster_selectors=[
+                {"matchExpressions": [{"key": "env", "operator": "equals"}]}
+            ],
+            object_selectors=[
+                {"matchExpressions": [{"key": "app", "operator": "!exists"}]}
+            ],
+        )
+
+        assert err is None
+        doc = json.loads(manifest)
+        spec = doc["spec"]
+        assert spec["clusterSelectors"][0]["matchExpressions"][0]["operator"] == "In"
+        for rule in spec["downsync"]:
+            expr = rule["objectSelectors"][0]["matchExpressions"][0]
+            assert expr["operator"] == "DoesNotExist"
+
+    def test_normalize_selectors_leaves_caller_arguments_alone(self):
+        """Fixed operators come back in new containers; unchanged ones are shared."""
+        fixed = {"matchExpressions": [{"key": "env", "operator": "equals"}]}
+        valid = {"matchLabels": {"env": "prod"}}
+        selectors = [fixed, valid]
+
+        result = _normalize_selectors(selectors)
+
+        assert fixed == {"matchExpressions": [{"key": "env", "operator": "equals"}]}
+        assert result[0]["matchExpressions"][0]["operator"] == "In"
+        assert result is not selectors and result[1] is valid
+        unchanged = [valid]
+        assert _normalize_selectors(unchanged) is unchanged
+
+    def test_parse_string_arguments(self):
+        """String arguments accept JSON or the shorthand forms."""
+        assert _parse_dict_arg('{"env": "prod"}') == {"env": "prod"}
+        assert _parse_dict_arg("env = prod") == {"env": "prod"}
+        assert _parse_dict_arg("") == {}
+        assert _parse_dict_arg(None) is None
+        assert _parse_list_arg('["apps/deployments"]') == ["apps/deployments"]
+        assert _parse_list_arg("a, b,,c") == ["a", "b", "c"]
+        assert _parse_list_arg(("a", "b")) == ["a", "b"]
+
+    def test_make_result_yaml_is_opt_in(self, bp_function):
+        """Full YAML is only emitted when requested."""
+        item = {"metadata": {"name": "bp"}, "spec": {}}
+
+        assert bp_function._make_result(item).yaml == ""
+        assert "name: bp" in bp_function._make_result(item, include_yaml=True).yaml
+
+    @pytest.mark.asyncio
+    async def test_create_from_policy_json_pipes_json(self, bp_function):
+        """policy_json is sent to kubectl apply as JSON bytes."""
+        policy = {"apiVersion": "control.kubestellar.io/v1alpha1", "kind": "X"}
+        with (
+            patch.object(
+                bp_function, "_credential_kubeconfig", new_callable=AsyncMock
+            ) as auth,
+            patch.object(bp_function, "_run", new_callable=AsyncMock) as mock_run,
+        ):
+            auth.return_value = None
+            mock_run.return_value = {"returncode": 0, "stdout": "ok", "stderr": ""}
+
+            result = await bp_function.execute(operation="create", policy_json=policy)
+            assert result["status"] == "success"
+            assert json.loads(mock_run.call_args.kwargs["stdin_data"]) == policy
+
+            await bp_function.execute(
+                operation="create", policy_json=json.dumps(policy)
+            )
+            assert json.loads(mock_run.call_args.kwargs["stdin_data"]) == policy
+
+    def test_item_yaml_is_cached_per_revision(self, bp_function):
+        """YAML dumps are reused until the resourceVersion changes."""
+        item = {"metadata": {"name": "bp", "uid": "u1", "resourceVersion": "1"}}
+
+        first = bp_function._item_yaml(item)
+        item["spec"] = {"changed": True}
+        assert bp_function._item_yaml(item) is first
+
+        item["metadata"]["resourceVersion"] = "2"
+        assert "changed: true" in bp_function._item_yaml(item)
+
+    def test_convert_to_native_keeps_native_leaves(self, bp_function):
+        """Flat native containers are returned without copying."""
+        labels = {"env": "prod", "tier": None}
+        names = ["a", "b"]
+
+        assert bp_function._convert_to_native(labels) is labels
+        assert bp_function._convert_to_native(names) is names
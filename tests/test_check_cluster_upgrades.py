@@ -0,0 +1,257 @@
+"""Tests for check cluster upgrades function."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.shared.functions.check_cluster_upgrades import (
+    CheckClusterUpgradesFunction,
+    _parse_k8s_version,
+)
+
+
+class TestCheckClusterUpgradesFunction:
+    """Test cases for check cluster upgrades function."""
+
+    @pytest.fixture
+    def upgrades_function(self):
+        """Create check cluster upgrades function instance with a cold cache."""
+        CheckClusterUpgradesFunction._stable_version_cache = None
+        CheckClusterUpgradesFunction._stable_version_inflight = None
+        return CheckClusterUpgradesFunction()
+
+    @pytest.mark.asyncio
+    async def test_latest_stable_version_is_cached(self, upgrades_function):
+        """The stable version is fetched once and then served from cache."""
+        with patch.object(
+            upgrades_function,
+            "_fetch_latest_stable_k8s_version",
+            new_callable=AsyncMock,
+        ) as mock_fetch:
+            mock_fetch.return_value = "v1.30.0"
+
+            assert await upgrades_function._get_latest_stable_k8s_version() == (
+                "v1.30.0"
+            )
+            assert await upgrades_function._get_latest_stable_k8s_version() == (
+                "v1.30.0"
+            )
+            assert mock_fetch.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_fetch(self, upgrades_function):
+        """Concurrent callers wait on the same fetch, even when it fails."""
+        release = asyncio.Event()
+        calls = 0
+
+        async def slow_fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return None
+
+        with patch.object(
+            upgrades_function, "_fetch_latest_stable_k8s_version", new=slow_fetch
+        ):
+            waiters = [
+                asyncio.ensure_future(
+                    upgrades_function._get_latest_stable_k8s_version()
+                )
+                for _ in range(5)
+            ]
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(*waiters)
+
+        assert results == [None] * 5
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_fetch_is_not_cached(self, upgrades_function):
+        """A failed fetch is retried on the next call."""
+        with patch.object(
+            upgrades_function,
+            "_fetch_latest_stable_k8s_version",
+            new_callable=AsyncMock,
+        ) as mock_fetch:
+            mock_fetch.side_effect = [None, "v1.30.0"]
+
+            assert await upgrades_function._get_latest_stable_k8s_version() is None
+            assert await upgrades_function._get_latest_stable_k8s_version() == (
+                "v1.30.0"
+            )
+
+    @pytest.mark.asyncio
+    async def test_unparseable_stable_version_is_an_error(self, upgrades_function):
+        """A garbage stable.txt body is reported as a fetch failure, not cached."""
+        with (
+            patch.object(
+                upgrades_function,
+                "_fetch_latest_stable_k8s_version",
+                new_callable=AsyncMock,
+                return_value="<html>not a version</html>",
+            ),
+            patch.object(
+                upgrades_function,
+                "_discover_clusters",
+                new_callable=AsyncMock,
+                return_value=[{"name": "c1", "context": "c1"}],
+            ),
+        ):
+            result = await upgrades_function.execute()
+
+        assert result == {
+            "status": "error",
+            "error": "Could not fetch the latest stable Kubernetes version.",
+        }
+        assert CheckClusterUpgradesFunction._stable_version_cache is None
+
+    @pytest.mark.asyncio
+    async def test_node_queries_are_bounded(self, upgrades_function):
+        """No more than max_concurrency node queries run at once."""
+        running = 0
+        peak = 0
+
+        async def fake_status(cluster, latest_version, kubeconfig, *args):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return None
+
+        clusters = [{"name": f"c{i}", "context": f"c{i}"} for i in range(10)]
+        with (
+            patch.object(
+                upgrades_function,
+                "_get_latest_stable_k8s_version",
+                new_callable=AsyncMock,
+                return_value="v1.30.0",
+            ),
+            patch.object(
+                upgrades_function,
+                "_discover_clusters",
+                new_callable=AsyncMock,
+                return_value=clusters,
+            ),
+            patch.object(
+                upgrades_function, "_get_cluster_upgrade_status", new=fake_status
+            ),
+            patch.object(upgrades_function, "max_concurrency", 3),
+        ):
+            result = await upgrades_function.execute()
+
+        assert result["status"] == "success"
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_upgrade_status_reads_kubelet_version(self, upgrades_function):
+        """The kubelet version comes straight from kubectl's jsonpath output."""
+        cluster = {"name": "c1", "context": "c1"}
+        with patch.object(
+            upgrades_function, "_run_command", new_callable=AsyncMock
+        ) as mock_run:
+            mock_run.return_value = {
+                "returncode": 0,
+                "stdout": "v1.29.0\n",
+                "stderr": "",
+            }
+
+            status = await upgrades_function._get_cluster_upgrade_status(
+                cluster, "v1.30.0", ""
+            )
+            assert status.current_version == "v1.29.0"
+            assert status.upgrade_needed is True
+            assert any(arg.startswith("jsonpath=") for arg in mock_run.call_args[0][0])
+
+            mock_run.return_value = {"returncode": 0, "stdout": "", "stderr": ""}
+            status = await upgrades_function._get_cluster_upgrade_status(
+                cluster, "v1.30.0", ""
+            )
+            assert status.error == "No nodes found in the cluster."
+
+    def test_parse_k8s_version_compares_numerically(self):
+        """Versions compare by release number, not lexicographically."""
+        assert _parse_k8s_version("v1.9.0") < _parse_k8s_version("v1.10.0")
+        assert _parse_k8s_version("v1.29.3+k3s1") > _parse_k8s_version("v1.29.2")
+        assert _parse_k8s_version("v1.29.3-eks-8cb36c9") == _parse_k8s_version("1.29.3")
+
+    @pytest.mark.asyncio
+    async def test_discover_clusters_parses_bytes(self, upgrades_function):
+        """Contexts are parsed from raw stdout bytes and WDS contexts skipped."""
+        contexts = b'{"contexts": [{"name": "cluster1"}, {"name": "wds1"}]}'
+        with patch.object(
+            upgrades_function, "_run_command", new_callable=AsyncMock
+        ) as mock_run:
+            mock_run.return_value = {"returncode": 0, "stdout": contexts, "stderr": ""}
+
+            clusters = await upgrades_function._discover_clusters("")
+
+        assert clusters == [{"name": "cluster1", "context": "cluster1"}]
+        assert mock_run.call_args.kwargs["decode_stdout"] is False
+
+    @pytest.mark.asyncio
+    async def test_version_fetch_overlaps_discovery(self, upgrades_function):
+        """Cluster discovery starts before the version fetch finishes."""
+        fetch_started = asyncio.Event()
+        discovery_started = asyncio.Event()
+
+        async def fake_version():
+            fetch_started.set()
+            await asyncio.wait_for(discovery_started.wait(), timeout=1)
+            return None
+
+        async def fake_discover(kubeconfig):
+            discovery_started.set()
+            return []
+
+        with (
+            patch.object(
+                upgrades_function, "_get_latest_stable_k8s_version", new=fake_version
+            ),
+            patch.object(upgrades_function, "_discover_clusters", new=fake_discover),
+        ):
+            result = await upgrades_function.execute()
+
+        assert fetch_started.is_set()
+        assert result["status"] == "error"
+        assert "latest stable" in result["error"]
+
+    @pytest.mark.asyncio
+    async def test_discover_clusters_skips_only_wds_contexts(self, upgrades_function):
+        """Only contexts named like wds1, wds2 are treated as WDS."""
+        contexts = (
+            b'{"contexts": [{"name": "wds2"}, {"name": "not-wds-cluster"},'
+            b' {"name": "its1"}]}'
+        )
+        with patch.object(
+            upgrades_function, "_run_command", new_callable=AsyncMock
+        ) as mock_run:
+            mock_run.return_value = {"returncode": 0, "stdout": contexts, "stderr": ""}
+
+            clusters = await upgrades_function._discover_clusters("")
+
+        assert [c["name"] for c in clusters] == ["not-wds-cluster", "its1"]
+
+    @pytest.mark.asyncio
+    async def test_version_cache_skips_repeat_comparisons(self, upgrades_function):
+        """A cached verdict for a kubelet version is reused."""
+        cluster = {"name": "c1", "context": "c1"}
+        version_cache = {"v1.29.0": False}
+        with patch.object(
+            upgrades_function, "_run_command", new_callable=AsyncMock
+        ) as mock_run:
+            mock_run.return_value = {"returncode": 0, "stdout": "v1.29.0", "stderr": ""}
+
+            status = await upgrades_function._get_cluster_upgrade_status(
+                cluster, "v1.30.0", "", None, version_cache
+            )
+            assert status.upgrade_needed is False
+
+            mock_run.return_value = {"returncode": 0, "stdout": "v1.28.0", "stderr": ""}
+            status = await upgrades_function._get_cluster_upgrade_status(
+                cluster, "v1.30.0", "", None, version_cache
+            )
+            assert status.upgrade_needed is True
+            assert version_cache["v1.28.0"] is True
@@ -0,0 +1,166 @@
+"""Tests for cluster label management function."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.shared import k8s_client
+from src.shared.functions.cluster_label_management import ClusterLabelManagement
+
+
+class TestClusterLabelManagement:
+    """Test cases for cluster label management function."""
+
+    @pytest.fixture
+    def label_function(self):
+        """Create cluster label management function instance."""
+        k8s_client._api_clients.clear()
+        return ClusterLabelManagement()
+
+    @pytest.mark.asyncio
+    async def test_requires_labels(self, label_function):
+        """Either labels or remove_labels must be given."""
+        result = await label_function.execute(cluster_name="cluster1")
+        assert result["status"] == "error"
+
+    @pytest.mark.asyncio
+    async def test_patches_with_api_client(self, label_function):
+        """With a client available, labels are merge-patched without kubectl."""
+        custom_api = MagicMock()
+        custom_api.patch_cluster_custom_object = AsyncMock()
+        fake_client = MagicMock()
+        fake_client.CustomObjectsApi.return_value = custom_api
+
+        with (
+            patch.object(k8s_client, "client", fake_client),
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=object(),
+            ),
+            patch("asyncio.create_subprocess_exec") as mock_exec,
+        ):
+            result = await label_function.execute(
+                cluster_name="cluster1",
+                labels={"env": "prod"},
+                remove_labels=["old"],
+            )
+
+        assert result["status"] == "success"
+        mock_exec.assert_not_called()
+        kwargs = custom_api.patch_cluster_custom_object.call_args.kwargs
+        assert kwargs["name"] == "cluster1"
+        assert kwargs["body"] == {"metadata": {"labels": {"env": "prod", "old": None}}}
+        assert kwargs["_content_type"] == "application/merge-patch+json"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_kubectl(self, label_function):
+        """Without a client the labels are applied with kubectl."""
+        process = MagicMock(returncode=0)
+        process.communicate = AsyncMock(return_value=(b"labeled\n", b""))
+
+        with (
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=None,
+            ),
+            patch(
+                "asyncio.create_subprocess_exec",
+                new_callable=AsyncMock,
+                return_value=process,
+            ) as mock_exec,
+        ):
+            result = await label_function.execute(
+                cluster_name="cluster1", labels={"env": "prod"}
+            )
+
+        assert result["status"] == "success"
+        assert result["stdout"] == "labeled"
+        assert "cmd" not in result
+        args = mock_exec.call_args.args
+        assert args[1:] == (
+            "--context",
+            "its1",
+            "label",
+            "managedcluster",
+            "cluster1",
+            "env=prod",
+            "--overwrite",
+        )
+
+    @pytest.mark.asyncio
+    async def test_error_reports_quoted_command(self, label_function):
+        """Failures echo the command with shell quoting; successes do not."""
+        process = MagicMock(returncode=1)
+        process.communicate = AsyncMock(return_value=(b"", b"not found\n"))
+
+        with (
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=None,
+            ),
+            patch(
+                "asyncio.create_subprocess_exec",
+                new_callable=AsyncMock,
+                return_value=process,
+            ),
+        ):
+            result = await label_function.execute(
+                cluster_name="cluster1", labels={"team": "a b"}
+            )
+
+        assert result["status"] == "error"
+        assert result["stderr"] == "not found"
+        assert "'team=a b'" in result["cmd"]
+
+    @pytest.mark.asyncio
+    async def test_patches_through_real_client(self, label_function, fake_apiserver):
+        """The merge patch reaches the API server through kubernetes_asyncio."""
+        path = "/apis/cluster.open-cluster-management.io/v1/managedclusters/cluster1"
+        fake_apiserver.routes[("PATCH", path)] = (200, {"metadata": {}})
+
+        with patch("asyncio.create_subprocess_exec") as mock_exec:
+            result = await label_function.execute(
+                cluster_name="cluster1",
+                labels={"env": "prod"},
+                remove_labels=["old"],
+                kube_context="fake",
+                kubeconfig=fake_apiserver.kubeconfig,
+            )
+
+        assert result["status"] == "success"
+        mock_exec.assert_not_called()
+        assert fake_apiserver.requests == [
+            ("PATCH", path, {"metadata": {"labels": {"env": "prod", "old": None}}})
+        ]
+
+    @pytest.mark.asyncio
+    async def test_transport_error_is_reported(self, label_function):
+        """Connection failures from the client come back as an error result."""
+        custom_api = MagicMock()
+        custom_api.patch_cluster_custom_object = AsyncMock(
+            side_effect=ConnectionRefusedError("connection refused")
+        )
+        fake_client = MagicMock()
+        fake_client.ApiException = type("ApiException", (Exception,), {})
+        fake_client.CustomObjectsApi.return_value = custom_api
+
+        with (
+            patch.object(k8s_client, "client", fake_client),
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=object(),
+            ),
+        ):
+            result = await label_function.execute(
+                cluster_name="cluster1", labels={"env": "prod"}
+            )
+
+        assert result == {"status": "error", "stderr": "connection refused"}
@@ -0,0 +1,178 @@
+"""Tests for cluster management function."""
+
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.shared.functions import cluster_management
+from src.shared.functions.cluster_management import (
+    ClusterManagementFunction,
+    _convert_mapcomposite,
+)
+
+_RUN = "src.shared.functions.cluster_management.run_shell_command_with_cancellation"
+
+
+def _ok(stdout="") -> dict:
+    return {"returncode": 0, "stdout": stdout, "stderr": ""}
+
+
+class TestClusterManagementFunction:
+    """Test cases for cluster management function."""
+
+    @pytest.fixture
+    def cluster_function(self):
+        """Create cluster management function instance with a cold cache."""
+        cluster_management._list_cache.clear()
+        return ClusterManagementFunction()
+
+    @pytest.mark.asyncio
+    async def test_register_its_pipes_manifest_to_kubectl(self, cluster_function):
+        """ITS registration applies the ManagedCluster through the async helper."""
+        with patch(_RUN, new_callable=AsyncMock) as mock_run:
+            mock_run.side_effect = [_ok(""), _ok("created")]
+
+            result = await cluster_function.execute(
+                operation="register",
+                cluster_name="cluster1",
+                context="its1",
+                labels={"env": "prod"},
+            )
+
+        assert result["status"] == "success"
+        apply_call = mock_run.call_args_list[-1]
+        assert apply_call.args[0][-3:] == ["apply", "-f", "-"]
+        manifest = json.loads(apply_call.kwargs["input_data"])
+        assert manifest["kind"] == "ManagedCluster"
+        assert manifest["metadata"] == {"name": "cluster1", "labels": {"env": "prod"}}
+
+    @pytest.mark.asyncio
+    async def test_register_wds_reports_apply_error(self, cluster_function):
+        """A failed Binding apply surfaces kubectl's stderr."""
+        with patch(_RUN, new_callable=AsyncMock) as mock_run:
+            mock_run.side_effect = [
+                _ok(""),
+                {"returncode": 1, "stdout": "", "stderr": "denied"},
+            ]
+
+            result = await cluster_function.execute(
+                operation="register", cluster_name="cluster1", context="wds1"
+            )
+
+        assert result == {"status": "error", "error": "denied"}
+        assert mock_run.call_args_list[-1].kwargs["input_data"]
+
+    @pytest.mark.asyncio
+    async def test_register_rejects_existing_cluster(self, cluster_function):
+        """An existing ManagedCluster is found by name without listing all."""
+        with patch(_RUN, new_callable=AsyncMock) as mock_run:
+            mock_run.return_value = _ok("managedcluster/cluster1\n")
+
+            result = await cluster_function.execute(
+                operation="register", cluster_name="cluster1", context="its1"
+            )
+
+        assert result["status"] == "error"
+        assert "already registered" in result["error"]
+        assert mock_run.call_count == 1
+        cmd = mock_run.call_args.args[0]
+        assert cmd[4:6] == ["managedcluster", "cluster1"]
+        assert "--ignore-not-found" in cmd
+
+    @pytest.mark.asyncio
+    async def test_apply_cluster_labels_batches_nodes(self, cluster_function):
+        """All nodes are labelled by a single kubectl call."""
+        nodes = "node/n1\nnode/n2\n"
+        with patch(_RUN, new_callable=AsyncMock) as mock_run:
+            mock_run.side_effect = [_ok(nodes), _ok()]
+
+            await cluster_function._apply_cluster_labels("c1", {"env": "prod"}, "")
+
+        assert mock_run.call_count == 2
+        cmd = mock_run.call_args.args[0]
+        assert cmd[3:] == ["label", "node", "n1", "n2", "env=prod", "--overwrite"]
+
+    @pytest.mark.asyncio
+    async def test_apply_cluster_labels_falls_back_per_node(self, cluster_function):
+        """A failed batch call is retried node by node."""
+        nodes = "node/n1\nnode/n2\n"
+        failed = {"returncode": 1, "stdout": "", "stderr": "boom"}
+        with patch(_RUN, new_callable=AsyncMock) as mock_run:
+            mock_run.side_effect = [_ok(nodes), failed, _ok(), _ok()]
+
+            await cluster_function._apply_cluster_labels("c1", {"env": "prod"}, "")
+
+        per_node = [c.args[0][5] for c in mock_run.call_args_list[2:]]
+        assert sorted(per_node) == ["n1", "n2"]
+
+    @pytest.mark.asyncio
+    async def test_list_is_cached_until_unregister(self, cluster_function):
+        """Repeated lists reuse one kubectl call until a mutation succeeds."""
+        managed = b'{"items": [{"metadata": {"name": "c1", "creationTimestamp": "t"}}]}'
+        with patch(_RUN, new_callable=AsyncMock) as mock_run:
+            mock_run.return_value = _ok(managed)
+
+            first = await cluster_function.execute(operation="list", context="its1")
+            second = await cluster_function.execute(operation="list", context="its1")
+            assert first["total"] == 1
+            assert second == first
+            assert mock_run.call_count == 1
+
+            await cluster_function.execute(
+                operation="unregister", cluster_name="c1", context="its1"
+            )
+            await cluster_function.execute(operation="list", context="its1")
+            assert mock_run.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_list_cache_keeps_successes_only_and_hands_out_copies(
+        self, cluster_function
+    ):
+        """Failures are retried, and changing a result leaves the cache intact."""
+        managed = b'{"items": [{"metadata": {"name": "c1", "creationTimestamp": "t"}}]}'
+        with patch(_RUN, new_callable=AsyncMock) as mock_run:
+            mock_run.side_effect = [
+                {"returncode": 1, "stdout": "", "stderr": "timeout"},
+                _ok(managed),
+            ]
+
+            failed = await cluster_function.execute(operation="list", context="its1")
+            first = await cluster_function.execute(operation="list", context="its1")
+            first["clusters"].clear()
+            second = await cluster_function.execute(operation="list", context="its1")
+
+        assert failed["status"] == "error"
+        assert mock_run.call_count == 2
+        assert second["total"] == len(second["clusters"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_update_labels_replaces_map_in_one_patch(self, cluster_function):
+        """update-labels issues a single JSON patch without a prior get."""
+        with patch(_RUN, new_callable=AsyncMock) as mock_run:
+            mock_run.side_effect = [
+                _ok("patched"),
+                {"returncode": 1, "stdout": b"", "stderr": "no nodes"},
+            ]
+
+            result = await cluster_function.execute(
+                operation="update-labels",
+                cluster_name="c1",
+                labels={"env": "prod"},
+            )
+
+        assert result["status"] == "success"
+        cmd = mock_run.call_args_list[0].args[0]
+        assert cmd[3:6] == ["patch", "bindings.control.kubestellar.io", "c1-binding"]
+        assert json.loads(cmd[cmd.index("-p") + 1]) == [
+            {"op": "add", "path": "/metadata/labels", "value": {"env": "prod"}}
+        ]
+
+    def test_convert_mapcomposite(self):
+        """Mapping and iterable wrappers become plain dicts and lists."""
+        from types import MappingProxyType
+
+        assert _convert_mapcomposite(MappingProxyType({"a": "1"})) == {"a": "1"}
+        assert _convert_mapcomposite(("x", "y")) == ["x", "y"]
+        assert _convert_mapcomposite("env=prod") == "env=prod"
+        assert _convert_mapcomposite(None) is None
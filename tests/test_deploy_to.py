@@ -0,0 +1,771 @@
+"""Tests for deploy_to function."""
+
+import asyncio
+import json
+import os
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.shared import k8s_client, kubeconfig_cache
+from src.shared.functions import deploy_to
+from src.shared.functions.deploy_to import DeployToFunction
+
+
+class TestDeployToFunction:
+    """Test cases for deploy_to function."""
+
+    @pytest.fixture
+    def deploy_function(self):
+        """Create deploy_to function instance that always uses kubectl."""
+        return DeployToFunction(use_subprocess=True)
+
+    @pytest.mark.asyncio
+    async def test_deploy_to_clusters_isolates_failures(self, deploy_function):
+        """One cluster raising does not stop deployment to the others."""
+        clusters = [
+            {"name": "cluster1", "context": "cluster1"},
+            {"name": "cluster2", "context": "cluster2"},
+        ]
+
+        async def fake_deploy(cluster, *args, **kwargs):
+            if cluster["name"] == "cluster1":
+                raise RuntimeError("boom")
+            return {"status": "success", "cluster": cluster["name"]}
+
+        with patch.object(deploy_function, "_deploy_to_cluster", new=fake_deploy):
+            results = await deploy_function._deploy_to_clusters(
+                clusters, "app.yaml", "", "", "", None, ["default"], "", "", None
+            )
+
+        assert results["cluster1"]["status"] == "error"
+        assert "boom" in results["cluster1"]["error"]
+        assert results["cluster2"] == {"status": "success", "cluster": "cluster2"}
+
+    @pytest.mark.asyncio
+    async def test_namespaces_deploy_concurrently_with_bound(self):
+        """Namespaces fan out but never exceed the configured concurrency."""
+        deploy_function = DeployToFunction(ns_concurrency=2)
+        running = 0
+        peak = 0
+
+        async def fake_ns(cluster, namespace, *args, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return {"status": "success" if namespace != "bad" else "error"}
+
+        with patch.object(deploy_function, "_deploy_to_namespace", new=fake_ns):
+            result = await deploy_function._deploy_to_cluster(
+                {"name": "c1", "context": "c1"},
+                "app.yaml",
+                "",
+                "",
+                "",
+                {},
+                ["a", "b", "c", "bad"],
+                "",
+                "",
+                None,
+            )
+
+        assert peak == 2
+        assert result["namespaces_total"] == 4
+        assert result["namespaces_succeeded"] == 3
+        assert list(result["namespace_results"]) == ["a", "b", "c", "bad"]
+
+    @pytest.mark.asyncio
+    async def test_manifest_applied_to_all_namespaces_in_one_call(
+        self, deploy_function, tmp_path
+    ):
+        """Namespaces, then a copy of the file per namespace, go in two applies."""
+        manifest = tmp_path / "app.yaml"
+        manifest.write_text(
+            "apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: cfg\n"
+            "---\n"
+            "apiVersion: v1\nkind: Service\nmetadata:\n  name: svc\n"
+        )
+        calls = []
+
+        async def fake_run(cmd, input_data=None):
+            calls.append((cmd, input_data))
+            return {"returncode": 0, "stdout": "applied", "stderr": ""}
+
+        with patch.object(deploy_function, "_run_command", new=fake_run):
+            result = await deploy_function._deploy_to_cluster(
+                {"name": "c1", "context": "c1"},
+                str(manifest),
+                "",
+                "",
+                "",
+                {},
+                ["a", "b"],
+                "",
+                "",
+                None,
+            )
+
+        assert result["namespaces_succeeded"] == 2
+        assert len(calls) == 2
+        namespaces, applies = [json.loads(c[1])["items"] for c in calls]
+        assert [(ns["kind"], ns["metadata"]["name"]) for ns in namespaces] == [
+            ("Namespace", "a"),
+            ("Namespace", "b"),
+        ]
+        assert calls[0][0][:2] == ["kubectl", "create"]
+        assert calls[1][0][:4] == ["kubectl", "apply", "-f", "-"]
+        items = applies
+        assert [(i["metadata"]["name"], i["metadata"]["namespace"]) for i in items] == [
+            ("cfg", "a"),
+            ("svc", "a"),
+            ("cfg", "b"),
+            ("svc", "b"),
+        ]
+
+    def test_manifest_with_namespace_is_not_batched(self, deploy_function, tmp_path):
+        """Objects that pin a namespace keep the per-namespace apply path."""
+        manifest = tmp_path / "app.yaml"
+        manifest.write_text(
+            "apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: cfg\n"
+            "  namespace: fixed\n"
+        )
+
+        assert deploy_function._load_manifest_docs(manifest.read_bytes()) is None
+
+    def test_cluster_scoped_kinds_are_not_batched(self, deploy_function):
+        """Objects without a namespace are not copied into each namespace."""
+        manifest = (
+            b"apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: cfg\n"
+            b"---\n"
+            b"apiVersion: rbac.authorization.k8s.io/v1\nkind: ClusterRole\n"
+            b"metadata:\n  name: reader\n"
+        )
+
+        assert deploy_function._load_manifest_docs(manifest) is None
+
+    def test_batched_timestamps_stay_strings(self, deploy_function):
+        """Unquoted dates survive the YAML-to-JSON round trip unchanged."""
+        manifest = (
+            b"apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: cfg\n"
+            b"data:\n  since: 2024-01-01T10:00:00Z\n  day: 2024-01-01\n"
+        )
+
+        docs = deploy_function._load_manifest_docs(manifest)
+
+        assert docs[0]["data"] == {"since": "2024-01-01T10:00:00Z", "day": "2024-01-01"}
+        assert json.loads(deploy_to.json_dumps(docs))[0]["data"] == docs[0]["data"]
+
+    @pytest.mark.asyncio
+    async def test_batch_reports_each_namespace_and_retries_failures(
+        self, deploy_function
+    ):
+        """Output is split per namespace; a failed batch is retried one by one."""
+        docs = [{"apiVersion": "v1", "kind": "ConfigMap", "metadata": {"name": "c"}}]
+        batches = []
+
+        async def fake_run(cmd, input_data=None):
+            items = json.loads(input_data)["items"]
+            if cmd[1] == "create":
+                return {"returncode": 0, "stdout": "", "stderr": ""}
+            namespaces = [i["metadata"]["namespace"] for i in items]
+            batches.append(namespaces)
+            failed = "bad" in namespaces
+            lines = [f"configmap/c created ({ns})" for ns in namespaces]
+            return {
+                "returncode": 1 if failed else 0,
+                "stdout": "" if failed else "\n".join(lines),
+                "stderr": "denied" if failed else "",
+            }
+
+        cluster = {"name": "c1", "context": "c1"}
+        with patch.object(deploy_function, "_run_command", new=fake_run):
+            ok = await deploy_function._apply_manifest_batch(
+                cluster, docs, ["a", "b"], "", None
+            )
+            batches.clear()
+            mixed = await deploy_function._apply_manifest_batch(
+                cluster, docs, ["ok", "bad", "other"], "", None
+            )
+
+        assert ok["a"]["output"] == "configmap/c created (a)"
+        assert ok["b"]["output"] == "configmap/c created (b)"
+        assert batches == [["ok", "bad", "other"], ["ok"], ["bad"], ["other"]]
+        assert [mixed[ns]["status"] for ns in ("ok", "bad", "other")] == [
+            "success",
+            "error",
+            "success",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_run_command_adds_cache_dir_when_configured(self, deploy_function):
+        """A configured discovery cache directory is passed to kubectl."""
+        with (
+            patch.object(deploy_to, "_KUBECTL_CACHE_DIR", "/tmp/kcache"),
+            patch.object(
+                deploy_to, "run_shell_command_with_cancellation", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            await deploy_function._run_command(["kubectl", "get", "ns"])
+
+        assert mock_run.call_args.args[0] == [
+            "kubectl",
+            "--cache-dir",
+            "/tmp/kcache",
+            "get",
+            "ns",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_discover_clusters_is_cached(self, deploy_function):
+        """Cluster discovery runs kubectl once per TTL window."""
+        clusters = [{"name": "c1", "context": "c1", "status": "Ready"}]
+        with patch.object(
+            deploy_function, "_probe_clusters", new_callable=AsyncMock
+        ) as mock_probe:
+            mock_probe.return_value = clusters
+
+            assert await deploy_function._discover_clusters("", "") == clusters
+            assert await deploy_function._discover_clusters("", "") == clusters
+            assert mock_probe.call_count == 1
+
+            await deploy_function._discover_clusters("/other/kubeconfig", "")
+            assert mock_probe.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_discover_clusters_serves_stale_on_failure(self, deploy_function):
+        """An empty refresh falls back to the last clusters that were found."""
+        clusters = [{"name": "c1", "context": "c1", "status": "Ready"}]
+        with patch.object(
+            deploy_function, "_probe_clusters", new_callable=AsyncMock
+        ) as mock_probe:
+            mock_probe.side_effect = [clusters, []]
+
+            assert await deploy_function._refresh_clusters("") == clusters
+            assert await deploy_function._refresh_clusters("") == clusters
+            assert mock_probe.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_clusters_refresh_in_background(self, deploy_function):
+        """Expired entries are served at once while one shared refresh runs."""
+        old = [{"name": "c1", "context": "c1", "status": "Ready"}]
+        new = [{"name": "c2", "context": "c2", "status": "Ready"}]
+        release = asyncio.Event()
+
+        async def slow_probe(kubeconfig):
+            await release.wait()
+            return new
+
+        deploy_function._cluster_cache[""] = (0.0, old)
+        with patch.object(deploy_function, "_probe_clusters", new=slow_probe):
+            assert await deploy_function._discover_clusters("", "") == old
+            assert await deploy_function._discover_clusters("", "") == old
+            assert len(deploy_function._cluster_refresh) == 1
+
+            release.set()
+            await asyncio.gather(*deploy_function._cluster_refresh.values())
+
+        assert await deploy_function._discover_clusters("", "") == new
+
+    @pytest.mark.asyncio
+    async def test_successful_deploy_marks_cluster_ready_in_cache(
+        self, deploy_function
+    ):
+        """Only the cache is updated; dicts handed to callers are never changed."""
+        cached = [
+            {"name": "c1", "context": "c1", "status": "Unreachable"},
+            {"name": "c2", "context": "c2", "status": "Unreachable"},
+        ]
+        deploy_function._cluster_cache[""] = (time.monotonic(), cached)
+
+        seen = await deploy_function._discover_clusters("", "")
+        seen[0]["status"] = "mutated"
+        deploy_function._mark_ready("", {"c1"})
+
+        assert cached[0]["status"] == "Unreachable"
+        assert [
+            c["status"] for c in await deploy_function._discover_clusters("", "")
+        ] == ["Ready", "Unreachable"]
+
+    @pytest.mark.asyncio
+    async def test_ensure_namespace_uses_api_client(self):
+        """With a client available, namespaces are created without kubectl."""
+
+        class ApiException(Exception):
+            def __init__(self, status):
+                self.status = status
+                self.reason = "Conflict"
+
+        core_api = MagicMock()
+        core_api.create_namespace = AsyncMock(side_effect=ApiException(409))
+        fake_client = MagicMock(ApiException=ApiException)
+        fake_client.CoreV1Api.return_value = core_api
+        deploy_function = DeployToFunction()
+
+        with (
+            patch.object(k8s_client, "client", fake_client),
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=object(),
+            ),
+            patch.object(
+                deploy_function, "_run_command", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            error = await deploy_function._ensure_namespace(
+                {"name": "c1", "context": "c1"}, "apps", ""
+            )
+
+        assert error is None
+        mock_run.assert_not_called()
+        assert core_api.create_namespace.call_args.kwargs["body"] == {
+            "metadata": {"name": "apps"}
+        }
+
+    @pytest.mark.asyncio
+    async def test_forbidden_api_create_reads_namespace(self):
+        """A 403 on create is fine when the namespace can be read."""
+
+        class ApiException(Exception):
+            def __init__(self, status):
+                self.status = status
+                self.reason = "Forbidden"
+
+        core_api = MagicMock()
+        core_api.create_namespace = AsyncMock(side_effect=ApiException(403))
+        core_api.read_namespace = AsyncMock(side_effect=[None, ApiException(403)])
+        fake_client = MagicMock(ApiException=ApiException)
+        fake_client.CoreV1Api.return_value = core_api
+        deploy_function = DeployToFunction()
+        cluster = {"name": "c1", "context": "c1"}
+
+        with (
+            patch.object(k8s_client, "client", fake_client),
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=object(),
+            ),
+        ):
+            existing = await deploy_function._ensure_namespace(cluster, "apps", "")
+            missing = await deploy_function._ensure_namespace(cluster, "other", "")
+
+        assert existing is None
+        assert missing["error"] == "Failed to create namespace: 403 Forbidden"
+        assert core_api.read_namespace.await_args_list[0].kwargs == {"name": "apps"}
+
+    def test_fix_labels_json_coerces_nested_values(self):
+        """Non-string values become strings at every depth; None is kept."""
+        labels = {"tier": 1, "meta": {"ready": True, "owner": None}}
+
+        assert deploy_to._fix_labels_json(labels) == {
+            "tier": "1",
+            "meta": {"ready": "True", "owner": None},
+        }
+        plain = {"env": "prod"}
+        assert deploy_to._fix_labels_json(plain) is plain
+
+    def test_fix_labels_json_short_circuits_string_labels(self):
+        """All-string labels are not rebuilt, after any mapping is unwrapped."""
+        from types import MappingProxyType
+
+        empty = {}
+        assert deploy_to._fix_labels_json(empty) is empty
+        proxied = deploy_to._fix_labels_json(MappingProxyType({"env": "prod"}))
+        assert type(proxied) is dict and proxied == {"env": "prod"}
+
+        class Tag(str):
+            pass
+
+        # str subclasses are not plain strings, so they are normalised
+        assert type(deploy_to._fix_labels_json({"env": Tag("prod")})["env"]) is str
+
+    @pytest.mark.asyncio
+    async def test_labels_are_applied_with_the_manifest(
+        self, deploy_function, tmp_path
+    ):
+        """Labels ride along in a server-side apply instead of a kubectl label."""
+        manifest = tmp_path / "app.yaml"
+        manifest.write_text(
+            "apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: cfg\n"
+            "  labels:\n    app: web\n"
+        )
+        calls = []
+
+        async def fake_run(cmd, input_data=None):
+            calls.append((cmd, input_data))
+            return {"returncode": 0, "stdout": "applied", "stderr": ""}
+
+        with patch.object(deploy_function, "_run_command", new=fake_run):
+            result = await deploy_function._deploy_to_cluster(
+                {"name": "c1", "context": "c1"},
+                str(manifest),
+                "",
+                "",
+                "",
+                {},
+                ["a"],
+                "",
+                "",
+                {"env": "prod"},
+            )
+
+        assert result["namespaces_succeeded"] == 1
+        assert not any("label" in c[0] for c in calls)
+        (apply,) = [c for c in calls if b'"List"' in c[1]]
+        assert "--server-side" in apply[0]
+        (item,) = json.loads(apply[1])["items"]
+        assert item["metadata"]["labels"] == {"app": "web", "env": "prod"}
+
+    @pytest.mark.asyncio
+    async def test_cluster_image_override_resolved_once(self):
+        """cluster=image strings become a map and pick the image per cluster."""
+        params = deploy_to.DeployToInput(
+            cluster_images=["c1 = nginx:2", "bogus", "c2=nginx:3"]
+        )
+        assert params.cluster_images == {"c1": "nginx:2", "c2": "nginx:3"}
+
+        deploy_function = DeployToFunction()
+        images = []
+
+        async def fake_ns(
+            cluster, namespace, filename, rtype, rname, image, *args, **kwargs
+        ):
+            images.append(image)
+            return {"status": "success"}
+
+        with patch.object(deploy_function, "_deploy_to_namespace", new=fake_ns):
+            await deploy_function._deploy_to_cluster(
+                {"name": "c1", "context": "c1"},
+                "",
+                "deployment",
+                "web",
+                "nginx:1",
+                params.cluster_images,
+                ["a", "b"],
+                "",
+                "",
+                None,
+            )
+
+        assert images == ["nginx:2", "nginx:2"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_targeting_skips_discovery(self, deploy_function):
+        """Bad input is rejected before any cluster discovery happens."""
+        with patch.object(
+            deploy_function, "_discover_clusters", new_callable=AsyncMock
+        ) as mock_discover:
+            result = await deploy_function.execute(
+                context="wds1", target_clusters=["c1"], filename="app.yaml"
+            )
+
+        assert result["status"] == "error"
+        assert "Cannot specify context" in result["details"]["error"]
+        mock_discover.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_context_targets_come_from_binding_jsonpath(self, deploy_function):
+        """Cluster IDs are read from kubectl's jsonpath output, once each."""
+        clusters = [
+            {"name": "cluster1", "context": "cluster1"},
+            {"name": "cluster2", "context": "cluster2"},
+        ]
+        with (
+            patch.object(
+                deploy_function,
+                "_discover_clusters",
+                new_callable=AsyncMock,
+                return_value=clusters,
+            ),
+            patch.object(
+                deploy_function, "_run_command", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            mock_run.return_value = {
+                "returncode": 0,
+                "stdout": "cluster2\n\ncluster2\n",
+                "stderr": "",
+            }
+
+            result = await deploy_function.execute(
+                context="wds1", filename="app.yaml", dry_run=True
+            )
+
+        assert result["details"]["deployment_plan"]["target_clusters"] == ["cluster2"]
+        cmd = mock_run.call_args.args[0]
+        assert cmd[cmd.index("-o") + 1].startswith("jsonpath=")
+
+    def test_filter_clusters_by_name_or_context(self, deploy_function):
+        """Comma-separated targets match by name or context, once per cluster."""
+        clusters = [
+            {"name": "cluster1", "context": "ctx1"},
+            {"name": "cluster2", "context": "ctx2"},
+            {"name": "cluster3", "context": "ctx3"},
+        ]
+
+        selected = deploy_function._filter_clusters(
+            clusters, ["ctx3, cluster1", "cluster3", "missing"], None
+        )
+
+        assert [c["name"] for c in selected] == ["cluster3", "cluster1"]
+
+    @pytest.mark.asyncio
+    async def test_contexts_read_from_kubeconfig_file(self, deploy_function, tmp_path):
+        """Contexts come from the kubeconfig file without kubectl config."""
+        kubeconfig = tmp_path / "config"
+        kubeconfig.write_text(
+            "contexts:\n- name: cluster1\n  context: {}\n- name: wds1\n  context: {}\n"
+        )
+        kubeconfig_cache._KCFG_CACHE.clear()
+        with patch.object(
+            deploy_function, "_run_command", new_callable=AsyncMock
+        ) as mock_run:
+            mock_run.return_value = {"returncode": 0, "stdout": "", "stderr": ""}
+
+            clusters = await deploy_function._probe_clusters(str(kubeconfig))
+
+        assert [c["name"] for c in clusters] == ["cluster1"]
+        assert [c.args[0][1] for c in mock_run.call_args_list] == ["cluster-info"]
+        assert any(k[0] == str(kubeconfig) for k in kubeconfig_cache._KCFG_CACHE)
+
+    @pytest.mark.asyncio
+    async def test_unreadable_kubeconfig_falls_back_to_kubectl(
+        self, deploy_function, tmp_path
+    ):
+        """A missing kubeconfig file is left for kubectl to resolve."""
+        with patch.object(
+            deploy_function, "_run_command", new_callable=AsyncMock
+        ) as mock_run:
+            mock_run.return_value = {"returncode": 1, "stdout": "", "stderr": "no"}
+
+            clusters = await deploy_function._probe_clusters(str(tmp_path / "nope"))
+
+        assert clusters == []
+        assert mock_run.call_args.args[0][1:3] == ["config", "get-contexts"]
+
+    @pytest.mark.asyncio
+    async def test_kubectl_processes_are_bounded_globally(self):
+        """Concurrent _run_command calls never exceed the module-wide limit."""
+        running = 0
+        peak = 0
+
+        async def fake_shell(cmd, input_data=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return {"returncode": 0, "stdout": "", "stderr": ""}
+
+        functions = [DeployToFunction(), DeployToFunction()]
+        with (
+            patch.object(deploy_to, "_KUBECTL_CONCURRENCY", 3),
+            patch.object(deploy_to, "_kubectl_sem", None),
+            patch.object(
+                deploy_to, "run_shell_command_with_cancellation", new=fake_shell
+            ),
+        ):
+            await asyncio.gather(
+                *[
+                    fn._run_command(["kubectl", "version"])
+                    for fn in functions
+                    for _ in range(5)
+                ]
+            )
+
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_namespaced_manifest_is_piped_from_memory(
+        self, deploy_function, tmp_path
+    ):
+        """Per-namespace applies send the file read once over stdin."""
+        manifest = tmp_path / "app.yaml"
+        content = (
+            b"apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: cfg\n  namespace: a\n"
+        )
+        manifest.write_bytes(content)
+        calls = []
+
+        async def fake_run(cmd, input_data=None):
+            calls.append((cmd, input_data))
+            return {"returncode": 0, "stdout": "applied", "stderr": ""}
+
+        with (
+            patch.object(deploy_function, "_run_command", new=fake_run),
+            patch.object(
+                deploy_function, "_read_manifest", wraps=deploy_function._read_manifest
+            ) as mock_read,
+        ):
+            await deploy_function._deploy_to_clusters(
+                [{"name": "c1", "context": "c1"}, {"name": "c2", "context": "c2"}],
+                str(manifest),
+                "",
+                "",
+                "",
+                None,
+                ["a"],
+                "",
+                "",
+                None,
+                manifest=content,
+            )
+
+        mock_read.assert_not_called()
+        applies = [c for c in calls if c[1] == content]
+        assert len(applies) == 2
+        assert all(cmd[:4] == ["kubectl", "apply", "-f", "-"] for cmd, _ in applies)
+
+    @pytest.mark.asyncio
+    async def test_list_clusters_skips_input_parsing(self, deploy_function):
+        """list_clusters is answered before the deployment inputs are built."""
+        with (
+            patch.object(
+                deploy_function,
+                "_list_available_clusters",
+                new_callable=AsyncMock,
+                return_value={"status": "success", "clusters": []},
+            ) as mock_list,
+            patch.object(deploy_to, "DeployToInput") as mock_input,
+        ):
+            result = await deploy_function.execute(
+                list_clusters=True, kubeconfig="/tmp/kc", cluster_images=["bad"]
+            )
+
+        assert result["status"] == "success"
+        mock_list.assert_awaited_once_with("/tmp/kc", "")
+        mock_input.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_context_probes_run_concurrently(self, deploy_function, tmp_path):
+        """cluster-info probes overlap instead of running one after another."""
+        kubeconfig = tmp_path / "config"
+        kubeconfig.write_text("contexts:\n- name: c1\n- name: c2\n- name: c3\n")
+        kubeconfig_cache._KCFG_CACHE.clear()
+        running = 0
+        peak = 0
+
+        async def fake_run(cmd, input_data=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            ok = cmd[cmd.index("--context") + 1] != "c2"
+            return {"returncode": 0 if ok else 1, "stdout": "", "stderr": ""}
+
+        with patch.object(deploy_function, "_run_command", new=fake_run):
+            clusters = await deploy_function._probe_clusters(str(kubeconfig))
+
+        assert peak == 3
+        assert [(c["name"], c["status"]) for c in clusters] == [
+            ("c1", "Ready"),
+            ("c2", "Unreachable"),
+            ("c3", "Ready"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_namespace_batch_is_retried_per_namespace(
+        self, deploy_function
+    ):
+        """If the combined namespace apply fails, each namespace is tried alone."""
+        calls = []
+
+        async def fake_run(cmd, input_data=None):
+            calls.append(json.loads(input_data))
+            failed = calls[-1]["kind"] == "List" or (
+                calls[-1]["metadata"]["name"] == "bad"
+            )
+            return {"returncode": 1 if failed else 0, "stdout": "", "stderr": "no"}
+
+        with patch.object(deploy_function, "_run_command", new=fake_run):
+            errors = await deploy_function._ensure_namespaces(
+                {"name": "c1", "context": "c1"}, ["good", "bad"], ""
+            )
+
+        assert errors[0] is None
+        assert "Failed to create namespace" in errors[1]["error"]
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_existing_namespaces_are_created_not_applied(self, deploy_function):
+        """Namespaces go through one kubectl create; AlreadyExists is success."""
+        calls = []
+
+        async def fake_run(cmd, input_data=None):
+            calls.append(cmd)
+            return {
+                "returncode": 1,
+                "stdout": "namespace/new created\n",
+                "stderr": 'Error from server (AlreadyExists): namespaces "kube-system"'
+                " already exists\n",
+            }
+
+        with patch.object(deploy_function, "_run_command", new=fake_run):
+            errors = await deploy_function._ensure_namespaces(
+                {"name": "c1", "context": "c1"}, ["kube-system", "new"], ""
+            )
+            single = await deploy_function._ensure_namespace(
+                {"name": "c1", "context": "c1"}, "kube-system", ""
+            )
+
+        assert errors == [None, None]
+        assert single is None
+        assert [cmd[:4] for cmd in calls] == [["kubectl", "create", "-f", "-"]] * 2
+
+    @pytest.mark.asyncio
+    async def test_forbidden_create_accepts_existing_namespace(self, deploy_function):
+        """Without create rights, a namespace that can be read is still usable."""
+        calls = []
+
+        async def fake_run(cmd, input_data=None):
+            calls.append(cmd[:3])
+            if cmd[1] == "create":
+                return {
+                    "returncode": 1,
+                    "stdout": "",
+                    "stderr": "Error from server (Forbidden): namespaces is"
+                    ' forbidden: User "dev" cannot create resource "namespaces"\n',
+                }
+            found = cmd[3] == "team-a"
+            return {"returncode": 0 if found else 1, "stdout": "", "stderr": ""}
+
+        cluster = {"name": "c1", "context": "c1"}
+        with patch.object(deploy_function, "_run_command", new=fake_run):
+            errors = await deploy_function._ensure_namespaces(
+                cluster, ["team-a", "team-b"], ""
+            )
+
+        assert errors[0] is None
+        assert "Forbidden" in errors[1]["error"]
+        assert calls[0] == ["kubectl", "create", "-f"]
+        assert ["kubectl", "get", "namespace"] in calls
+
+    def test_kubeconfig_path_list_is_merged(self, tmp_path, monkeypatch):
+        """KUBECONFIG lists merge in order, skipping files that do not exist."""
+        first = tmp_path / "first"
+        first.write_text("contexts:\n- name: c1\n- name: shared\n")
+        second = tmp_path / "second"
+        second.write_text("contexts:\n- name: shared\n- name: c2\n")
+        paths = [str(first), str(tmp_path / "missing"), str(second)]
+        monkeypatch.setenv("KUBECONFIG", os.pathsep.join(paths))
+        kubeconfig_cache._KCFG_CACHE.clear()
+
+        assert deploy_to._load_kubeconfig_contexts("") == ["c1", "shared", "c2"]
+
+        second.write_text("contexts: [")
+        os.utime(second, (0, 0))
+        assert deploy_to._load_kubeconfig_contexts("") is None
+
+    def test_is_wds_cluster(self, deploy_function):
+        """WDS names match case-insensitively at the start or between separators."""
+        for name in ["wds1", "WDS2", "kind-wds-1", "my_wds_ctx"]:
+            assert deploy_function._is_wds_cluster(name), name
+        for name in ["cluster1", "its1", "nowds", "a-wds_b", "kind-wds"]:
+            assert not deploy_function._is_wds_cluster(name), name
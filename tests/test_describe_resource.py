@@ -0,0 +1,190 @@
+"""Tests for describe resource function."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.shared import k8s_client
+from src.shared.functions.describe_resource import DescribeResourceFunction
+
+_PARAMS = {
+    "context": "cluster1",
+    "namespace": "default",
+    "resource_type": "deploy",
+    "resource_name": "web",
+}
+
+_OBJECT = {
+    "kind": "Deployment",
+    "metadata": {"name": "web", "managedFields": [{"manager": "kubectl"}]},
+    "spec": {"replicas": 2},
+}
+
+_EVENTS = {
+    "items": [
+        {
+            "involvedObject": {"kind": "Deployment", "name": "web"},
+            "type": "Normal",
+            "reason": "ScalingReplicaSet",
+            "message": "Scaled up",
+            "count": 1,
+            "source": {"component": "deployment-controller"},
+        },
+        {
+            "involvedObject": {"kind": "Pod", "name": "web"},
+            "type": "Warning",
+            "reason": "BackOff",
+        },
+    ]
+}
+
+
+def _ok(stdout: bytes) -> dict:
+    return {"returncode": 0, "stdout": stdout, "stderr": ""}
+
+
+class TestDescribeResourceFunction:
+    """Test cases for describe resource function."""
+
+    @pytest.fixture
+    def describe_function(self):
+        """Create describe resource function instance."""
+        return DescribeResourceFunction()
+
+    @pytest.mark.asyncio
+    async def test_reads_with_api_client(self, describe_function):
+        """Typed resources and their events are read without running kubectl."""
+        apps_api = MagicMock()
+        apps_api.read_namespaced_deployment = AsyncMock()
+        core_api = MagicMock()
+        core_api.list_namespaced_event = AsyncMock()
+        fake_client = MagicMock()
+        fake_client.AppsV1Api.return_value = apps_api
+        fake_client.CoreV1Api.return_value = core_api
+        api = MagicMock()
+        obj = json.loads(json.dumps(_OBJECT))
+        api.sanitize_for_serialization.side_effect = [obj, _EVENTS]
+
+        with (
+            patch.object(k8s_client, "client", fake_client),
+            patch.object(
+                k8s_client, "get_api_client", new_callable=AsyncMock, return_value=api
+            ),
+            patch.object(
+                describe_function, "_run_command", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            result = await describe_function.execute(**_PARAMS)
+
+        mock_run.assert_not_called()
+        details = result["details"]
+        # The serialized object is returned as-is, not deep-copied
+        assert details["object"] is obj
+        assert details["object"]["spec"] == {"replicas": 2}
+        assert "managedFields" not in details["object"]["metadata"]
+        assert details["events"] == [
+            {
+                "type": "Normal",
+                "reason": "ScalingReplicaSet",
+                "message": "Scaled up",
+                "count": 1,
+                "from": "deployment-controller",
+            }
+        ]
+        field_selector = core_api.list_namespaced_event.call_args.kwargs
+        assert field_selector == {"field_selector": "involvedObject.name=web"}
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_kubectl_json(self, describe_function):
+        """Without a client the object and events come from two kubectl gets."""
+        with (
+            patch.object(
+                k8s_client, "get_api_client", new_callable=AsyncMock, return_value=None
+            ),
+            patch.object(
+                describe_function, "_run_command", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            mock_run.side_effect = [
+                _ok(json.dumps(_OBJECT).encode()),
+                _ok(json.dumps(_EVENTS).encode()),
+            ]
+
+            result = await describe_function.execute(**_PARAMS)
+
+        assert result["status"] == "success"
+        assert result["details"]["object"]["kind"] == "Deployment"
+        assert [e["reason"] for e in result["details"]["events"]] == [
+            "ScalingReplicaSet"
+        ]
+        obj_cmd, events_cmd = (c.args[0] for c in mock_run.call_args_list)
+        assert obj_cmd[:6] == ["kubectl", "get", "deploy", "web", "-o", "json"]
+        assert events_cmd[2:5] == [
+            "events",
+            "--field-selector",
+            "involvedObject.name=web",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_kubectl_error_is_reported(self, describe_function):
+        """A failed get surfaces kubectl's stderr."""
+        with (
+            patch.object(
+                k8s_client, "get_api_client", new_callable=AsyncMock, return_value=None
+            ),
+            patch.object(
+                describe_function, "_run_command", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            mock_run.side_effect = [
+                {"returncode": 1, "stdout": b"", "stderr": "not found"},
+                _ok(b'{"items": []}'),
+            ]
+
+            result = await describe_function.execute(**_PARAMS)
+
+        assert result == {
+            "status": "error",
+            "details": {"status": "error", "error": "not found"},
+        }
+
+    @pytest.mark.asyncio
+    async def test_reads_through_real_client(self, describe_function, fake_apiserver):
+        """The object and events are read from the API server by kubernetes_asyncio."""
+        deployment = {
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {"name": "web", "namespace": "default"},
+            "spec": {"replicas": 2, "selector": {}, "template": {}},
+        }
+        event_list = {
+            "apiVersion": "v1",
+            "kind": "EventList",
+            "metadata": {},
+            "items": [{"metadata": {"name": "e1"}, **_EVENTS["items"][0]}],
+        }
+        fake_apiserver.routes.update(
+            {
+                ("GET", "/apis/apps/v1/namespaces/default/deployments/web"): (
+                    200,
+                    deployment,
+                ),
+                ("GET", "/api/v1/namespaces/default/events"): (200, event_list),
+            }
+        )
+
+        with patch.object(
+            describe_function, "_run_command", new_callable=AsyncMock
+        ) as mock_run:
+            result = await describe_function.execute(
+                **{**_PARAMS, "context": "fake"},
+                kubeconfig=fake_apiserver.kubeconfig,
+            )
+
+        mock_run.assert_not_called()
+        assert result["status"] == "success"
+        assert result["details"]["object"]["spec"]["replicas"] == 2
+        assert [e["reason"] for e in result["details"]["events"]] == [
+            "ScalingReplicaSet"
+        ]
@@ -0,0 +1,139 @@
+"""Tests for edit resource function."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.shared import k8s_client
+from src.shared.functions.edit_resource import EditResourceFunction
+
+_PARAMS = {
+    "context": "cluster1",
+    "namespace": "default",
+    "resource_type": "deploy",
+    "resource_name": "web",
+    "patch_yaml": "spec:\n  replicas: 3\n",
+}
+
+
+class TestEditResourceFunction:
+    """Test cases for edit resource function."""
+
+    @pytest.fixture
+    def edit_function(self):
+        """Create edit resource function instance."""
+        return EditResourceFunction()
+
+    @pytest.mark.asyncio
+    async def test_patches_with_api_client(self, edit_function):
+        """Typed resources are merge-patched without running kubectl."""
+        apps_api = MagicMock()
+        apps_api.patch_namespaced_deployment = AsyncMock()
+        fake_client = MagicMock()
+        fake_client.AppsV1Api.return_value = apps_api
+
+        with (
+            patch.object(k8s_client, "client", fake_client),
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=object(),
+            ),
+            patch.object(
+                edit_function, "_run_command", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            result = await edit_function.execute(**_PARAMS)
+
+        assert result["status"] == "success"
+        mock_run.assert_not_called()
+        kwargs = apps_api.patch_namespaced_deployment.call_args.kwargs
+        assert kwargs["body"] == {"spec": {"replicas": 3}}
+        assert kwargs["_content_type"] == "application/merge-patch+json"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_kubectl_without_client(self, edit_function):
+        """Without an API client the patch goes through kubectl."""
+        with (
+            patch.object(
+                k8s_client, "get_api_client", new_callable=AsyncMock, return_value=None
+            ),
+            patch.object(
+                edit_function, "_run_command", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            mock_run.return_value = {"returncode": 0, "stdout": "patched", "stderr": ""}
+
+            result = await edit_function.execute(**_PARAMS)
+
+        assert result["details"]["output"] == "patched"
+        assert mock_run.call_args.args[0][:4] == ["kubectl", "patch", "deploy", "web"]
+
+    def test_typed_kind_accepts_kubectl_spellings(self):
+        """Short names, plurals and group suffixes map to one typed kind."""
+        assert k8s_client.typed_kind("deploy") == "deployment"
+        assert k8s_client.typed_kind("Deployments.apps") == "deployment"
+        assert k8s_client.typed_kind("configmaps") == "configmap"
+        assert k8s_client.typed_kind("deployments.v1.apps") == "deployment"
+        assert k8s_client.typed_kind("pods.v1") == "pod"
+        assert k8s_client.typed_kind("ingress") is None
+
+    def test_typed_kind_rejects_other_api_groups(self):
+        """Same-named types of other groups are left to kubectl."""
+        assert k8s_client.typed_kind("services.serving.knative.dev") is None
+        assert k8s_client.typed_kind("pods.metrics.k8s.io") is None
+        assert k8s_client.typed_kind("deployments.extensions") is None
+        assert k8s_client.typed_kind("pods.apps") is None
+
+    @pytest.mark.asyncio
+    async def test_run_command_reports_spawn_errors(self, edit_function):
+        """A kubectl that cannot be started becomes an error result."""
+        with patch(
+            "src.shared.functions.edit_resource.run_shell_command_with_cancellation",
+            new_callable=AsyncMock,
+            side_effect=FileNotFoundError("kubectl"),
+        ):
+            result = await edit_function._run_command(["kubectl", "version"])
+
+        assert result == {"returncode": 1, "stdout": "", "stderr": "kubectl"}
+
+    @pytest.mark.asyncio
+    async def test_malformed_patch_is_rejected_up_front(self, edit_function):
+        """Invalid YAML or a non-mapping patch never reaches kubectl."""
+        with (
+            patch.object(
+                k8s_client, "get_api_client", new_callable=AsyncMock
+            ) as mock_client,
+            patch.object(
+                edit_function, "_run_command", new_callable=AsyncMock
+            ) as mock_run,
+        ):
+            for bad in ["spec: [unclosed", "- replicas: 3\n"]:
+                result = await edit_function.execute(**{**_PARAMS, "patch_yaml": bad})
+                assert result["status"] == "error"
+                assert "Invalid patch_yaml" in result["details"]["error"]
+
+        mock_client.assert_not_called()
+        mock_run.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_patches_through_real_client(self, edit_function, fake_apiserver):
+        """The merge patch reaches the API server through kubernetes_asyncio."""
+        path = "/apis/apps/v1/namespaces/default/deployments/web"
+        fake_apiserver.routes[("PATCH", path)] = (
+            200,
+            {"apiVersion": "apps/v1", "kind": "Deployment", "metadata": {}},
+        )
+
+        with patch.object(
+            edit_function, "_run_command", new_callable=AsyncMock
+        ) as mock_run:
+            result = await edit_function.execute(
+                **{**_PARAMS, "context": "fake"},
+                kubeconfig=fake_apiserver.kubeconfig,
+            )
+
+        mock_run.assert_not_called()
+        assert result["status"] == "success"
+        assert fake_apiserver.requests == [("PATCH", path, {"spec": {"replicas": 3}})]
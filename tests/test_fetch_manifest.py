@@ -0,0 +1,417 @@
+"""Tests for fetch manifest function."""
+
+import asyncio
+import os
+import stat
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.shared.functions import fetch_manifest
+from src.shared.functions.fetch_manifest import FetchManifestFunction
+
+
+@pytest.fixture(autouse=True)
+def manifest_cache(tmp_path_factory, monkeypatch):
+    """Keep the download cache out of the home directory and the tests apart."""
+    cache_dir = tmp_path_factory.mktemp("manifest-cache")
+    monkeypatch.setattr(fetch_manifest, "_MANIFEST_CACHE_DIR", cache_dir)
+    # Private download directories are made under the test's own temp dir
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path_factory.mktemp("tmp")))
+    monkeypatch.setattr(fetch_manifest, "_download_dir", None)
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+async def shared_session():
+    """Close the pooled HTTP session before each test's event loop ends."""
+    yield
+    await FetchManifestFunction.aclose()
+
+
+@pytest.fixture
+async def manifest_server():
+    """Serve a few manifests, each response held until all requests arrive."""
+    arrived = asyncio.Event()
+    seen = []
+
+    async def handler(request):
+        seen.append(request.path)
+        if len(seen) == 2:
+            arrived.set()
+        await asyncio.wait_for(arrived.wait(), timeout=2)
+        if request.path == "/missing.yaml":
+            raise web.HTTPNotFound()
+        return web.Response(body=f"name: {request.path}\n".encode())
+
+    app = web.Application()
+    app.router.add_get("/{name}", handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+class TestFetchManifestFunction:
+    """Test cases for fetch manifest function."""
+
+    @pytest.fixture
+    def fetch_function(self):
+        """Create fetch manifest function instance."""
+        return FetchManifestFunction()
+
+    @pytest.mark.asyncio
+    async def test_downloads_run_concurrently(
+        self, fetch_function, manifest_server, tmp_path
+    ):
+        """All URLs are requested at once and results keep the input order."""
+        urls = [
+            str(manifest_server.make_url("/app.yaml")),
+            str(manifest_server.make_url("/missing.yaml")),
+        ]
+
+        result = await fetch_function.execute(urls=urls, destination=f"{tmp_path}/")
+
+        assert result["successful"] == 1
+        assert result["failed"] == 1
+        ok, failed = result["downloaded_files"]
+        assert ok["url"] == urls[0]
+        assert (tmp_path / ok["filename"]).read_bytes() == b"name: /app.yaml\n"
+        assert ok["size"] == result["total_size"]
+        assert failed["url"] == urls[1] and "404" in failed["error"]
+
+    @pytest.mark.asyncio
+    async def test_failed_download_leaves_no_file(
+        self, fetch_function, manifest_server, tmp_path
+    ):
+        """The target file is only created after a successful response."""
+        urls = [
+            str(manifest_server.make_url("/missing.yaml")),
+            str(manifest_server.make_url("/ok.yaml")),
+        ]
+
+        result = await fetch_function.execute(urls=urls, destination=f"{tmp_path}/")
+
+        assert result["successful"] == 1
+        assert [p.name for p in tmp_path.iterdir()] == [
+            result["downloaded_files"][1]["filename"]
+        ]
+
+    @pytest.mark.asyncio
+    async def test_insecure_download_disables_verification(self, fetch_function):
+        """Skipping TLS verification passes ssl=False to aiohttp."""
+        session = MagicMock()
+        session.get.side_effect = RuntimeError("stop")
+
+        for insecure, expected in [(True, False), (False, True)]:
+            with pytest.raises(RuntimeError):
+                await fetch_function._download(
+                    session, "https://example.com/a.yaml", "", insecure
+                )
+            assert session.get.call_args.kwargs["ssl"] is expected
+
+    def test_construct_directory_urls(self, fetch_function):
+        """Known directories use their file table; others get common names."""
+        urls = fetch_function._construct_directory_urls(
+            "https://github.com/o/r/tree/main", ["configmap", "apps"], ["*.yaml"]
+        )
+
+        assert urls[0] == "https://github.com/o/r/raw/main/configmap/configmaps.yaml"
+        assert urls[3:] == [
+            f"https://github.com/o/r/raw/main/apps/{name}"
+            for name in [
+                "deployment.yaml",
+                "service.yaml",
+                "configmap.yaml",
+                "ingress.yaml",
+            ]
+        ]
+
+    @pytest.mark.asyncio
+    async def test_directory_urls_come_from_repository_tree(self, fetch_function):
+        """One Trees API call lists the real files, and is cached per ref."""
+        calls = []
+
+        async def trees(request):
+            calls.append(request.path)
+            return web.json_response(
+                {
+                    "tree": [
+                        {"path": "k8s/apps", "type": "tree"},
+                        {"path": "k8s/apps/web.yaml", "type": "blob"},
+                        {"path": "k8s/apps/README.md", "type": "blob"},
+                        {"path": "k8s/other/db.yaml", "type": "blob"},
+                    ]
+                }
+            )
+
+        app = web.Application()
+        app.router.add_get("/repos/o/r/git/trees/dev", trees)
+        server = TestServer(app)
+        await server.start_server()
+        fetch_manifest._tree_cache.clear()
+        try:
+            with patch.object(fetch_manifest, "_GITHUB_API", str(server.make_url(""))):
+                for _ in range(2):
+                    urls = await fetch_function._list_directory_urls(
+                        "https://github.com/o/r/tree/dev/k8s",
+                        ["apps"],
+                        ["*.yaml"],
+                        {},
+                        False,
+                    )
+                    assert urls == ["https://github.com/o/r/raw/dev/k8s/apps/web.yaml"]
+        finally:
+            await server.close()
+        assert calls == ["/repos/o/r/git/trees/dev"]
+
+    def test_parse_tree_url_offers_every_ref_split(self):
+        """Branch names may contain slashes, so each split is a candidate."""
+        assert fetch_manifest._parse_github_tree_url(
+            "https://github.com/o/r/tree/release/1.0/k8s"
+        ) == (
+            "o",
+            "r",
+            [("release", "1.0/k8s"), ("release/1.0", "k8s"), ("release/1.0/k8s", "")],
+        )
+        assert fetch_manifest._parse_github_tree_url("https://github.com/o/r.git") == (
+            "o",
+            "r",
+            [("main", "")],
+        )
+
+    @pytest.mark.asyncio
+    async def test_tree_listing_handles_slashed_refs_truncation_and_auth(
+        self, fetch_function
+    ):
+        """A slashed branch is found, a truncated tree falls back to guesses,
+        and listings fetched with credentials are never cached.
+        """
+        calls = []
+        truncated = False
+
+        async def trees(request):
+            calls.append((request.path, request.headers.get("Authorization")))
+            if request.match_info["ref"] != "release/1.0":
+                raise web.HTTPNotFound()
+            return web.json_response(
+                {
+                    "tree": [{"path": "k8s/apps/web.yaml", "type": "blob"}],
+                    "truncated": truncated,
+                }
+            )
+
+        app = web.Application()
+        app.router.add_get("/repos/o/r/git/trees/{ref:.+}", trees)
+        server = TestServer(app)
+        await server.start_server()
+        fetch_manifest._tree_cache.clear()
+        base = "https://github.com/o/r/tree/release/1.0/k8s"
+        try:
+            with patch.object(fetch_manifest, "_GITHUB_API", str(server.make_url(""))):
+                urls = await fetch_function._list_directory_urls(
+                    base, ["apps"], ["*.yaml"], {"Authorization": "token x"}, False
+                )
+                assert urls == [
+                    "https://github.com/o/r/raw/release/1.0/k8s/apps/web.yaml"
+                ]
+                assert [path for path, _ in calls] == [
+                    "/repos/o/r/git/trees/release",
+                    "/repos/o/r/git/trees/release/1.0",
+                ]
+                assert fetch_manifest._tree_cache == {}
+
+                truncated = True
+                urls = await fetch_function._list_directory_urls(
+                    base, ["apps"], ["*.yaml"], {}, False
+                )
+                assert urls == fetch_function._construct_directory_urls(
+                    base, ["apps"], ["*.yaml"]
+                )
+                assert fetch_manifest._tree_cache == {}
+        finally:
+            await server.close()
+
+    @pytest.mark.asyncio
+    async def test_duplicates_and_cached_urls_skip_the_network(
+        self, fetch_function, tmp_path, monkeypatch
+    ):
+        """Duplicate URLs download once; later calls reuse or revalidate the cache."""
+        seen = []
+
+        async def handler(request):
+            seen.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304)
+            return web.Response(body=b"kind: ConfigMap\n", headers={"ETag": '"v1"'})
+
+        app = web.Application()
+        app.router.add_get("/cm.yaml", handler)
+        server = TestServer(app)
+        await server.start_server()
+        url = str(server.make_url("/cm.yaml"))
+        try:
+            first = await fetch_function.execute(
+                urls=[url, url], destination=f"{tmp_path}/"
+            )
+            assert first["total_files"] == 1
+            assert seen == [None]
+
+            second = await fetch_function.execute(url=url, destination=f"{tmp_path}/")
+            assert seen == [None]
+
+            monkeypatch.setattr(fetch_manifest, "_MANIFEST_CACHE_TTL", 0.0)
+            third = await fetch_function.execute(url=url, destination=f"{tmp_path}/")
+            assert seen == [None, '"v1"']
+        finally:
+            await server.close()
+
+        for result in (first, second, third):
+            path = result["downloaded_files"][0]["path"]
+            assert open(path, "rb").read() == b"kind: ConfigMap\n"
+
+    @pytest.mark.asyncio
+    async def test_cache_is_opt_in_and_skipped_with_headers(
+        self, fetch_function, manifest_cache, tmp_path, monkeypatch
+    ):
+        """Downloads with headers, or without a cache directory, always go to
+        the network and are never stored.
+        """
+        hits = []
+
+        async def handler(request):
+            hits.append(request.headers.get("Authorization"))
+            return web.Response(body=b"kind: Secret\n")
+
+        app = web.Application()
+        app.router.add_get("/private.yaml", handler)
+        server = TestServer(app)
+        await server.start_server()
+        url = str(server.make_url("/private.yaml"))
+        try:
+            for _ in range(2):
+                result = await fetch_function.execute(
+                    url=url,
+                    destination=f"{tmp_path}/",
+                    headers={"Authorization": "Bearer t"},
+                )
+                assert result["successful"] == 1
+            assert list(manifest_cache.iterdir()) == []
+
+            monkeypatch.setattr(fetch_manifest, "_MANIFEST_CACHE_DIR", None)
+            for _ in range(2):
+                await fetch_function.execute(url=url, destination=f"{tmp_path}/")
+        finally:
+            await server.close()
+
+        assert hits == ["Bearer t", "Bearer t", None, None]
+        assert list(manifest_cache.iterdir()) == []
+
+    def test_destination_names_are_stable_per_url(self, fetch_function, tmp_path):
+        """A URL always maps to the same file name, distinct from other URLs."""
+        a = "https://example.com/apps/web.yaml"
+        b = "https://example.com/other/web.yaml"
+
+        first = fetch_function._resolve_destination(f"{tmp_path}/", a)
+        assert first == fetch_function._resolve_destination(f"{tmp_path}/", a)
+        assert first != fetch_function._resolve_destination(f"{tmp_path}/", b)
+        assert first.name.startswith("web_") and first.suffix == ".yaml"
+        assert not first.exists()
+
+        default = fetch_function._resolve_destination("", a)
+        assert default.name == first.name
+        assert default.parent == fetch_function._resolve_destination("", b).parent
+        assert stat.S_IMODE(default.parent.stat().st_mode) == 0o700
+
+    @pytest.mark.asyncio
+    async def test_destination_directory_is_created_up_front(
+        self, fetch_function, manifest_server, tmp_path
+    ):
+        """A missing destination directory is made once before downloading."""
+        urls = [
+            str(manifest_server.make_url("/a.yaml")),
+            str(manifest_server.make_url("/b.yaml")),
+        ]
+        nested = tmp_path / "nested" / "dir"
+
+        with patch.object(
+            fetch_function,
+            "_prepare_destination",
+            wraps=fetch_function._prepare_destination,
+        ) as prepare:
+            result = await fetch_function.execute(urls=urls, destination=f"{nested}/")
+
+        prepare.assert_called_once_with(f"{nested}/")
+        assert result["successful"] == 2
+        assert sorted(p.name[0] for p in nested.iterdir()) == ["a", "b"]
+        # An existing directory gains a trailing slash so no file is stat'ed
+        assert fetch_function._prepare_destination(str(nested)) == f"{nested}/"
+
+    def test_unusable_destination_falls_back_to_private_dir_once(
+        self, fetch_function, tmp_path
+    ):
+        """A missing or unusable destination becomes the private directory."""
+        blocker = tmp_path / "file.txt"
+        blocker.write_text("")
+        private = f"{fetch_manifest._private_download_dir()}/"
+
+        assert fetch_function._prepare_destination(f"{blocker}/sub/") == private
+        assert fetch_function._prepare_destination("") == private
+
+    @pytest.mark.asyncio
+    async def test_planted_symlink_is_replaced_not_followed(
+        self, fetch_function, manifest_server, tmp_path
+    ):
+        """Files are renamed into place: symlinks are not written through and
+        concurrent fetches of one URL never interleave.
+        """
+        url = str(manifest_server.make_url("/app.yaml"))
+        victim = tmp_path / "victim"
+        victim.write_text("keep")
+        target = fetch_function._resolve_destination(f"{tmp_path}/", url)
+        target.symlink_to(victim)
+
+        results = await asyncio.gather(
+            fetch_function.execute(url=url, destination=f"{tmp_path}/"),
+            fetch_function.execute(url=url, destination=f"{tmp_path}/"),
+        )
+
+        assert [r["successful"] for r in results] == [1, 1]
+        assert victim.read_text() == "keep"
+        assert not target.is_symlink()
+        assert target.read_bytes() == b"name: /app.yaml\n"
+        assert not [p for p in os.listdir(tmp_path) if p.endswith(".part")]
+
+    def test_convert_mapcomposite(self):
+        """Native values pass through untouched; wrappers become dicts and lists."""
+        from types import MappingProxyType
+
+        urls = ["https://example.com/a.yaml"]
+        assert fetch_manifest._convert_mapcomposite(urls) is urls
+        assert fetch_manifest._convert_mapcomposite(None) is None
+        assert fetch_manifest._convert_mapcomposite(MappingProxyType({"a": "1"})) == {
+            "a": "1"
+        }
+        assert fetch_manifest._convert_mapcomposite(("x",)) == ["x"]
+
+    @pytest.mark.asyncio
+    async def test_session_is_reused_between_calls(
+        self, fetch_function, manifest_server, tmp_path
+    ):
+        """Consecutive calls, whatever their headers, share one pooled session."""
+        urls = [
+            str(manifest_server.make_url("/a.yaml")),
+            str(manifest_server.make_url("/b.yaml")),
+        ]
+
+        await fetch_function.execute(
+            urls=urls, destination=f"{tmp_path}/", headers={"X-Token": "t"}
+        )
+        session = FetchManifestFunction._session
+        await fetch_function.execute(url=urls[0], destination=f"{tmp_path}/")
+
+        assert session is not None and not session.closed
+        assert FetchManifestFunction._session is session
@@ -0,0 +1,431 @@
+"""Tests for the helm install, list and repo functions."""
+
+import asyncio
+import base64
+import gzip
+import json
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.shared import k8s_client
+from src.shared.functions.helm import _pool, repo
+from src.shared.functions.helm.install import HelmInstallFunction
+from src.shared.functions.helm.list import HelmListFunction
+from src.shared.functions.helm.repo import HelmRepoFunction
+
+
+class _FakeStream:
+    """Pipe of a ``_FakeProcess`` that yields its data once the process ends."""
+
+    def __init__(self, process, data):
+        self.process = process
+        self.data = data
+
+    async def read(self, n=-1):
+        await self.process.wait()
+        data, self.data = self.data, b""
+        return data
+
+
+class _FakeProcess:
+    """Stand-in for a helm process that records how many run at once.
+
+    A ``--kube-context`` of ``slow`` takes a while and ``bad`` fails.
+    """
+
+    running = 0
+    peak = 0
+    terminated: list = []
+
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self.returncode = None
+        self.stdout = _FakeStream(self, " ".join(cmd[1:]).encode())
+        self.stderr = _FakeStream(self, b"")
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        cls = type(self)
+        cls.running += 1
+        cls.peak = max(cls.peak, cls.running)
+        try:
+            await asyncio.sleep(1 if "slow" in self.cmd else 0.01)
+        finally:
+            cls.running -= 1
+        self.returncode = 1 if "bad" in self.cmd else 0
+
+    def terminate(self):
+        type(self).terminated.append(self.cmd)
+        self._task.cancel()
+        self.returncode = -15
+
+    async def wait(self):
+        try:
+            await asyncio.shield(self._task)
+        except asyncio.CancelledError:
+            if not self._task.cancelled():
+                raise
+        return self.returncode
+
+
+@pytest.fixture
+def fake_helm():
+    """Replace process creation with ``_FakeProcess`` and reset its counters."""
+    _FakeProcess.running = _FakeProcess.peak = 0
+    _FakeProcess.terminated = []
+
+    async def spawn(*cmd, **kwargs):
+        return _FakeProcess(cmd)
+
+    with patch("asyncio.create_subprocess_exec", side_effect=spawn) as mock_spawn:
+        yield mock_spawn
+
+
+class TestHelmBatching:
+    """Test cases for batched helm execution."""
+
+    @pytest.mark.asyncio
+    async def test_install_execute_many_is_bounded(self, fake_helm):
+        """Batched installs run concurrently up to the configured limit."""
+        with patch.object(_pool, "HELM_MAX_CONCURRENCY", 2):
+            results = await HelmInstallFunction().execute_many(
+                [{"chart_name": f"chart{i}"} for i in range(5)]
+            )
+
+        assert [r["status"] for r in results] == ["success"] * 5
+        assert results[3]["output"].startswith("install chart3-release chart3")
+        assert _FakeProcess.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_list_execute_many_keeps_order(self, fake_helm):
+        """Batched lists return one result per item, in input order."""
+        results = await HelmListFunction().execute_many(
+            [{"target_cluster": "c1"}, {"target_cluster": "c2"}]
+        )
+
+        assert [r["output"].split()[-1] for r in results] == ["c1", "c2"]
+        assert _FakeProcess.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_execute_race_first_success_cancels_the_rest(self, fake_helm):
+        """The first successful list stops the batch and kills slow ones."""
+        items = [{"target_cluster": ctx} for ctx in ("slow", "bad", "fast")]
+
+        results = await HelmListFunction().execute_race(items, "first_success")
+
+        assert [r["status"] for r in results] == ["cancelled", "error", "success"]
+        assert len(_FakeProcess.terminated) == 1
+        assert "slow" in _FakeProcess.terminated[0]
+
+    @pytest.mark.asyncio
+    async def test_install_execute_until_never_kills_running_installs(self, fake_helm):
+        """After a failure, running installs finish and queued ones are skipped."""
+        items = [
+            {"chart_name": "app", "target_cluster": ctx}
+            for ctx in ("slow", "bad", "fast")
+        ]
+
+        with patch.object(_pool, "HELM_MAX_CONCURRENCY", 2):
+            results = await HelmInstallFunction().execute_until(items, "first_failure")
+
+        assert [r["status"] for r in results] == ["success", "error", "skipped"]
+        assert _FakeProcess.terminated == []
+        assert not hasattr(HelmInstallFunction, "execute_race")
+
+    @pytest.mark.asyncio
+    async def test_execute_race_first_failure_aborts(self, fake_helm):
+        """A failure stops the batch; modes other than the known ones are refused."""
+        function = HelmListFunction()
+        results = await function.execute_race(
+            [{"target_cluster": "slow"}, {"target_cluster": "bad"}], "first_failure"
+        )
+
+        assert [r["status"] for r in results] == ["cancelled", "error"]
+        with pytest.raises(ValueError):
+            await function.execute_race([], "fastest")
+
+
+class TestHelmInstallFunction:
+    """Test cases for the helm install command line."""
+
+    @pytest.mark.asyncio
+    async def test_builds_flags_in_order_with_defaults(self):
+        """Flags follow the table order; namespace defaults are applied."""
+        function = HelmInstallFunction()
+        with patch.object(function, "_run_command", new_callable=AsyncMock) as run:
+            run.return_value = {"returncode": 0, "stdout": "ok", "stderr": ""}
+
+            await function.execute(
+                chart_name="nginx",
+                target_cluster="c1",
+                set_values=["a=1", "b=2"],
+                wait=True,
+                chart_version="1.2.3",
+                unknown="ignored",
+            )
+            await function.execute(
+                chart_name="nginx", namespace="", create_namespace=False
+            )
+
+        full, bare = (c.args[0] for c in run.call_args_list)
+        assert full == [
+            "helm",
+            "install",
+            "nginx-release",
+            "nginx",
+            "--version",
+            "1.2.3",
+            "--namespace",
+            "default",
+            "--create-namespace",
+            "--set",
+            "a=1",
+            "--set",
+            "b=2",
+            "--wait",
+            "--kube-context",
+            "c1",
+        ]
+        assert bare == ["helm", "install", "nginx-release", "nginx"]
+
+    @pytest.mark.asyncio
+    async def test_missing_chart_name_is_an_error(self):
+        """No helm process is started without a chart."""
+        function = HelmInstallFunction()
+        with patch.object(function, "_run_command", new_callable=AsyncMock) as run:
+            result = await function.execute(release_name="r")
+
+        assert result["status"] == "error"
+        assert "chart_name" in result["error"]
+        run.assert_not_called()
+
+
+class TestRunHelm:
+    """Test cases for the shared helm runner."""
+
+    @pytest.mark.asyncio
+    async def test_repo_list_streams_large_output(self):
+        """Output larger than one read is collected whole from a real process."""
+        size = 3 * _pool._READ_SIZE + 5
+        script = f"import sys; sys.stdout.write('x' * {size}); sys.stderr.write('w')"
+        with patch.object(_pool, "resolve_executable", return_value=sys.executable):
+            result = await HelmRepoFunction()._run_command(["helm", "-c", script])
+
+        assert result == {"returncode": 0, "stdout": "x" * size, "stderr": "w"}
+
+
+def _release_secret(name, namespace, revision, status, chart_version="1.0.0"):
+    """Build a Helm release Secret as returned by the API client."""
+    release = {
+        "name": name,
+        "info": {"status": status, "last_deployed": "2024-05-01T10:00:00Z"},
+        "chart": {
+            "metadata": {
+                "name": "nginx",
+                "version": chart_version,
+                "appVersion": "1.25",
+            }
+        },
+    }
+    payload = base64.b64encode(gzip.compress(json.dumps(release).encode()))
+    return SimpleNamespace(
+        metadata=SimpleNamespace(
+            namespace=namespace,
+            labels={
+                "owner": "helm",
+                "name": name,
+                "status": status,
+                "version": str(revision),
+            },
+        ),
+        data={"release": base64.b64encode(payload).decode()},
+    )
+
+
+class TestHelmListFunction:
+    """Test cases for listing releases."""
+
+    @pytest.mark.asyncio
+    async def test_lists_releases_from_secrets(self):
+        """Only the latest deployed/failed revision of each release is shown."""
+        secrets = [
+            _release_secret("web", "apps", 1, "superseded"),
+            _release_secret("web", "apps", 2, "deployed", "1.1.0"),
+            _release_secret("old", "apps", 1, "uninstalled"),
+        ]
+        core_api = MagicMock()
+        core_api.list_namespaced_secret = AsyncMock(
+            return_value=SimpleNamespace(items=secrets)
+        )
+        fake_client = MagicMock()
+        fake_client.CoreV1Api.return_value = core_api
+        function = HelmListFunction()
+
+        with (
+            patch.object(k8s_client, "client", fake_client),
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=object(),
+            ),
+            patch.object(function, "_run_command", new_callable=AsyncMock) as run,
+        ):
+            result = await function.execute(namespace="apps", target_cluster="c1")
+
+        run.assert_not_called()
+        assert core_api.list_namespaced_secret.call_args.kwargs == {
+            "label_selector": "owner=helm"
+        }
+        header, row = [line.split("\t") for line in result["output"].splitlines()]
+        assert [cell.strip() for cell in header][:3] == [
+            "NAME",
+            "NAMESPACE",
+            "REVISION",
+        ]
+        assert [cell.strip() for cell in row] == [
+            "web",
+            "apps",
+            "2",
+            "2024-05-01T10:00:00Z",
+            "deployed",
+            "nginx-1.1.0",
+            "1.25",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_without_namespace_scope_runs_helm(self, fake_helm):
+        """The context's default namespace is left for helm to resolve."""
+        with patch.object(k8s_client, "get_api_client", new_callable=AsyncMock) as get:
+            result = await HelmListFunction().execute(target_cluster="c1")
+
+        get.assert_not_called()
+        assert result["output"] == "list --kube-context c1"
+
+    @pytest.mark.asyncio
+    async def test_other_storage_drivers_run_helm(self, fake_helm, monkeypatch):
+        """Releases kept in ConfigMaps, SQL or memory are listed by helm."""
+        monkeypatch.setenv("HELM_DRIVER", "configmap")
+        with patch.object(k8s_client, "get_api_client", new_callable=AsyncMock) as get:
+            result = await HelmListFunction().execute(namespace="apps")
+
+        get.assert_not_called()
+        assert result["output"] == "list --namespace apps"
+
+    @pytest.mark.asyncio
+    async def test_undecodable_release_falls_back_to_helm(self, fake_helm):
+        """A release Secret this code cannot decode is left to helm."""
+        secret = _release_secret("web", "apps", 1, "deployed")
+        secret.data["release"] = base64.b64encode(b"not gzip or json").decode()
+        core_api = MagicMock()
+        core_api.list_namespaced_secret = AsyncMock(
+            return_value=SimpleNamespace(items=[secret])
+        )
+        fake_client = MagicMock()
+        fake_client.CoreV1Api.return_value = core_api
+
+        with (
+            patch.object(k8s_client, "client", fake_client),
+            patch.object(
+                k8s_client,
+                "get_api_client",
+                new_callable=AsyncMock,
+                return_value=object(),
+            ),
+        ):
+            result = await HelmListFunction().execute(namespace="apps")
+
+        assert result == {"status": "success", "output": "list --namespace apps"}
+
+    @pytest.mark.asyncio
+    async def test_lists_releases_through_real_client(self, fake_apiserver):
+        """Release Secrets are read from the API server by kubernetes_asyncio."""
+        secret = _release_secret("web", "apps", 1, "deployed")
+        fake_apiserver.routes[("GET", "/api/v1/namespaces/apps/secrets")] = (
+            200,
+            {
+                "apiVersion": "v1",
+                "kind": "SecretList",
+                "metadata": {},
+                "items": [
+                    {
+                        "metadata": vars(secret.metadata),
+                        "data": secret.data,
+                        "type": "helm.sh/release.v1",
+                    }
+                ],
+            },
+        )
+        function = HelmListFunction()
+
+        with patch.object(function, "_run_command", new_callable=AsyncMock) as run:
+            result = await function.execute(
+                namespace="apps",
+                target_cluster="fake",
+                kubeconfig=fake_apiserver.kubeconfig,
+            )
+
+        run.assert_not_called()
+        assert result["output"].splitlines()[1].split("\t")[0].strip() == "web"
+
+
+class TestHelmRepoFunction:
+    """Test cases for helm repository operations."""
+
+    @pytest.mark.asyncio
+    async def test_repo_list_is_cached_until_repositories_change(
+        self, tmp_path, monkeypatch
+    ):
+        """Repeated lists reuse helm's output until an add or a file change."""
+        repositories = tmp_path / "repositories.yaml"
+        repositories.write_text("repositories: []\n")
+        monkeypatch.setenv("HELM_REPOSITORY_CONFIG", str(repositories))
+        function = HelmRepoFunction()
+
+        with patch.object(function, "_run_command", new_callable=AsyncMock) as run:
+            run.return_value = {"returncode": 0, "stdout": "NAME\tURL\n", "stderr": ""}
+
+            first = await function.execute(operation="list")
+            second = await function.execute(operation="list")
+            assert second == first
+            assert run.call_count == 1
+
+            await function.execute(operation="add", repo_name="r", repo_url="u")
+            await function.execute(operation="list")
+            assert run.call_count == 3
+
+            stat = repositories.stat()
+            os.utime(repositories, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            await function.execute(operation="list")
+            assert run.call_count == 4
+
+    @pytest.mark.parametrize(
+        "env, platform, expected",
+        [
+            ({"HELM_REPOSITORY_CONFIG": "/r.yaml"}, "linux", "/r.yaml"),
+            ({"HELM_CONFIG_HOME": "/h"}, "linux", "/h/repositories.yaml"),
+            ({"XDG_CONFIG_HOME": "/x"}, "darwin", "/x/helm/repositories.yaml"),
+            ({}, "linux", "/home/u/.config/helm/repositories.yaml"),
+            ({}, "darwin", "/home/u/Library/Preferences/helm/repositories.yaml"),
+        ],
+    )
+    def test_repository_config_path_follows_helm(
+        self, monkeypatch, env, platform, expected
+    ):
+        """The repositories file is found where helm itself looks for it."""
+        for name in (
+            "HELM_REPOSITORY_CONFIG",
+            "HELM_CONFIG_HOME",
+            "XDG_CONFIG_HOME",
+        ):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        monkeypatch.setenv("HOME", "/home/u")
+        monkeypatch.setattr(repo.sys, "platform", platform)
+
+        assert repo._repository_config_path() == expected
@@ -0,0 +1,70 @@
+"""Tests for the shared Kubernetes API client cache."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.shared import k8s_client
+
+pytest.importorskip("kubernetes_asyncio")
+
+
+class TestGetApiClient:
+    """Test cases for ``get_api_client``."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        """Start and end each test with an empty client cache."""
+        k8s_client._api_clients.clear()
+        yield
+        k8s_client._api_clients.clear()
+
+    @pytest.mark.asyncio
+    async def test_missing_kubeconfig_falls_back(self, tmp_path):
+        """No usable kubeconfig returns None so kubectl is used."""
+        assert await k8s_client.get_api_client("c1", str(tmp_path / "none")) is None
+
+    @pytest.mark.asyncio
+    async def test_malformed_kubeconfig_is_raised(self, tmp_path):
+        """A broken kubeconfig is reported rather than silently skipped."""
+        kubeconfig = tmp_path / "config"
+        kubeconfig.write_text("contexts: [\n")
+
+        with pytest.raises(Exception) as info:
+            await k8s_client.get_api_client("c1", str(kubeconfig))
+
+        assert not isinstance(info.value, k8s_client.config.ConfigException)
+
+    @pytest.mark.asyncio
+    async def test_client_from_another_loop_is_closed(self):
+        """A client cached on an earlier loop is closed when replaced."""
+        old, new = AsyncMock(), AsyncMock()
+        old_loop = asyncio.new_event_loop()
+        old_loop.close()
+        k8s_client._api_clients[("", "c1")] = (old_loop, old)
+
+        with patch.object(
+            k8s_client.config,
+            "new_client_from_config",
+            new_callable=AsyncMock,
+            return_value=new,
+        ):
+            assert await k8s_client.get_api_client("c1") is new
+
+        old.close.assert_awaited_once()
+        await k8s_client.aclose()
+        new.close.assert_awaited_once()
+        assert k8s_client._api_clients == {}
+
+    @pytest.mark.asyncio
+    async def test_close_errors_from_a_dead_loop_are_ignored(self):
+        """Closing a client whose loop is gone is not an error; others are."""
+        dead = AsyncMock()
+        dead.close.side_effect = RuntimeError("Event loop is closed")
+        await k8s_client._close_quietly(dead)
+
+        broken = AsyncMock()
+        broken.close.side_effect = ValueError("bug")
+        with pytest.raises(ValueError):
+            await k8s_client._close_quietly(broken)
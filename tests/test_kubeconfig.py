@@ -1,11 +1,14 @@
 """Tests for kubeconfig function."""
 
+import os
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 import yaml
 
+from src.shared import kubeconfig_cache
 from src.shared.functions.kubeconfig import KubeconfigFunction
 
 
@@ -212,3 +215,49 @@ async def test_kubeconfig_invalid_yaml(kubeconfig_function):
         assert "Failed to parse" in result["error"]
     finally:
         Path(temp_path).unlink()
+
+
+@pytest.mark.asyncio
+async def test_kubeconfig_parse_is_cached_until_modified(
+    kubeconfig_function, sample_kubeconfig, tmp_path
+):
+    """Repeated calls reuse the parsed file; a newer mtime re-parses it."""
+    path = tmp_path / "config"
+    path.write_text(yaml.dump(sample_kubeconfig))
+
+    with patch.object(
+        kubeconfig_cache.yaml, "load", wraps=kubeconfig_cache.yaml.load
+    ) as load:
+        await kubeconfig_function.execute(kubeconfig_path=str(path))
+        await kubeconfig_function.execute(kubeconfig_path=str(path))
+        assert load.call_count == 1
+
+        sample_kubeconfig["current-context"] = "prod-context"
+        path.write_text(yaml.dump(sample_kubeconfig))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        result = await kubeconfig_function.execute(kubeconfig_path=str(path))
+
+    assert load.call_count == 2
+    assert result["current_context"] == "prod-context"
+    assert [k for k in kubeconfig_cache._KCFG_CACHE if k[0] == str(path)] == [
+        (str(path), os.stat(path).st_mtime_ns)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_kubeconfig_duplicate_context_names_pick_first(
+    kubeconfig_function, sample_kubeconfig, tmp_path
+):
+    """The first context with a requested name is the one described."""
+    duplicate = {"name": "test-context", "context": {"cluster": "other-cluster"}}
+    sample_kubeconfig["contexts"].append(duplicate)
+    path = tmp_path / "config"
+    path.write_text(yaml.dump(sample_kubeconfig))
+
+    result = await kubeconfig_function.execute(
+        kubeconfig_path=str(path), context="test-context"
+    )
+
+    assert result["total_contexts"] == 3
+    assert result["selected_context"]["cluster"] == "test-cluster"
@@ -0,0 +1,28 @@
+"""Tests for the shared kubeconfig loader."""
+
+import yaml
+
+from src.shared import kubeconfig_cache
+from src.shared.kubeconfig_cache import load_kubeconfig
+
+
+def test_uses_libyaml_loader_when_available():
+    """The C-accelerated safe loader is picked when PyYAML ships with libyaml."""
+    if yaml.__with_libyaml__:
+        assert kubeconfig_cache._SafeLoader is yaml.CSafeLoader
+    else:
+        assert kubeconfig_cache._SafeLoader is yaml.SafeLoader
+
+
+def test_cache_is_bounded(tmp_path, monkeypatch):
+    """The oldest file is evicted once the cache is full."""
+    monkeypatch.setattr(kubeconfig_cache, "_KCFG_CACHE", {})
+    paths = []
+    for i in range(kubeconfig_cache._KCFG_CACHE_SIZE + 1):
+        path = tmp_path / f"config{i}"
+        path.write_text(f"current-context: c{i}\n")
+        paths.append(str(path))
+        assert load_kubeconfig(str(path)) == {"current-context": f"c{i}"}
+
+    cached = [key[0] for key in kubeconfig_cache._KCFG_CACHE]
+    assert cached == paths[1:]
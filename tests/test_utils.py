@@ -0,0 +1,22 @@
+"""Tests for shared utilities."""
+
+import pytest
+
+from src.shared.utils import env_int
+
+
+class TestEnvInt:
+    """Test cases for ``env_int``."""
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [(None, 16), ("4", 4), ("", 16), ("lots", 16), ("0", 16), ("-2", 16)],
+    )
+    def test_bad_values_fall_back_to_default(self, monkeypatch, value, expected):
+        """Only positive integers override the default."""
+        if value is None:
+            monkeypatch.delenv("A2A_TEST_LIMIT", raising=False)
+        else:
+            monkeypatch.setenv("A2A_TEST_LIMIT", value)
+
+        assert env_int("A2A_TEST_LIMIT", 16) == expected